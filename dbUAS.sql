@@ -227,4 +227,7 @@ CREATE TABLE IF NOT EXISTS penanaman (
     penanaman_id SERIAL PRIMARY KEY,
     id_survey INTEGER REFERENCES survey_data(survey_id),
     tanggal_penanaman DATE
-);
\ No newline at end of file
+);
+
+-- Perubahan skema setelah ini ada di folder migrasi/, jalankan:
+--   python projekFinal.py migrate
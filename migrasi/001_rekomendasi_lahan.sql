@@ -0,0 +1,12 @@
+-- Hasil job rekomendasi batch (python projekFinal.py recommend-batch)
+CREATE TABLE IF NOT EXISTS rekomendasi_lahan (
+    id_lahan INTEGER REFERENCES lahan(lahan_id) ON DELETE CASCADE,
+    peringkat INTEGER NOT NULL,
+    id_tanaman INTEGER REFERENCES tanaman(tanaman_id) ON DELETE CASCADE,
+    id_iklim INTEGER REFERENCES iklim(iklim_id),
+    ph_avg FLOAT,
+    nutrisi_avg FLOAT,
+    kelembapan_avg FLOAT,
+    dihitung TIMESTAMP default now(),
+    PRIMARY KEY (id_lahan, peringkat)
+);
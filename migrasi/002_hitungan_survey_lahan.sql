@@ -0,0 +1,60 @@
+ALTER TABLE lahan ADD COLUMN IF NOT EXISTS jumlah_survey INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE lahan ADD COLUMN IF NOT EXISTS survey_terakhir DATE NULL;
+
+-- Jumlah survey & tanggal survey terakhir di lahan, ikut transaksi insert/delete survey_data
+CREATE OR REPLACE FUNCTION hitung_survey_lahan() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE lahan l
+        SET jumlah_survey = GREATEST(l.jumlah_survey - h.jumlah, 0),
+            survey_terakhir = (
+                SELECT MAX(sd.tanggal_survey) FROM survey_data sd WHERE sd.id_lahan = l.lahan_id
+            )
+        FROM (SELECT id_lahan, COUNT(*) AS jumlah FROM lama GROUP BY id_lahan) h
+        WHERE l.lahan_id = h.id_lahan;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE lahan l
+        SET jumlah_survey = l.jumlah_survey + h.jumlah,
+            survey_terakhir = GREATEST(l.survey_terakhir, h.terakhir)
+        FROM (
+            SELECT id_lahan, COUNT(*) AS jumlah, MAX(tanggal_survey) AS terakhir
+            FROM baru
+            GROUP BY id_lahan
+        ) h
+        WHERE l.lahan_id = h.id_lahan;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS survey_data_hitung_insert ON survey_data;
+CREATE TRIGGER survey_data_hitung_insert
+    AFTER INSERT ON survey_data
+    REFERENCING NEW TABLE AS baru
+    FOR EACH STATEMENT EXECUTE FUNCTION hitung_survey_lahan();
+
+DROP TRIGGER IF EXISTS survey_data_hitung_update ON survey_data;
+CREATE TRIGGER survey_data_hitung_update
+    AFTER UPDATE ON survey_data
+    REFERENCING OLD TABLE AS lama NEW TABLE AS baru
+    FOR EACH STATEMENT EXECUTE FUNCTION hitung_survey_lahan();
+
+DROP TRIGGER IF EXISTS survey_data_hitung_delete ON survey_data;
+CREATE TRIGGER survey_data_hitung_delete
+    AFTER DELETE ON survey_data
+    REFERENCING OLD TABLE AS lama
+    FOR EACH STATEMENT EXECUTE FUNCTION hitung_survey_lahan();
+
+-- Isi hitungan untuk data survey yang sudah ada
+UPDATE lahan l
+SET jumlah_survey = h.jumlah,
+    survey_terakhir = h.terakhir
+FROM (
+    SELECT id_lahan, COUNT(*) AS jumlah, MAX(tanggal_survey) AS terakhir
+    FROM survey_data
+    GROUP BY id_lahan
+) h
+WHERE l.lahan_id = h.id_lahan;
@@ -0,0 +1,29 @@
+-- Index dan constraint untuk query di projekFinal.py.
+-- Cek hasilnya: python projekFinal.py migrate --cek
+
+-- Login, signup, delete_user: cari user berdasarkan username
+ALTER TABLE users ADD CONSTRAINT users_username_unik UNIQUE (username);
+
+-- Join users -> user_roles (login, read_all_users, overview petani).
+-- Index unik ini juga dipakai untuk cari berdasarkan id_user saja.
+ALTER TABLE user_roles ADD CONSTRAINT user_roles_user_role_unik UNIQUE (id_user, id_role);
+
+CREATE UNIQUE INDEX IF NOT EXISTS roles_nama_unik ON roles (LOWER(nama_role));
+
+-- Lahan milik petani (lihat_lahan_universal petani, hasil survey petani)
+CREATE INDEX IF NOT EXISTS lahan_petani_idx ON lahan (id_user_petani);
+
+-- Survey per lahan urut tanggal (hitung 3 survey terakhir, hasil survey, rekomendasi batch)
+CREATE INDEX IF NOT EXISTS survey_data_lahan_tanggal_idx
+    ON survey_data (id_lahan, tanggal_survey DESC, survey_id DESC);
+
+-- Cek tanaman masih dipakai survey sebelum dihapus
+CREATE INDEX IF NOT EXISTS survey_data_tanaman_idx ON survey_data (id_tanaman);
+
+-- Cek nama tanaman kembar per tipe di add_tanaman
+CREATE INDEX IF NOT EXISTS tanaman_nama_tipe_idx ON tanaman (LOWER(nama), id_tipe_tanaman);
+
+-- cari_atau_buat_tabel_alamat: nama master alamat unik tanpa beda huruf besar/kecil
+CREATE UNIQUE INDEX IF NOT EXISTS provinsi_nama_unik ON provinsi (LOWER(nama_provinsi));
+CREATE UNIQUE INDEX IF NOT EXISTS kota_nama_unik ON kota (LOWER(nama_kota));
+CREATE UNIQUE INDEX IF NOT EXISTS kecamatan_nama_unik ON kecamatan (LOWER(nama_kecamatan));
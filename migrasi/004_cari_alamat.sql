@@ -0,0 +1,22 @@
+-- Pencarian master alamat (cari_tabel_alamat) untuk type-ahead.
+-- Awalan nama: LIKE 'kata%' pakai index text_pattern_ops.
+CREATE INDEX IF NOT EXISTS provinsi_nama_awalan_idx ON provinsi (LOWER(nama_provinsi) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS kota_nama_awalan_idx ON kota (LOWER(nama_kota) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS kecamatan_nama_awalan_idx ON kecamatan (LOWER(nama_kecamatan) text_pattern_ops);
+
+-- Potongan nama di tengah dan salah ketik: index trigram, hanya kalau pg_trgm tersedia.
+-- Tanpa pg_trgm pencarian otomatis pakai awalan saja.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS provinsi_nama_trgm_idx
+            ON provinsi USING gin (LOWER(nama_provinsi) gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS kota_nama_trgm_idx
+            ON kota USING gin (LOWER(nama_kota) gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS kecamatan_nama_trgm_idx
+            ON kecamatan USING gin (LOWER(nama_kecamatan) gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm tidak tersedia, pencarian alamat hanya berdasarkan awalan nama';
+    END IF;
+END $$;
@@ -0,0 +1,8 @@
+-- claim_lahan_berikutnya: hanya lahan yang belum diklaim yang dicari,
+-- index parsial tetap kecil walaupun sebagian besar lahan sudah diklaim.
+CREATE INDEX IF NOT EXISTS lahan_belum_diklaim_idx
+    ON lahan (id_alamat, lahan_id)
+    WHERE id_user_surveyor IS NULL;
+
+-- Lokasi lahan dibandingkan per kecamatan/kota/provinsi
+CREATE INDEX IF NOT EXISTS alamat_kecamatan_idx ON alamat (id_kecamatan);
@@ -0,0 +1,140 @@
+-- Statistik tanah per lahan untuk 3 survey terakhir, 7 hari dan 30 hari.
+-- Jendela hari dihitung mundur dari tanggal survey terakhir lahan itu,
+-- jadi statistik hanya berubah kalau survey_data/kondisi_tanah berubah.
+CREATE TABLE IF NOT EXISTS statistik_tanah_lahan (
+    id_lahan          INTEGER NOT NULL REFERENCES lahan(lahan_id) ON DELETE CASCADE,
+    jendela           VARCHAR(10) NOT NULL,
+    jumlah            INTEGER NOT NULL,
+    id_iklim_terakhir INTEGER REFERENCES iklim(iklim_id),
+    ph_avg            FLOAT,
+    ph_min            FLOAT,
+    ph_max            FLOAT,
+    ph_std            FLOAT,
+    nutrisi_avg       FLOAT,
+    nutrisi_min       FLOAT,
+    nutrisi_max       FLOAT,
+    nutrisi_std       FLOAT,
+    kelembapan_avg    FLOAT,
+    kelembapan_min    FLOAT,
+    kelembapan_max    FLOAT,
+    kelembapan_std    FLOAT,
+    diperbarui        TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (id_lahan, jendela)
+);
+
+-- Hitung ulang statistik lahan yang disebut saja. Tiap lahan hanya membaca
+-- survey 30 hari terakhirnya lewat survey_data_lahan_tanggal_idx.
+CREATE OR REPLACE FUNCTION refresh_statistik_tanah(lahan_ids INTEGER[]) RETURNS VOID AS $$
+BEGIN
+    -- Kunci baris lahan (urut id) supaya dua transaksi di lahan yang sama
+    -- bergantian, dan yang kedua ikut menghitung survey dari yang pertama
+    PERFORM 1 FROM lahan
+    WHERE lahan_id = ANY(lahan_ids)
+    ORDER BY lahan_id
+    FOR NO KEY UPDATE;
+
+    DELETE FROM statistik_tanah_lahan
+    WHERE id_lahan = ANY(lahan_ids);
+
+    INSERT INTO statistik_tanah_lahan (
+        id_lahan, jendela, jumlah, id_iklim_terakhir,
+        ph_avg, ph_min, ph_max, ph_std,
+        nutrisi_avg, nutrisi_min, nutrisi_max, nutrisi_std,
+        kelembapan_avg, kelembapan_min, kelembapan_max, kelembapan_std
+    )
+    SELECT
+        s.lahan_id, j.jendela, COUNT(*), MAX(akhir.id_iklim),
+        AVG(kt.ph), MIN(kt.ph), MAX(kt.ph), STDDEV_SAMP(kt.ph),
+        AVG(kt.kandungan_nutrisi), MIN(kt.kandungan_nutrisi),
+        MAX(kt.kandungan_nutrisi), STDDEV_SAMP(kt.kandungan_nutrisi),
+        AVG(kt.kelembapan), MIN(kt.kelembapan), MAX(kt.kelembapan), STDDEV_SAMP(kt.kelembapan)
+    FROM lahan s
+    CROSS JOIN LATERAL (
+        SELECT sd.tanggal_survey, sd.id_iklim
+        FROM survey_data sd
+        WHERE sd.id_lahan = s.lahan_id
+          AND sd.id_tanah IS NOT NULL
+        ORDER BY sd.tanggal_survey DESC, sd.survey_id DESC
+        LIMIT 1
+    ) akhir
+    CROSS JOIN LATERAL (
+        SELECT '3_survey' AS jendela, t.id_tanah
+        FROM (
+            SELECT sd.id_tanah
+            FROM survey_data sd
+            WHERE sd.id_lahan = s.lahan_id
+              AND sd.id_tanah IS NOT NULL
+            ORDER BY sd.tanggal_survey DESC, sd.survey_id DESC
+            LIMIT 3
+        ) t
+        UNION ALL
+        SELECT '7_hari', sd.id_tanah
+        FROM survey_data sd
+        WHERE sd.id_lahan = s.lahan_id
+          AND sd.tanggal_survey > akhir.tanggal_survey - 7
+        UNION ALL
+        SELECT '30_hari', sd.id_tanah
+        FROM survey_data sd
+        WHERE sd.id_lahan = s.lahan_id
+          AND sd.tanggal_survey > akhir.tanggal_survey - 30
+    ) j
+    JOIN kondisi_tanah kt ON kt.kondisi_tanah_id = j.id_tanah
+    -- Lahan yang sudah dihapus tidak terbaca lagi, jadi tidak dibuatkan baris
+    WHERE s.lahan_id = ANY(lahan_ids)
+    GROUP BY s.lahan_id, j.jendela;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION statistik_tanah_survey() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_statistik_tanah(ARRAY(SELECT DISTINCT id_lahan FROM baru));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_statistik_tanah(ARRAY(SELECT DISTINCT id_lahan FROM lama));
+    ELSE
+        PERFORM refresh_statistik_tanah(ARRAY(
+            SELECT id_lahan FROM baru UNION SELECT id_lahan FROM lama
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Nilai tanah yang diubah belakangan ikut memperbarui lahan yang memakainya
+CREATE OR REPLACE FUNCTION statistik_tanah_kondisi() RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_statistik_tanah(ARRAY(
+        SELECT DISTINCT sd.id_lahan
+        FROM survey_data sd
+        WHERE sd.id_tanah IN (SELECT kondisi_tanah_id FROM baru)
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS survey_data_statistik_insert ON survey_data;
+CREATE TRIGGER survey_data_statistik_insert
+    AFTER INSERT ON survey_data
+    REFERENCING NEW TABLE AS baru
+    FOR EACH STATEMENT EXECUTE FUNCTION statistik_tanah_survey();
+
+DROP TRIGGER IF EXISTS survey_data_statistik_update ON survey_data;
+CREATE TRIGGER survey_data_statistik_update
+    AFTER UPDATE ON survey_data
+    REFERENCING OLD TABLE AS lama NEW TABLE AS baru
+    FOR EACH STATEMENT EXECUTE FUNCTION statistik_tanah_survey();
+
+DROP TRIGGER IF EXISTS survey_data_statistik_delete ON survey_data;
+CREATE TRIGGER survey_data_statistik_delete
+    AFTER DELETE ON survey_data
+    REFERENCING OLD TABLE AS lama
+    FOR EACH STATEMENT EXECUTE FUNCTION statistik_tanah_survey();
+
+DROP TRIGGER IF EXISTS kondisi_tanah_statistik_update ON kondisi_tanah;
+CREATE TRIGGER kondisi_tanah_statistik_update
+    AFTER UPDATE ON kondisi_tanah
+    REFERENCING NEW TABLE AS baru
+    FOR EACH STATEMENT EXECUTE FUNCTION statistik_tanah_kondisi();
+
+-- Isi statistik untuk survey yang sudah ada
+SELECT refresh_statistik_tanah(ARRAY(SELECT DISTINCT id_lahan FROM survey_data WHERE id_lahan IS NOT NULL));
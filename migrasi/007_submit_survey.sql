@@ -0,0 +1,51 @@
+-- Simpan satu survey dalam satu panggilan (satu round trip dari aplikasi):
+-- klaim lahan + update ketinggian, insert kondisi_tanah, insert survey_data,
+-- lalu kembalikan survey_id dan jumlah survey lahan setelahnya.
+-- Lahan milik surveyor lain / tidak ada: id_survey NULL dan tidak ada yang ditulis.
+-- Error di tengah jalan membatalkan semuanya, tidak ada kondisi_tanah yatim.
+CREATE OR REPLACE FUNCTION submit_survey(
+    p_lahan         INTEGER,
+    p_surveyor      INTEGER,
+    p_iklim         INTEGER,
+    p_kondisi_tanah VARCHAR,
+    p_ph            FLOAT,
+    p_nutrisi       FLOAT,
+    p_kelembapan    FLOAT,
+    p_ketinggian    REAL    DEFAULT NULL,
+    p_tanaman       INTEGER DEFAULT NULL,
+    p_status        VARCHAR DEFAULT 'waiting',
+    p_tanggal       DATE    DEFAULT current_date
+) RETURNS TABLE (id_survey INTEGER, jumlah INTEGER) AS $$
+DECLARE
+    v_tanah  INTEGER;
+    v_survey INTEGER;
+BEGIN
+    -- Sama seperti claim_lahan_for_surveyor: kalau balapan, yang kedua menunggu
+    -- lock baris lalu kondisi surveyor dicek ulang
+    UPDATE lahan l
+    SET id_user_surveyor = p_surveyor,
+        ketinggian = COALESCE(p_ketinggian, l.ketinggian)
+    WHERE l.lahan_id = p_lahan
+      AND (l.id_user_surveyor IS NULL OR l.id_user_surveyor = p_surveyor);
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT NULL::INTEGER, NULL::INTEGER;
+        RETURN;
+    END IF;
+
+    INSERT INTO kondisi_tanah (kondisi_tanah, ph, kandungan_nutrisi, kelembapan)
+    VALUES (p_kondisi_tanah, p_ph, p_nutrisi, p_kelembapan)
+    RETURNING kondisi_tanah_id INTO v_tanah;
+
+    INSERT INTO survey_data (
+        id_user_surveyor, id_lahan, id_iklim, id_tanah, status_survey, id_tanaman, tanggal_survey
+    ) VALUES (
+        p_surveyor, p_lahan, p_iklim, v_tanah, p_status, p_tanaman, p_tanggal
+    )
+    RETURNING survey_data.survey_id INTO v_survey;
+
+    -- jumlah_survey sudah diupdate trigger survey_data_hitung_insert
+    RETURN QUERY
+    SELECT v_survey, l.jumlah_survey FROM lahan l WHERE l.lahan_id = p_lahan;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,7 @@
+-- Survey dari jurnal offline surveyor membawa id_klien (dibuat di perangkat).
+-- Sync yang diulang setelah putus di tengah jalan tidak membuat survey dobel.
+ALTER TABLE survey_data ADD COLUMN IF NOT EXISTS id_klien VARCHAR(36) NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS survey_data_id_klien_key
+    ON survey_data (id_klien)
+    WHERE id_klien IS NOT NULL;
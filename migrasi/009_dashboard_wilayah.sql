@@ -0,0 +1,50 @@
+-- Agregat dashboard admin per provinsi/kota/kecamatan (tingkat + id_wilayah).
+-- Diisi refresh_dashboard di aplikasi (python projekFinal.py dashboard-refresh):
+-- bagian survey ditambah dari survey_data baru saja (survey_id > watermark),
+-- jumlah lahan dihitung ulang tiap refresh.
+CREATE TABLE IF NOT EXISTS dashboard_wilayah (
+    tingkat          VARCHAR(10) NOT NULL,
+    id_wilayah       INTEGER     NOT NULL,
+    jumlah_lahan     INTEGER     NOT NULL DEFAULT 0,
+    lahan_diklaim    INTEGER     NOT NULL DEFAULT 0,
+    jumlah_survey    INTEGER     NOT NULL DEFAULT 0,
+    -- jumlah & total nilai tanah, rata-rata = total / jumlah_tanah
+    jumlah_tanah     INTEGER     NOT NULL DEFAULT 0,
+    total_ph         FLOAT       NOT NULL DEFAULT 0,
+    total_nutrisi    FLOAT       NOT NULL DEFAULT 0,
+    total_kelembapan FLOAT       NOT NULL DEFAULT 0,
+    survey_terakhir  DATE,
+    PRIMARY KEY (tingkat, id_wilayah)
+);
+
+CREATE TABLE IF NOT EXISTS dashboard_survey_harian (
+    tingkat    VARCHAR(10) NOT NULL,
+    id_wilayah INTEGER     NOT NULL,
+    tanggal    DATE        NOT NULL,
+    jumlah     INTEGER     NOT NULL,
+    PRIMARY KEY (tingkat, id_wilayah, tanggal)
+);
+
+-- Tanaman yang dipilih surveyor (survey_data.id_tanaman) per wilayah
+CREATE TABLE IF NOT EXISTS dashboard_tanaman (
+    tingkat    VARCHAR(10) NOT NULL,
+    id_wilayah INTEGER     NOT NULL,
+    id_tanaman INTEGER     NOT NULL,
+    jumlah     INTEGER     NOT NULL,
+    PRIMARY KEY (tingkat, id_wilayah, id_tanaman)
+);
+
+-- survey_id terbesar yang sudah masuk agregat
+CREATE TABLE IF NOT EXISTS dashboard_watermark (
+    id                 INTEGER PRIMARY KEY CHECK (id = 1),
+    survey_id_terakhir INTEGER   NOT NULL DEFAULT 0,
+    diperbarui         TIMESTAMP
+);
+INSERT INTO dashboard_watermark (id) VALUES (1) ON CONFLICT DO NOTHING;
+
+-- survey_id di bawah watermark yang belum terlihat saat refresh (transaksi yang
+-- commit belakangan), dicek lagi di refresh berikutnya sampai kedaluwarsa
+CREATE TABLE IF NOT EXISTS dashboard_survey_celah (
+    survey_id INTEGER PRIMARY KEY,
+    dicatat   TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -0,0 +1,31 @@
+-- Pencarian user dan lahan di menu admin (cari_user, cari_lahan).
+-- Teks user yang dicari: nama, username, email, no_telp jadi satu.
+-- Ekspresinya harus sama persis dengan TEKS_CARI_USER di projekFinal.py.
+
+-- Awalan (LIKE 'kata%'), dipakai juga kalau pg_trgm tidak ada
+CREATE INDEX IF NOT EXISTS users_username_awalan_idx ON users (LOWER(username) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS users_nama_awalan_idx ON users (LOWER(name) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS users_email_awalan_idx ON users (LOWER(email) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS users_telp_awalan_idx ON users (no_telp text_pattern_ops);
+CREATE INDEX IF NOT EXISTS alamat_jalan_awalan_idx ON alamat (LOWER(nama_jalan) text_pattern_ops);
+
+-- Lahan dicari lewat alamat dan wilayahnya
+CREATE INDEX IF NOT EXISTS lahan_alamat_idx ON lahan (id_alamat);
+CREATE INDEX IF NOT EXISTS alamat_kota_idx ON alamat (id_kota);
+CREATE INDEX IF NOT EXISTS alamat_provinsi_idx ON alamat (id_provinsi);
+
+-- Potongan kata dan salah ketik: index trigram, hanya kalau pg_trgm tersedia
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS users_teks_trgm_idx ON users USING gin (
+            LOWER(COALESCE(name, '') || ' ' || COALESCE(username, '') || ' '
+                  || COALESCE(email, '') || ' ' || COALESCE(no_telp, '')) gin_trgm_ops
+        );
+        CREATE INDEX IF NOT EXISTS users_nama_trgm_idx ON users USING gin (LOWER(name) gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS alamat_jalan_trgm_idx ON alamat USING gin (LOWER(nama_jalan) gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm tidak tersedia, pencarian user dan lahan hanya berdasarkan awalan';
+    END IF;
+END $$;
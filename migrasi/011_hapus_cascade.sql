@@ -0,0 +1,56 @@
+-- Aturan hapus antar tabel supaya hapus lahan/user (hapus_lahan_massal,
+-- hapus_user_massal) tidak meninggalkan baris yatim atau gagal karena FK.
+
+-- Lahan dihapus -> survey lahan itu ikut terhapus, survey -> penanaman ikut terhapus
+ALTER TABLE survey_data DROP CONSTRAINT IF EXISTS survey_data_id_lahan_fkey;
+ALTER TABLE survey_data ADD CONSTRAINT survey_data_id_lahan_fkey
+    FOREIGN KEY (id_lahan) REFERENCES lahan(lahan_id) ON DELETE CASCADE;
+
+ALTER TABLE penanaman DROP CONSTRAINT IF EXISTS penanaman_id_survey_fkey;
+ALTER TABLE penanaman ADD CONSTRAINT penanaman_id_survey_fkey
+    FOREIGN KEY (id_survey) REFERENCES survey_data(survey_id) ON DELETE CASCADE;
+
+-- User dihapus -> role ikut terhapus, lahan petani ikut terhapus,
+-- lahan yang diklaim surveyor kembali ke antrian, riwayat survey tetap ada
+ALTER TABLE user_roles DROP CONSTRAINT IF EXISTS user_roles_id_user_fkey;
+ALTER TABLE user_roles ADD CONSTRAINT user_roles_id_user_fkey
+    FOREIGN KEY (id_user) REFERENCES users(user_id) ON DELETE CASCADE;
+
+ALTER TABLE lahan DROP CONSTRAINT IF EXISTS lahan_id_user_petani_fkey;
+ALTER TABLE lahan ADD CONSTRAINT lahan_id_user_petani_fkey
+    FOREIGN KEY (id_user_petani) REFERENCES users(user_id) ON DELETE CASCADE;
+
+ALTER TABLE lahan DROP CONSTRAINT IF EXISTS lahan_id_user_surveyor_fkey;
+ALTER TABLE lahan ADD CONSTRAINT lahan_id_user_surveyor_fkey
+    FOREIGN KEY (id_user_surveyor) REFERENCES users(user_id) ON DELETE SET NULL;
+
+ALTER TABLE survey_data DROP CONSTRAINT IF EXISTS survey_data_id_user_surveyor_fkey;
+ALTER TABLE survey_data ADD CONSTRAINT survey_data_id_user_surveyor_fkey
+    FOREIGN KEY (id_user_surveyor) REFERENCES users(user_id) ON DELETE SET NULL;
+
+-- Kolom FK yang dicari saat cascade / set null, tanpa index tiap baris induk = seq scan
+CREATE INDEX IF NOT EXISTS lahan_surveyor_idx ON lahan (id_user_surveyor);
+CREATE INDEX IF NOT EXISTS survey_data_surveyor_idx ON survey_data (id_user_surveyor);
+CREATE INDEX IF NOT EXISTS survey_data_tanah_idx ON survey_data (id_tanah);
+CREATE INDEX IF NOT EXISTS penanaman_survey_idx ON penanaman (id_survey);
+
+-- kondisi_tanah direferensikan survey_data (bukan sebaliknya) jadi tidak bisa
+-- ON DELETE CASCADE: hapus kondisi_tanah yang tidak dipakai survey lain lagi
+-- setelah survey dihapus, termasuk yang terhapus lewat cascade lahan/user.
+CREATE OR REPLACE FUNCTION hapus_kondisi_tanah_yatim() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM kondisi_tanah kt
+    USING (SELECT DISTINCT id_tanah FROM lama WHERE id_tanah IS NOT NULL) l
+    WHERE kt.kondisi_tanah_id = l.id_tanah
+      AND NOT EXISTS (
+          SELECT 1 FROM survey_data sd WHERE sd.id_tanah = kt.kondisi_tanah_id
+      );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS survey_data_hapus_tanah ON survey_data;
+CREATE TRIGGER survey_data_hapus_tanah
+    AFTER DELETE ON survey_data
+    REFERENCING OLD TABLE AS lama
+    FOR EACH STATEMENT EXECUTE FUNCTION hapus_kondisi_tanah_yatim();
@@ -0,0 +1,84 @@
+-- claim_lahan_berikutnya per tingkat: tiap tingkat (kecamatan, kota, provinsi,
+-- sisanya) satu probe LIMIT 1 ... SKIP LOCKED lewat index, berhenti di tingkat
+-- pertama yang dapat lahan. Tidak lagi mengurutkan semua lahan belum diklaim.
+-- Probe wilayah tanpa ORDER BY: dengan urut lahan_id planner memilih menyusuri
+-- semua lahan belum diklaim lewat lahan_belum_diklaim_id_idx, lambat begitu
+-- wilayahnya habis. Tanpa urutan, probe mulai dari alamat wilayah itu.
+
+-- Tingkat terakhir: lahan belum diklaim dengan lahan_id terkecil
+CREATE INDEX IF NOT EXISTS lahan_belum_diklaim_id_idx
+    ON lahan (lahan_id)
+    WHERE id_user_surveyor IS NULL;
+
+-- p_tingkat: 0 = kecamatan saja, 1 = sampai kota, 2 = sampai provinsi, 3 = semua
+CREATE OR REPLACE FUNCTION klaim_lahan_berikutnya(
+    p_surveyor  INTEGER,
+    p_kecamatan INTEGER DEFAULT NULL,
+    p_tingkat   INTEGER DEFAULT 3
+) RETURNS INTEGER AS $$
+DECLARE
+    v_kecamatan INTEGER;
+    v_kota      INTEGER;
+    v_provinsi  INTEGER;
+    v_lahan     INTEGER;
+BEGIN
+    -- Acuan lokasi: alamat surveyor, atau kecamatan yang diminta
+    IF p_kecamatan IS NULL THEN
+        SELECT a.id_kecamatan, a.id_kota, a.id_provinsi
+        INTO v_kecamatan, v_kota, v_provinsi
+        FROM users u
+        JOIN alamat a ON a.alamat_id = u.id_alamat
+        WHERE u.user_id = p_surveyor;
+    ELSE
+        SELECT a.id_kecamatan, a.id_kota, a.id_provinsi
+        INTO v_kecamatan, v_kota, v_provinsi
+        FROM alamat a
+        WHERE a.id_kecamatan = p_kecamatan
+        LIMIT 1;
+    END IF;
+
+    IF v_kecamatan IS NOT NULL THEN
+        SELECT l.lahan_id INTO v_lahan
+        FROM alamat a
+        JOIN lahan l ON l.id_alamat = a.alamat_id
+        WHERE a.id_kecamatan = v_kecamatan
+          AND l.id_user_surveyor IS NULL
+        LIMIT 1
+        FOR UPDATE OF l SKIP LOCKED;
+    END IF;
+
+    IF v_lahan IS NULL AND p_tingkat >= 1 AND v_kota IS NOT NULL THEN
+        SELECT l.lahan_id INTO v_lahan
+        FROM alamat a
+        JOIN lahan l ON l.id_alamat = a.alamat_id
+        WHERE a.id_kota = v_kota
+          AND l.id_user_surveyor IS NULL
+        LIMIT 1
+        FOR UPDATE OF l SKIP LOCKED;
+    END IF;
+
+    IF v_lahan IS NULL AND p_tingkat >= 2 AND v_provinsi IS NOT NULL THEN
+        SELECT l.lahan_id INTO v_lahan
+        FROM alamat a
+        JOIN lahan l ON l.id_alamat = a.alamat_id
+        WHERE a.id_provinsi = v_provinsi
+          AND l.id_user_surveyor IS NULL
+        LIMIT 1
+        FOR UPDATE OF l SKIP LOCKED;
+    END IF;
+
+    IF v_lahan IS NULL AND p_tingkat >= 3 THEN
+        SELECT l.lahan_id INTO v_lahan
+        FROM lahan l
+        WHERE l.id_user_surveyor IS NULL
+        ORDER BY l.lahan_id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED;
+    END IF;
+
+    IF v_lahan IS NOT NULL THEN
+        UPDATE lahan SET id_user_surveyor = p_surveyor WHERE lahan_id = v_lahan;
+    END IF;
+    RETURN v_lahan;
+END;
+$$ LANGUAGE plpgsql;
@@ -1,12 +1,36 @@
+import argparse
+import csv
+import heapq
+import io
+import json
+import math
 import os
+import re
+import secrets
 import shutil
-from datetime import date
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import deque
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from typing import Optional, Any
+from urllib.parse import urlsplit
 
+import numpy as np
 import psycopg2
-from colorama import Fore, Style, init as colorama_init
 from psycopg2.extensions import connection
-from pyfiglet import Figlet
+from psycopg2.extras import execute_values
+
+# pyfiglet dan colorama hanya diimport saat menu interaktif dipakai,
+# supaya perintah command line tetap cepat start-nya
 
 # Database Connection
 
@@ -19,22 +43,701 @@ DB_CONFIG = {
 }
 
 
-def get_connection():
+def get_connection(**kwargs):
     """
     Koneksi untuk database postgresql
+    kwargs diteruskan ke psycopg2.connect (misal connection_factory)
     :return connection:
     """
+    if INSTRUMENTASI_CONFIG['aktif']:
+        kwargs.setdefault("cursor_factory", CursorTerukur)
     return psycopg2.connect(
         host=DB_CONFIG['host'],
         database=DB_CONFIG['database'],
         port=DB_CONFIG['port'],
         user=DB_CONFIG['user'],
         password=DB_CONFIG['password'],
+        **kwargs,
+    )
+
+
+POOL_CONFIG = {
+    'min_koneksi': 1,
+    'max_koneksi': 10,
+    'timeout': 5.0,  # detik menunggu koneksi kosong
+}
+
+
+class PoolHabis(Exception):
+    """
+    Tidak ada koneksi kosong sampai batas waktu menunggu habis
+    """
+
+
+class PoolKoneksi:
+    """
+    Pool koneksi postgresql dari DB_CONFIG supaya banyak sesi
+    bisa berbagi sedikit koneksi ke database.
+    """
+
+    def __init__(
+        self,
+        min_koneksi: int = 1,
+        max_koneksi: int = 10,
+        timeout: float = 5.0,
+        buat_koneksi=get_connection,
+    ):
+        if min_koneksi < 0 or max_koneksi < 1 or min_koneksi > max_koneksi:
+            raise ValueError("Ukuran pool tidak valid (0 <= min_koneksi <= max_koneksi, max_koneksi >= 1)")
+
+        self.min_koneksi = min_koneksi
+        self.max_koneksi = max_koneksi
+        self.timeout = timeout
+        self._buat_koneksi = buat_koneksi
+
+        self._kondisi = threading.Condition()
+        self._kosong: list[connection] = []
+        self._jumlah = 0  # koneksi terbuka (kosong + dipinjam)
+        self._ditutup = False
+
+        self._stat = {
+            "dibuat": 0,
+            "dibuang": 0,
+            "dipinjam": 0,
+            "dikembalikan": 0,
+            "menunggu": 0,
+            "timeout": 0,
+            "total_tunggu": 0.0,
+            "puncak_dipakai": 0,
+        }
+
+        for _ in range(min_koneksi):
+            self._kosong.append(self._buat())
+            self._jumlah += 1
+
+    def _buat(self) -> connection:
+        conn = self._buat_koneksi()
+        with self._kondisi:
+            self._stat["dibuat"] += 1
+        return conn
+
+    @staticmethod
+    def _masih_sehat(conn: connection) -> bool:
+        return (
+            not conn.closed
+            and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        )
+
+    def pinjam(self, timeout: float | None = None) -> connection:
+        """
+        Pinjam satu koneksi, tunggu maksimal `timeout` detik kalau pool penuh
+        """
+        mulai = time.monotonic()
+        batas = mulai + (self.timeout if timeout is None else timeout)
+        conn = None
+
+        with self._kondisi:
+            sudah_menunggu = False
+            while True:
+                if self._ditutup:
+                    raise PoolHabis("Pool koneksi sudah ditutup.")
+                if self._kosong:
+                    conn = self._kosong.pop()
+                    break
+                if self._jumlah < self.max_koneksi:
+                    # Slot koneksi baru dipesan dulu, dibuat di luar lock
+                    self._jumlah += 1
+                    break
+
+                sisa = batas - time.monotonic()
+                if sisa <= 0:
+                    self._stat["timeout"] += 1
+                    raise PoolHabis(
+                        f"Tidak ada koneksi kosong setelah menunggu {time.monotonic() - mulai:.2f} detik."
+                    )
+                if not sudah_menunggu:
+                    self._stat["menunggu"] += 1
+                    sudah_menunggu = True
+                self._kondisi.wait(sisa)
+
+            tunggu = time.monotonic() - mulai
+            if conn is not None and self._masih_sehat(conn):
+                self._catat_pinjam(tunggu)
+                return conn
+
+        # Koneksi baru, atau koneksi lama yang sudah putus
+        if conn is not None:
+            self._tutup_koneksi(conn)
+        try:
+            conn = self._buat()
+        except Exception:
+            with self._kondisi:
+                self._jumlah -= 1
+                self._kondisi.notify()
+            raise
+        with self._kondisi:
+            self._catat_pinjam(tunggu)
+        return conn
+
+    def _catat_pinjam(self, tunggu: float) -> None:
+        # Dipanggil dengan self._kondisi terkunci, hanya setelah koneksi benar-benar diserahkan
+        self._stat["dipinjam"] += 1
+        self._stat["total_tunggu"] += tunggu
+        dipakai = self._jumlah - len(self._kosong)
+        self._stat["puncak_dipakai"] = max(self._stat["puncak_dipakai"], dipakai)
+
+    def kembalikan(self, conn: connection, buang: bool = False) -> None:
+        """
+        Kembalikan koneksi ke pool. Transaksi yang masih terbuka di-rollback.
+        """
+        if not buang and self._masih_sehat(conn):
+            try:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                buang = True
+        else:
+            buang = True
+
+        with self._kondisi:
+            self._stat["dikembalikan"] += 1
+            if buang or self._ditutup:
+                self._stat["dibuang"] += 1
+                self._jumlah -= 1
+            else:
+                self._kosong.append(conn)
+                conn = None
+            self._kondisi.notify()
+
+        if conn is not None:
+            self._tutup_koneksi(conn)
+
+    @staticmethod
+    def _tutup_koneksi(conn: connection) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    @contextmanager
+    def koneksi(self, timeout: float | None = None):
+        """
+        Pakai: with pool.koneksi() as conn: lihat_lahan_universal(conn, user)
+        """
+        conn = self.pinjam(timeout)
+        buang = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            # Error dari server (deadlock, lock timeout) punya pgcode, koneksinya masih bisa dipakai
+            buang = e.pgcode is None
+            raise
+        finally:
+            self.kembalikan(conn, buang=buang)
+
+    def jalankan(self, fungsi, *args, **kwargs):
+        """
+        Jalankan fungsi data (argumen pertamanya conn) dengan koneksi dari pool
+        """
+        with self.koneksi() as conn:
+            return fungsi(conn, *args, **kwargs)
+
+    def statistik(self) -> dict[str, Any]:
+        with self._kondisi:
+            stat = dict(self._stat)
+            stat.update(
+                min_koneksi=self.min_koneksi,
+                max_koneksi=self.max_koneksi,
+                terbuka=self._jumlah,
+                kosong=len(self._kosong),
+                dipakai=self._jumlah - len(self._kosong),
+            )
+        stat["rata_tunggu"] = stat["total_tunggu"] / stat["dipinjam"] if stat["dipinjam"] else 0.0
+        return stat
+
+    def tutup(self) -> None:
+        """
+        Tutup semua koneksi kosong, koneksi yang masih dipinjam ditutup saat dikembalikan
+        """
+        with self._kondisi:
+            self._ditutup = True
+            kosong, self._kosong = self._kosong, []
+            self._jumlah -= len(kosong)
+            self._kondisi.notify_all()
+        for conn in kosong:
+            self._tutup_koneksi(conn)
+
+
+_pool: PoolKoneksi | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> PoolKoneksi:
+    """
+    Pool koneksi bersama untuk satu proses, dibuat saat pertama dipakai
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PoolKoneksi(
+                min_koneksi=POOL_CONFIG['min_koneksi'],
+                max_koneksi=POOL_CONFIG['max_koneksi'],
+                timeout=POOL_CONFIG['timeout'],
+            )
+        return _pool
+
+# Instrumentasi query
+
+INSTRUMENTASI_CONFIG = {
+    'aktif': True,
+    'ambang_lambat_ms': 200.0,  # query selama ini atau lebih masuk log query lambat
+    'explain': False,  # sertakan EXPLAIN (ANALYZE, BUFFERS) di log query lambat
+    'file_log': None,  # selain di memori, tulis log query lambat ke file (JSON per baris)
+    'maks_log': 200,
+}
+
+# Batas atas tiap ember histogram durasi query (ms), ember terakhir tanpa batas
+BATAS_HISTOGRAM_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_label_query: ContextVar[str | None] = ContextVar("label_query", default=None)
+
+
+@contextmanager
+def label_query(label: str):
+    """
+    Tambahkan label ke tag query di dalam blok ini,
+    misal lihat_lahan_universal + "petani" -> lihat_lahan_universal.petani
+    """
+    token = _label_query.set(label)
+    try:
+        yield
+    finally:
+        _label_query.reset(token)
+
+
+class StatistikQuery:
+    """
+    Histogram durasi dan jumlah baris per tag query (fungsi pemanggil),
+    ditambah log query yang melewati ambang lambat.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: dict[str, dict[str, Any]] = {}
+        self._lambat: deque = deque(maxlen=INSTRUMENTASI_CONFIG['maks_log'])
+
+    def catat(self, tag: str, detik: float, baris: int, error: bool) -> None:
+        ms = detik * 1000
+        ember = int(np.searchsorted(BATAS_HISTOGRAM_MS, ms))
+        with self._lock:
+            data = self._data.get(tag)
+            if data is None:
+                data = {"jumlah": 0, "error": 0, "total_ms": 0.0, "maks_ms": 0.0, "baris": 0,
+                        "histogram": [0] * (len(BATAS_HISTOGRAM_MS) + 1)}
+                self._data[tag] = data
+            data["jumlah"] += 1
+            data["total_ms"] += ms
+            data["maks_ms"] = max(data["maks_ms"], ms)
+            data["baris"] += max(baris, 0)
+            data["histogram"][ember] += 1
+            if error:
+                data["error"] += 1
+
+    def catat_lambat(self, entri: dict[str, Any]) -> None:
+        with self._lock:
+            self._lambat.append(entri)
+            if INSTRUMENTASI_CONFIG['file_log']:
+                with open(INSTRUMENTASI_CONFIG['file_log'], "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entri, default=str) + "\n")
+
+    @staticmethod
+    def _persentil(histogram: list[int], jumlah: int, p: float, maks_ms: float) -> float:
+        # Batas atas ember tempat persentil jatuh, tidak lebih dari durasi maksimal
+        target = jumlah * p / 100
+        kumulatif = 0
+        for i, n in enumerate(histogram):
+            kumulatif += n
+            if kumulatif >= target and n:
+                return min(BATAS_HISTOGRAM_MS[i], maks_ms) if i < len(BATAS_HISTOGRAM_MS) else maks_ms
+        return maks_ms
+
+    def ringkasan(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            salinan = {k: dict(v, histogram=list(v["histogram"])) for k, v in self._data.items()}
+
+        hasil = {}
+        for tag, data in sorted(salinan.items(), key=lambda x: -x[1]["total_ms"]):
+            label_ember = [f"<={b}ms" for b in BATAS_HISTOGRAM_MS] + [f">{BATAS_HISTOGRAM_MS[-1]}ms"]
+            hasil[tag] = {
+                "jumlah": data["jumlah"],
+                "error": data["error"],
+                "total_ms": round(data["total_ms"], 3),
+                "rata_ms": round(data["total_ms"] / data["jumlah"], 3),
+                "p50_ms": self._persentil(data["histogram"], data["jumlah"], 50, data["maks_ms"]),
+                "p95_ms": self._persentil(data["histogram"], data["jumlah"], 95, data["maks_ms"]),
+                "p99_ms": self._persentil(data["histogram"], data["jumlah"], 99, data["maks_ms"]),
+                "maks_ms": round(data["maks_ms"], 3),
+                "baris": data["baris"],
+                "histogram": {l: n for l, n in zip(label_ember, data["histogram"]) if n},
+            }
+        return hasil
+
+    def query_lambat(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._lambat)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._lambat.clear()
+
+
+STATISTIK_QUERY = StatistikQuery()
+
+
+def _tag_pemanggil() -> str:
+    # Fungsi pertama di luar cursor ini dan psycopg2 (execute_values dkk)
+    frame = sys._getframe(2)
+    while frame is not None and (
+        frame.f_globals.get("__name__", "").startswith("psycopg2")
+        or frame.f_code in _KODE_CURSOR_TERUKUR
+    ):
+        frame = frame.f_back
+    tag = frame.f_code.co_name if frame is not None else "?"
+    label = _label_query.get()
+    return f"{tag}.{label}" if label else tag
+
+
+def _explain_query_lambat(conn, query: bytes) -> str:
+    """
+    Jalankan ulang query dengan EXPLAIN (ANALYZE, BUFFERS) lalu batalkan efeknya
+    (savepoint, atau transaksi sendiri kalau autocommit). nextval sequence tetap terpakai.
+    """
+    if conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        return "EXPLAIN dilewati: transaksi sedang error"
+    mulai, batal = (
+        ("BEGIN", "ROLLBACK") if conn.autocommit
+        else ("SAVEPOINT explain_query_lambat", "ROLLBACK TO SAVEPOINT explain_query_lambat")
+    )
+    with psycopg2.extensions.cursor(conn) as cur:
+        cur.execute(mulai)
+        try:
+            cur.execute(b"EXPLAIN (ANALYZE, BUFFERS) " + query)
+            rencana = "\n".join(row[0] for row in cur.fetchall())
+        except psycopg2.Error as e:
+            rencana = f"EXPLAIN gagal: {str(e).strip()}"
+        cur.execute(batal)
+    return rencana
+
+
+class CursorTerukur(psycopg2.extensions.cursor):
+    """
+    Cursor yang mencatat durasi dan jumlah baris setiap statement ke STATISTIK_QUERY,
+    dengan tag nama fungsi pemanggil. Dipasang get_connection selama
+    INSTRUMENTASI_CONFIG['aktif'].
+    """
+
+    def _ukur(self, jalankan, query, *args):
+        tag = _tag_pemanggil()
+        mulai = time.perf_counter()
+        error = True
+        try:
+            hasil = jalankan(query, *args)
+            error = False
+            return hasil
+        finally:
+            detik = time.perf_counter() - mulai
+            STATISTIK_QUERY.catat(tag, detik, self.rowcount, error)
+            if not error and detik * 1000 >= INSTRUMENTASI_CONFIG['ambang_lambat_ms']:
+                self._log_lambat(tag, detik, query, copy=jalankan.__name__ == "copy_expert")
+
+    def _log_lambat(self, tag: str, detik: float, template: str | bytes, copy: bool = False) -> None:
+        # Yang dicatat template query (%s / nama prepared statement), bukan nilai
+        # parameternya: log ini bisa berisi password dari EXECUTE autentikasi.
+        teks = template.decode("utf-8", "replace") if isinstance(template, bytes) else str(template)
+        entri = {
+            "waktu": datetime.now().isoformat(timespec="milliseconds"),
+            "tag": tag,
+            "durasi_ms": round(detik * 1000, 3),
+            "baris": self.rowcount,
+            "query": teks,
+        }
+        # Cursor bernama (server-side) baru membaca data saat fetch, rencananya tidak diulang.
+        # COPY tidak bisa di-EXPLAIN dan datanya sudah terbaca dari file. Rencana statement
+        # rahasia memuat nilai parameternya (Filter: password = '...'), jadi tidak di-EXPLAIN.
+        if (INSTRUMENTASI_CONFIG['explain'] and self.name is None and self.query and not copy
+                and not _statement_rahasia(teks)):
+            entri["rencana"] = _explain_query_lambat(self.connection, self.query)
+        STATISTIK_QUERY.catat_lambat(entri)
+
+    def execute(self, query, vars=None):
+        return self._ukur(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._ukur(super().executemany, query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._ukur(super().copy_expert, sql, file, size)
+
+
+_KODE_CURSOR_TERUKUR = {
+    f.__code__ for f in (
+        CursorTerukur._ukur, CursorTerukur.execute, CursorTerukur.executemany, CursorTerukur.copy_expert,
     )
+}
+
+
+# Prepared statement
+
+# Query yang paling sering dipanggil, disiapkan (PREPARE) sekali per koneksi
+# lalu dijalankan dengan EXECUTE supaya server tidak parse/plan ulang tiap panggilan.
+# nama -> (tipe parameter, query dengan $1, $2, ...)
+STATEMENT_SIAP = {
+    "autentikasi": (
+        "text, text, text",
+        """
+        SELECT
+            u.user_id,
+            u.username,
+            u.name,
+            r.nama_role
+        FROM users u
+        JOIN user_roles ur ON ur.id_user = u.user_id
+        JOIN roles r       ON r.role_id = ur.id_role
+        WHERE u.username = $1
+        AND u.password = $2
+        AND LOWER(r.nama_role) = LOWER($3)
+        """,
+    ),
+    "hitung_survey": (
+        "integer",
+        "SELECT jumlah_survey FROM lahan WHERE lahan_id = $1",
+    ),
+    "add_survey_data": (
+        "integer, integer, integer, integer, varchar, integer, date",
+        """
+        INSERT INTO survey_data (
+            id_user_surveyor,
+            id_lahan,
+            id_iklim,
+            id_tanah,
+            status_survey,
+            id_tanaman,
+            tanggal_survey
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+        RETURNING survey_id
+        """,
+    ),
+    "get_iklim_by_id": (
+        "integer",
+        "SELECT iklim_id, jenis_cuaca FROM iklim WHERE iklim_id = $1",
+    ),
+    # $1 = lahan_id, $2 = surveyor_id
+    "claim_lahan_for_surveyor": (
+        "integer, integer",
+        """
+        WITH klaim AS (
+            UPDATE lahan
+            SET id_user_surveyor = $2
+            WHERE lahan_id = $1
+              AND id_user_surveyor IS NULL
+            RETURNING lahan_id
+        )
+        SELECT EXISTS (SELECT 1 FROM klaim)
+            OR EXISTS (
+                SELECT 1 FROM lahan
+                WHERE lahan_id = $1 AND id_user_surveyor = $2
+            )
+        """,
+    ),
+    "lihat_lahan_petani": (
+        "integer",
+        """
+        SELECT
+            l.lahan_id,
+            u_p.name        AS nama_petani,
+            u_s.user_id     AS surveyor_id,
+            u_s.name        AS nama_surveyor,
+            l.ketinggian,
+            a.nama_jalan,
+            kc.nama_kecamatan,
+            kt.nama_kota,
+            p.nama_provinsi,
+            l.jumlah_survey AS survey_count,
+            l.survey_terakhir
+        FROM lahan l
+        LEFT JOIN users u_p       ON u_p.user_id      = l.id_user_petani
+        LEFT JOIN users u_s       ON u_s.user_id      = l.id_user_surveyor
+        LEFT JOIN alamat a        ON a.alamat_id      = l.id_alamat
+        LEFT JOIN kecamatan kc    ON kc.kecamatan_id  = a.id_kecamatan
+        LEFT JOIN kota kt         ON kt.kota_id       = a.id_kota
+        LEFT JOIN provinsi p      ON p.provinsi_id    = a.id_provinsi
+        WHERE l.id_user_petani = $1
+        ORDER BY l.lahan_id
+        """,
+    ),
+}
+
+# Statement yang parameternya rahasia: rencana EXPLAIN-nya tidak dicatat di log query lambat
+STATEMENT_RAHASIA = {"autentikasi"}
+
+
+def _statement_rahasia(query: str) -> bool:
+    kata = query.split(None, 2)
+    return len(kata) >= 2 and kata[0].upper() == "EXECUTE" and kata[1].lower() in STATEMENT_RAHASIA
+
+
+# Koneksi -> backend_pid saat statement disiapkan. Kalau pid berubah
+# (koneksi tersambung ulang ke backend baru), statement disiapkan lagi.
+_statement_koneksi: "weakref.WeakKeyDictionary[connection, int]" = weakref.WeakKeyDictionary()
+_statement_lock = threading.Lock()
+
+# SQLSTATE invalid_sql_statement_name: statement tidak ada di server (misal setelah DEALLOCATE/DISCARD)
+_KODE_STATEMENT_HILANG = "26000"
+
+
+def siapkan_statement(conn) -> None:
+    """
+    PREPARE semua STATEMENT_SIAP yang belum ada di backend koneksi ini
+    """
+    pid = conn.info.backend_pid
+    with _statement_lock:
+        if _statement_koneksi.get(conn) == pid:
+            return
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT name FROM pg_prepared_statements")
+        sudah_ada = {row[0] for row in cur.fetchall()}
+        perintah = [
+            f"PREPARE {nama} ({tipe}) AS {query.strip()}"
+            for nama, (tipe, query) in STATEMENT_SIAP.items()
+            if nama not in sudah_ada
+        ]
+        if perintah:
+            cur.execute(";\n".join(perintah))
+
+    with _statement_lock:
+        _statement_koneksi[conn] = pid
+
+
+def jalankan_statement(cur, nama: str, params: tuple[Any, ...]) -> None:
+    """
+    EXECUTE statement `nama` dengan params. Statement yang hilang dari server
+    disiapkan ulang dan dicoba sekali lagi, asal belum ada transaksi yang berjalan.
+    """
+    conn = cur.connection
+    belum_transaksi = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    siapkan_statement(conn)
+    query = f"EXECUTE {nama} ({', '.join(['%s'] * len(params))})"
+    try:
+        cur.execute(query, params)
+    except psycopg2.Error as e:
+        if e.pgcode != _KODE_STATEMENT_HILANG or not belum_transaksi:
+            raise
+        conn.rollback()
+        with _statement_lock:
+            _statement_koneksi.pop(conn, None)
+        siapkan_statement(conn)
+        cur.execute(query, params)
+
+
+# Tag query yang dijalankan lewat jalankan_statement tetap nama fungsi pemanggilnya
+_KODE_CURSOR_TERUKUR.add(jalankan_statement.__code__)
+
+
+def bandingkan_prepared(conn, ulang: int) -> dict[str, dict[str, float]]:
+    """
+    Ukur tiap STATEMENT_SIAP: query biasa (parse + plan tiap panggilan) vs EXECUTE.
+    Semua dijalankan dalam satu transaksi yang di-rollback di akhir.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT u.username, u.password, l.id_user_petani, l.lahan_id,
+                   (SELECT MIN(kondisi_tanah_id) FROM kondisi_tanah),
+                   (SELECT MIN(iklim_id) FROM iklim)
+            FROM lahan l
+            JOIN users u ON u.user_id = l.id_user_petani
+            WHERE l.id_user_surveyor IS NOT NULL
+            ORDER BY l.lahan_id
+            LIMIT 1
+            """
+        )
+        row = cur.fetchone()
+        if row is None or row[4] is None:
+            conn.rollback()
+            return {}
+        username, password, petani_id, lahan_id, tanah_id, iklim_id = row
+        cur.execute("SELECT id_user_surveyor FROM lahan WHERE lahan_id = %s", (lahan_id,))
+        surveyor_id = cur.fetchone()[0]
+
+    params = {
+        "autentikasi": (username, password, "petani"),
+        "hitung_survey": (lahan_id,),
+        "add_survey_data": (surveyor_id, lahan_id, iklim_id, tanah_id, "waiting", None, date.today()),
+        "get_iklim_by_id": (iklim_id,),
+        "claim_lahan_for_surveyor": (lahan_id, surveyor_id),
+        "lihat_lahan_petani": (petani_id,),
+    }
+
+    hasil = {}
+    try:
+        siapkan_statement(conn)
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+            for nama, (_, query) in STATEMENT_SIAP.items():
+                # $n -> %(n)s supaya query yang sama bisa dikirim sebagai teks biasa
+                query_teks = re.sub(r"\$(\d+)", r"%(\1)s", query)
+                nilai = {str(i): v for i, v in enumerate(params[nama], start=1)}
+
+                cur.execute("EXPLAIN (SUMMARY) " + query_teks, nilai)
+                plan_ms = float(re.search(r"Planning Time: ([\d.]+)", cur.fetchall()[-1][0]).group(1))
+
+                biasa, siap = [], []
+                for _ in range(ulang):
+                    mulai = time.perf_counter()
+                    cur.execute(query_teks, nilai)
+                    cur.fetchall()
+                    biasa.append(time.perf_counter() - mulai)
+
+                    mulai = time.perf_counter()
+                    jalankan_statement(cur, nama, params[nama])
+                    cur.fetchall()
+                    siap.append(time.perf_counter() - mulai)
+
+                biasa_us = float(np.median(biasa)) * 1e6
+                siap_us = float(np.median(siap)) * 1e6
+                hasil[nama] = {
+                    "plan_ms": plan_ms,
+                    "biasa_us": round(biasa_us, 1),
+                    "prepared_us": round(siap_us, 1),
+                    "hemat_us": round(biasa_us - siap_us, 1),
+                    "hemat_persen": round((biasa_us - siap_us) / biasa_us * 100, 1),
+                }
+    finally:
+        conn.rollback()
+    return hasil
+
+
+def cetak_statistik_query(batas: int = 20) -> None:
+    ringkasan = STATISTIK_QUERY.ringkasan()
+    if not ringkasan:
+        print("Belum ada query yang tercatat.")
+        return
+    print(f"{'tag query':<44} {'jumlah':>7} {'total ms':>10} {'rata ms':>9} {'p95 ms':>8} {'maks ms':>9} {'baris':>9}")
+    for tag, r in list(ringkasan.items())[:batas]:
+        print(
+            f"{tag:<44} {r['jumlah']:>7} {r['total_ms']:>10.1f} {r['rata_ms']:>9.2f} "
+            f"{r['p95_ms']:>8.1f} {r['maks_ms']:>9.1f} {r['baris']:>9}"
+        )
+    lambat = STATISTIK_QUERY.query_lambat()
+    if lambat:
+        print(f"\n{len(lambat)} query lambat (>= {INSTRUMENTASI_CONFIG['ambang_lambat_ms']:.0f} ms), terakhir:")
+        for entri in lambat[-5:]:
+            print(f"  {entri['waktu']} {entri['tag']} {entri['durasi_ms']:.1f} ms, {entri['baris']} baris")
 
 # Header
 
-colorama_init(autoreset=True)
+MODUL_TAMPILAN = ("pyfiglet", "colorama")
 
 TITLE_TEXT = "LABULIS"
 SUBTITLE = "Analisis Kesesuaian Tanaman (Iklim • Tanah • Ketinggian)"
@@ -66,15 +769,27 @@ def frame_block(lines, width):
     return [top] + body + [bottom]
 
 
+@lru_cache(maxsize=None)
+def judul_figlet() -> tuple[str, ...]:
+    """
+    Render judul figlet sekali saja, parsing font ansi_shadow lumayan berat
+    """
+    from pyfiglet import Figlet
+
+    fig = Figlet(font="ansi_shadow")
+    return tuple(fig.renderText(TITLE_TEXT).rstrip("\n").splitlines())
+
+
+@lru_cache(maxsize=16)
 def render(width: int = 100) -> str:
+    from colorama import Fore, Style
+
     width = max(80, width)
     # Top decorative border (colored)
     top_border = make_border(width)
     out = [f"{Fore.GREEN}{Style.BRIGHT}{top_border}{Style.RESET_ALL}", ""]
 
-    fig = Figlet(font="ansi_shadow")
-    title = fig.renderText(TITLE_TEXT).rstrip("\n").splitlines()
-    
+    title = judul_figlet()
 
     # cetak judul terpusat
     for ln in title:
@@ -92,18 +807,43 @@ def render(width: int = 100) -> str:
     return "\n".join(out)
 
 
-def header():
+def siapkan_terminal() -> None:
+    """
+    Aktifkan colorama untuk menu interaktif (termasuk terjemahan ANSI di Windows)
+    """
+    from colorama import init as colorama_init
+
+    colorama_init(autoreset=True)
+
+
+# Pindah kursor ke pojok kiri atas, hapus layar dan scrollback
+KODE_BERSIHKAN_LAYAR = "\033[H\033[2J\033[3J"
+
+
+def lebar_terminal() -> int:
     try:
-        width = shutil.get_terminal_size().columns
+        return shutil.get_terminal_size().columns
     except Exception:
-        width = 100
-    print(render(width))
+        return 100
+
+
+def header():
+    sys.stdout.write(render(lebar_terminal()) + "\n")
+
 
 def clear_terminal():
-    try:
-        os.system('cls' if os.name == 'nt' else 'clear')
-    except Exception:
-        print("\n" * 100)
+    sys.stdout.write(KODE_BERSIHKAN_LAYAR)
+    sys.stdout.flush()
+
+
+def tampilkan_layar(*baris: str) -> None:
+    """
+    Bersihkan layar, cetak header dan baris menu dalam satu kali write
+    supaya tidak berkedip di koneksi lambat
+    """
+    layar = [KODE_BERSIHKAN_LAYAR + render(lebar_terminal()), *baris, ""]
+    sys.stdout.write("\n".join(layar))
+    sys.stdout.flush()
 
 # Dekorasi
 
@@ -135,6 +875,7 @@ def simpel_lahan_print(row_lahan):
             nama_kota,
             nama_provinsi,
             survey_count,
+            survey_terakhir,
         ) in row_lahan:
             if surveyor_id is None:
                 status = "BELUM DIAMBIL"
@@ -145,7 +886,8 @@ def simpel_lahan_print(row_lahan):
                 f"- ID: {lahan_id} | Petani: {nama_petani} | "
                 f"Ketinggian: {display(ketinggian)} | Alamat: {nama_jalan}, "
                 f"{nama_kecamatan}, {nama_kota}, {nama_provinsi} | Status Survey: {status} | "
-                f"Sudah disurvey selama: {survey_count} hari"
+                f"Sudah disurvey selama: {survey_count} hari | "
+                f"Survey terakhir: {display(survey_terakhir)}"
             )
 
 
@@ -170,95 +912,207 @@ def add_alamat( conn, nama_jalan: str, id_kota: int | None, id_kecamatan: int |
         return row[0] if row else None
 
 
-def pilih_alamat(
+UKURAN_HALAMAN_ALAMAT = 10
+# Pencarian potongan nama/salah ketik (trigram) baru dipakai mulai 3 huruf
+MIN_HURUF_TRIGRAM = 3
+
+# Hasil cek pg_trgm disimpan sebentar saja: ekstensi bisa dipasang migrasi
+# (004, 010) dari proses lain saat layanan sudah jalan
+UMUR_CEK_PG_TRGM = 60.0
+
+# dsn -> (terpasang, waktu cek monotonic)
+_pg_trgm_aktif: dict[str, tuple[bool, float]] = {}
+
+
+def pg_trgm_aktif(conn) -> bool:
+    """
+    Cek apakah ekstensi pg_trgm terpasang, hasilnya di-cache per database
+    selama UMUR_CEK_PG_TRGM detik
+    """
+    cache = _pg_trgm_aktif.get(conn.dsn)
+    if cache is None or time.monotonic() - cache[1] > UMUR_CEK_PG_TRGM:
+        with conn.cursor() as cur:
+            cur.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            cache = (cur.fetchone()[0], time.monotonic())
+        _pg_trgm_aktif[conn.dsn] = cache
+    return cache[0]
+
+
+def cari_tabel_alamat(
     conn,
     table: str,
     id_col: str,
     nama_col: str,
-    label: str,
-) -> int | None:
-    with conn.cursor() as cur:
-        cur.execute(
-            f"SELECT {id_col}, {nama_col} FROM {table} ORDER BY {nama_col};"
-        )
-        rows = cur.fetchall()
+    kata: str,
+    batas: int = UKURAN_HALAMAN_ALAMAT,
+    offset: int = 0,
+) -> list[tuple[int, str]]:
+    """
+    Cari master alamat berdasarkan nama, yang cocok di awal nama paling atas.
+    Kalau pg_trgm terpasang, potongan di tengah nama dan salah ketik ikut dicari.
+    :return: list of tuple (id, nama)
+    """
+    kata = kata.strip().lower()
+    aman = kata.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    params = {
+        "kata": kata,
+        "awalan": aman + "%",
+        "potongan": "%" + aman + "%",
+        "batas": batas,
+        "offset": offset,
+    }
 
-    if not rows:
-        print(f"Belum ada data {label}.")
-        return None
+    if len(kata) >= MIN_HURUF_TRIGRAM and pg_trgm_aktif(conn):
+        query = f"""
+            SELECT {id_col}, {nama_col}
+            FROM {table}
+            WHERE LOWER({nama_col}) LIKE %(potongan)s
+               OR LOWER({nama_col}) %% %(kata)s
+            ORDER BY LOWER({nama_col}) LIKE %(awalan)s DESC,
+                     similarity(LOWER({nama_col}), %(kata)s) DESC,
+                     LOWER({nama_col}), {id_col}
+            LIMIT %(batas)s OFFSET %(offset)s;
+        """
+    else:
+        query = f"""
+            SELECT {id_col}, {nama_col}
+            FROM {table}
+            WHERE LOWER({nama_col}) LIKE %(awalan)s
+            ORDER BY LOWER({nama_col}), {id_col}
+            LIMIT %(batas)s OFFSET %(offset)s;
+        """
 
-    print(f"\n=== Daftar {label.capitalize()} ===")
-    for rid, nama in rows:
-        print(f"{rid}. {nama}")
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
 
-    pilih = input(f"Pilih ID {label} (kosong = skip): ").strip()
-    if not pilih:
-        return None
 
-    try:
-        pilih_id = int(pilih)
-    except ValueError:
-        print("Input harus angka.")
-        return None
+def ambil_nama_tabel_alamat(
+    conn,
+    table: str,
+    id_col: str,
+    nama_col: str,
+    id_val: int,
+) -> str | None:
+    """
+    Validasi ID lewat primary key, None kalau tidak ada
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT {nama_col} FROM {table} WHERE {id_col} = %s", (id_val,))
+        row = cur.fetchone()
+    return row[0] if row else None
 
-    valid_ids = {r[0] for r in rows}
-    if pilih_id not in valid_ids:
-        print(f"ID {label} tidak valid.")
-        return None
 
-    return pilih_id
+def cari_alamat_master(
+    conn,
+    jenis: str,
+    kata: str,
+    batas: int = UKURAN_HALAMAN_ALAMAT,
+    offset: int = 0,
+) -> list[tuple[int, str]]:
+    jenis = jenis.lower()
+    if jenis not in ALAMAT_MASTER_CONFIG:
+        print(f"Jenis '{jenis}' tidak dikenal")
+        return []
 
+    table, id_col, nama_col = ALAMAT_MASTER_CONFIG[jenis]
+    return cari_tabel_alamat(conn, table, id_col, nama_col, kata, batas, offset)
 
-def kelola_input_lokasi(conn, jenis_tabel: str, label_tampilan: str) -> int | None:
+
+def cari_interaktif_alamat(
+    conn,
+    table: str,
+    id_col: str,
+    nama_col: str,
+    label: str,
+    boleh_buat: bool,
+) -> int | None:
     """
-    Fungsi untuk memilih dan membuat lokasi
+    Type-ahead: ketik nama untuk mencari, ketik ID untuk memilih,
+    n/p untuk pindah halaman, '+' untuk membuat nama yang dicari (kalau boleh_buat).
+    Input kosong = None
     """
-    # 1. Ambil data dari database
-    config = ALAMAT_MASTER_CONFIG.get(jenis_tabel)
-    if not config:
-        print(f"Error: Jenis tabel '{jenis_tabel}' tidak dikenal.")
-        return None
-        
-    table, id_col, nama_col = config
-    data_list = ambil_semua_data_di_alamat(conn, table, id_col, nama_col)
-
-    # 2. Tampilkan daftar ke user
-    print(f"\n--- Pilih {label_tampilan} ---")
-    if not data_list:
-        print(f"  (Belum ada data {label_tampilan}, silakan ketik nama baru)")
-    else:
-        for id_val, nama_val in data_list:
-            print(f"  [{id_val}] {nama_val}")
+    batas = UKURAN_HALAMAN_ALAMAT
+    kata = ""
+    offset = 0
 
-    # 3. Minta input user
     while True:
-        print(f"\nWajib memilih {label_tampilan} atau buat {label_tampilan} baru")
-        inp = input(f"Input {label_tampilan}: ").strip()
-
+        inp = input(f"Cari {label} (ketik nama atau ID): " if not kata else "Pilihan: ").strip()
         if not inp:
-            print(f"{label_tampilan} wajib diisi, tidak boleh kosong.")
+            return None
+
+        if inp.isascii() and inp.isdigit():
+            pilih_id = int(inp)
+            nama = ambil_nama_tabel_alamat(conn, table, id_col, nama_col, pilih_id)
+            if nama is not None:
+                print(f"{label} dipilih: {nama}")
+                return pilih_id
+
+            print(f"ID {label} {pilih_id} tidak ditemukan.")
+            if boleh_buat:
+                konfirmasi = input(f"Apakah anda ingin menggunakan angka '{inp}' sebagai NAMA {label} baru? (y/n): ").lower().strip()
+                if konfirmasi == 'y':
+                    return cari_atau_buat_tabel_alamat(conn, table, id_col, nama_col, inp)
             continue
 
-        # Cek apakah input berupa angka (ID)
-        if inp.isdigit():
-            pilihan_id = int(inp)
-            # Cek apakah ID ada di daftar
-            ketemu = False
-            for id_val, _ in data_list:
-                if id_val == pilihan_id:
-                    ketemu = True
-                    break
-            
-            if ketemu:
-                return pilihan_id
-            else:
-                print(f"ID {pilihan_id} tidak ditemukan di daftar.")
-                konfirmasi = input(f"Apakah anda ingin menggunakan angka '{inp}' sebagai NAMA {label_tampilan} baru? (y/n): ").lower().strip()
-                if konfirmasi != 'y':
-                    continue
-        
-        id_baru = cari_atau_buat_alamat(conn, jenis_tabel, inp)
-        return id_baru
+        if kata and inp.lower() == "n":
+            offset += batas
+        elif kata and inp.lower() == "p":
+            offset = max(0, offset - batas)
+        elif kata and boleh_buat and inp == "+":
+            return cari_atau_buat_tabel_alamat(conn, table, id_col, nama_col, kata)
+        else:
+            kata, offset = inp, 0
+
+        rows = cari_tabel_alamat(conn, table, id_col, nama_col, kata, batas + 1, offset)
+        ada_berikutnya = len(rows) > batas
+
+        if not rows:
+            print(f"  (Tidak ada {label} yang cocok dengan '{kata}')")
+        else:
+            print(f"\n--- {label} cocok dengan '{kata}' (halaman {offset // batas + 1}) ---")
+            for id_val, nama_val in rows[:batas]:
+                print(f"  [{id_val}] {nama_val}")
+
+        bantuan = ["ID = pilih", "ketik nama lain = cari lagi"]
+        if ada_berikutnya:
+            bantuan.append("n = halaman berikutnya")
+        if offset:
+            bantuan.append("p = halaman sebelumnya")
+        if boleh_buat:
+            bantuan.append(f"+ = buat {label} '{kata}'")
+        print("  " + " | ".join(bantuan))
+
+
+def pilih_alamat(
+    conn,
+    table: str,
+    id_col: str,
+    nama_col: str,
+    label: str,
+) -> int | None:
+    print(f"\n=== Pilih {label.capitalize()} (kosong = skip) ===")
+    return cari_interaktif_alamat(conn, table, id_col, nama_col, label, boleh_buat=False)
+
+
+def kelola_input_lokasi(conn, jenis_tabel: str, label_tampilan: str) -> int | None:
+    """
+    Fungsi untuk memilih dan membuat lokasi
+    """
+    config = ALAMAT_MASTER_CONFIG.get(jenis_tabel)
+    if not config:
+        print(f"Error: Jenis tabel '{jenis_tabel}' tidak dikenal.")
+        return None
+
+    table, id_col, nama_col = config
+
+    print(f"\n--- Pilih {label_tampilan} ---")
+    while True:
+        print(f"Wajib memilih {label_tampilan} atau buat {label_tampilan} baru")
+        id_lokasi = cari_interaktif_alamat(conn, table, id_col, nama_col, label_tampilan, boleh_buat=True)
+        if id_lokasi is not None:
+            return id_lokasi
+        print(f"{label_tampilan} wajib diisi, tidak boleh kosong.")
 
 
 def buat_alamat(conn) -> int | None:
@@ -397,7 +1251,8 @@ def delete_user(
         role_name: str | None = None,
 ) -> Optional[int]:
     """
-    Hapus user berdasarkan username.
+    Hapus user berdasarkan username (lewat hapus_user_massal: lahan petani ikut
+    terhapus, lahan/survey surveyor dilepas).
     Jika role_name diisi, pastikan user punya role tsb dulu.
     Return: user_id yang terhapus atau None.
     """
@@ -427,16 +1282,11 @@ def delete_user(
 
         user_id = row[0]
 
-        cur.execute("DELETE FROM user_roles WHERE id_user = %s", (user_id,))
-        # Hapus dari users
-        cur.execute(
-            "DELETE FROM users WHERE user_id = %s RETURNING user_id;",
-            (user_id,),
-        )
-        deleted = cur.fetchone()
-        conn.commit()
-        print(f"User '{username}' terhapus.")
-        return deleted[0] if deleted else None
+    hasil = hapus_user_massal(conn, user_ids=[user_id])
+    if not hasil or not hasil["user"]:
+        return None
+    print(f"User '{username}' terhapus.")
+    return user_id
 
 
 def read_all_users(conn: psycopg2.extensions.connection) -> dict[str, list[tuple[Any, ...]]]:
@@ -510,185 +1360,1246 @@ def update_user_profile(
         return cur.rowcount > 0
 
 
+# Query overview admin. Kolom pertama tiap query = kunci untuk paging.
+DATA_LAHAN = {
+    # 1. Semua user yang punya role 'petani'
+    "petani": {
+        "kunci": "u.user_id",
+        "query": """
+            SELECT
+                u.user_id,
+                u.name,
+                u.username,
+                u.email,
+                u.no_telp
+            FROM users u
+            JOIN user_roles ur ON ur.id_user = u.user_id
+            JOIN roles r       ON r.role_id = ur.id_role
+        """,
+        "kondisi": ["LOWER(r.nama_role) = 'petani'"],
+        "alamat": "u.id_alamat",
+        "tanggal": "u.pembuatan::DATE",
+    },
+    # 2. Semua lahan + petani + surveyor + alamat
+    "lahan": {
+        "kunci": "l.lahan_id",
+        "query": """
+            SELECT
+                l.lahan_id,
+                l.ketinggian,
+
+                u_p.user_id        AS petani_id,
+                u_p.name           AS nama_petani,
+
+                u_s.user_id        AS surveyor_id,
+                u_s.name           AS nama_surveyor,
+
+                a.alamat_id,
+                a.nama_jalan,
+                kc.nama_kecamatan,
+                k.nama_kota,
+                p.nama_provinsi
+            FROM lahan l
+            LEFT JOIN users u_p       ON u_p.user_id    = l.id_user_petani
+            LEFT JOIN users u_s       ON u_s.user_id    = l.id_user_surveyor
+            LEFT JOIN alamat a        ON a.alamat_id    = l.id_alamat
+            LEFT JOIN kecamatan kc    ON kc.kecamatan_id = a.id_kecamatan
+            LEFT JOIN kota k          ON k.kota_id      = a.id_kota
+            LEFT JOIN provinsi p      ON p.provinsi_id  = a.id_provinsi
+        """,
+        "kondisi": [],
+        "alamat": "l.id_alamat",
+        "tanggal": "l.survey_terakhir",
+    },
+    # 3. Semua survey_data + iklim + tanah + tanaman + petani (via lahan)
+    "survey_data": {
+        "kunci": "sd.survey_id",
+        "query": """
+            SELECT
+                sd.survey_id,
+                sd.id_lahan,
+
+                sd.id_user_surveyor,
+                us.name               AS nama_surveyor,
+
+                sd.status_survey,
+                sd.tanggal_survey,
+
+                sd.id_iklim,
+                ik.jenis_cuaca,
+
+                sd.id_tanah,
+                kt.kondisi_tanah,
+                kt.ph,
+                kt.kandungan_nutrisi,
+                kt.kelembapan,
+
+                sd.id_tanaman,
+                t.nama                AS nama_tanaman,
+
+                u_p.user_id           AS petani_id,
+                u_p.name              AS nama_petani
+            FROM survey_data sd
+            LEFT JOIN users us          ON us.user_id = sd.id_user_surveyor
+            LEFT JOIN iklim ik          ON ik.iklim_id = sd.id_iklim
+            LEFT JOIN kondisi_tanah kt  ON kt.kondisi_tanah_id = sd.id_tanah
+            LEFT JOIN tanaman t         ON t.tanaman_id = sd.id_tanaman
+            LEFT JOIN lahan l           ON l.lahan_id = sd.id_lahan
+            LEFT JOIN users u_p         ON u_p.user_id = l.id_user_petani
+        """,
+        "kondisi": [],
+        "alamat": "l.id_alamat",
+        "tanggal": "sd.tanggal_survey",
+    },
+}
+
+UKURAN_HALAMAN = 20
+
+
+def query_data_lahan(
+    jenis: str,
+    kondisi: list[str] | None = None,
+    paging: bool = False,
+) -> str:
+    """
+    Susun query overview admin untuk `jenis` (petani/lahan/survey_data).
+    kondisi: tambahan WHERE (pakai placeholder %s)
+    paging: tambah "kunci > %s ... LIMIT %s" untuk keyset pagination
+    """
+    data = DATA_LAHAN[jenis]
+    semua_kondisi = data["kondisi"] + (kondisi or [])
+    if paging:
+        semua_kondisi = semua_kondisi + [f"{data['kunci']} > %s"]
+
+    query = data["query"].rstrip()
+    if semua_kondisi:
+        query += "\n    WHERE " + "\n      AND ".join(semua_kondisi)
+    query += f"\n    ORDER BY {data['kunci']}"
+    if paging:
+        query += "\n    LIMIT %s"
+    return query
+
+
+def ambil_halaman_data_lahan(
+    conn,
+    jenis: str,
+    setelah: int | None = None,
+    batas: int = UKURAN_HALAMAN,
+) -> list[tuple[Any, ...]]:
+    """
+    Ambil satu halaman overview (keyset): baris dengan kunci > setelah
+    """
+    query = query_data_lahan(jenis, paging=True)
+    with conn.cursor() as cur, label_query(jenis):
+        cur.execute(query, (setelah if setelah is not None else -1, batas))
+        return cur.fetchall()
+
+
+def iter_data_lahan(
+    conn,
+    jenis: str,
+    kondisi: list[str] | None = None,
+    params: tuple[Any, ...] = (),
+    itersize: int = 2000,
+):
+    """
+    Stream overview lewat server-side cursor, memori tetap kecil
+    berapapun jumlah barisnya.
+    """
+    query = query_data_lahan(jenis, kondisi)
+    nama_cursor = f"data_{jenis}_{secrets.token_hex(4)}"
+    with conn.cursor(name=nama_cursor) as cur:
+        cur.itersize = itersize
+        cur.execute(query, params)
+        yield from cur
+
+
 def lihat_data_lahan(conn) -> dict[str, Any]:
     """
-    Ambil overview data
+    Ambil overview data.
+    Isinya iterator (server-side cursor), bukan list, supaya tidak dimuat semua ke memori.
     """
-    cursor = conn.cursor()
+    return {
+        "petani": iter_data_lahan(conn, "petani"),
+        "lahan": iter_data_lahan(conn, "lahan"),
+        "survey_data": iter_data_lahan(conn, "survey_data"),
+    }
 
-    # 1. Ambil semua user yang punya role 'petani'
-    cursor.execute(
-        """
+
+# Pencarian user dan lahan (menu admin)
+
+# Harus sama dengan ekspresi index users_teks_trgm_idx (migrasi 010)
+TEKS_CARI_USER = (
+    "LOWER(COALESCE(u.name, '') || ' ' || COALESCE(u.username, '') || ' ' "
+    "|| COALESCE(u.email, '') || ' ' || COALESCE(u.no_telp, ''))"
+)
+
+TEKS_CARI_LAHAN = (
+    "LOWER(COALESCE(a.nama_jalan, '') || ' ' || COALESCE(kc.nama_kecamatan, '') || ' ' "
+    "|| COALESCE(kt.nama_kota, '') || ' ' || COALESCE(p.nama_provinsi, '') || ' ' || COALESCE(u_p.name, ''))"
+)
+
+
+def _aman_like(kata: str) -> str:
+    return kata.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _params_cari(kata: str, batas: int, offset: int) -> tuple[list[str], dict[str, Any]]:
+    """
+    Pecah kata pencarian per spasi, siapkan pola LIKE tiap kata (t0, awalan0, kata0, potongan0, id0, ...)
+    """
+    istilah = kata.strip().lower().split()
+    gabungan = " ".join(istilah)
+    params: dict[str, Any] = {
+        "kata": gabungan,
+        "awalan": _aman_like(gabungan) + "%",
+        "batas": batas,
+        "offset": offset,
+    }
+    for i, t in enumerate(istilah):
+        aman = _aman_like(t)
+        params[f"t{i}"] = t
+        params[f"awalan{i}"] = aman + "%"
+        params[f"potongan{i}"] = "%" + aman + "%"
+        params[f"kata{i}"] = "% " + aman + "%"
+        # ID cuma kalau muat di INTEGER
+        params[f"id{i}"] = int(t) if t.isascii() and t.isdigit() and len(t) <= 9 else None
+    return istilah, params
+
+
+def _cocok_istilah(kolom: str, i: int, istilah: str, trgm: bool, per_kata: bool = False) -> str:
+    """
+    Kondisi satu kata untuk satu kolom: potongan/salah ketik kalau pg_trgm ada, awalan kalau tidak.
+    per_kata: tanpa pg_trgm, awalan tiap kata juga cocok ("divo" -> "Petani Divo")
+    """
+    if trgm and len(istilah) >= MIN_HURUF_TRIGRAM:
+        return f"({kolom} LIKE %(potongan{i})s OR %(t{i})s <%% {kolom})"
+    if per_kata:
+        return f"({kolom} LIKE %(awalan{i})s OR {kolom} LIKE %(kata{i})s)"
+    return f"{kolom} LIKE %(awalan{i})s"
+
+
+def cari_user(
+    conn,
+    kata: str,
+    role: str | None = None,
+    batas: int = UKURAN_HALAMAN,
+    offset: int = 0,
+) -> list[tuple[Any, ...]]:
+    """
+    Cari user dari nama, username, email atau no_telp (angka juga dicocokkan ke user_id).
+    Semua kata harus cocok. Username persis dan awalan nama/username paling atas.
+    Kata kosong = semua user urut ID.
+    :return: list of tuple (user_id, name, username, email, no_telp, [role])
+    """
+    istilah, params = _params_cari(kata, batas, offset)
+    params["role"] = role
+    trgm = pg_trgm_aktif(conn)
+
+    kondisi = []
+    for i, t in enumerate(istilah):
+        if trgm and len(t) >= MIN_HURUF_TRIGRAM:
+            cocok = _cocok_istilah(TEKS_CARI_USER, i, t, trgm)
+        else:
+            cocok = "(" + " OR ".join([
+                _cocok_istilah("LOWER(u.username)", i, t, False),
+                _cocok_istilah("LOWER(u.name)", i, t, False, per_kata=True),
+                _cocok_istilah("LOWER(u.email)", i, t, False),
+                _cocok_istilah("u.no_telp", i, t, False),
+            ]) + ")"
+        if params[f"id{i}"] is not None:
+            cocok = f"({cocok} OR u.user_id = %(id{i})s)"
+        kondisi.append(cocok)
+    if role:
+        kondisi.append(
+            """EXISTS (
+                SELECT 1 FROM user_roles ur JOIN roles r ON r.role_id = ur.id_role
+                WHERE ur.id_user = u.user_id AND LOWER(r.nama_role) = LOWER(%(role)s)
+            )"""
+        )
+
+    urutan = []
+    if istilah:
+        urutan += [
+            "(LOWER(u.username) = %(kata)s OR u.user_id::text = %(kata)s) DESC",
+            "(LOWER(u.username) LIKE %(awalan)s OR LOWER(u.name) LIKE %(awalan)s) DESC",
+        ]
+        if trgm:
+            urutan.append(f"word_similarity(%(kata)s, {TEKS_CARI_USER}) DESC")
+    urutan.append("u.user_id")
+
+    query = f"""
         SELECT
             u.user_id,
             u.name,
             u.username,
             u.email,
-            u.no_telp
+            u.no_telp,
+            ARRAY(
+                SELECT LOWER(r.nama_role)
+                FROM user_roles ur
+                JOIN roles r ON r.role_id = ur.id_role
+                WHERE ur.id_user = u.user_id
+                ORDER BY 1
+            )
         FROM users u
-        JOIN user_roles ur ON ur.id_user = u.user_id
-        JOIN roles r       ON r.role_id = ur.id_role
-        WHERE LOWER(r.nama_role) = 'petani'
-        ORDER BY u.user_id;
-        """
-    )
-    petani = cursor.fetchall()
+        {"WHERE " + " AND ".join(kondisi) if kondisi else ""}
+        ORDER BY {", ".join(urutan)}
+        LIMIT %(batas)s OFFSET %(offset)s;
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
 
-    # 2. Ambil semua lahan + petani + surveyor + alamat
-    cursor.execute(
-        """
+
+def cari_lahan(
+    conn,
+    kata: str,
+    batas: int = UKURAN_HALAMAN,
+    offset: int = 0,
+) -> list[tuple[Any, ...]]:
+    """
+    Cari lahan dari nama jalan, kecamatan, kota, provinsi atau nama petani (angka juga
+    dicocokkan ke lahan_id). Kandidat diambil lewat index dari kata terpanjang,
+    lalu semua kata harus ada di teks lahan. Kata kosong = semua lahan urut ID.
+    :return: baris dengan kolom sama seperti lihat_lahan_universal
+    """
+    istilah, params = _params_cari(kata, batas, offset)
+    trgm = pg_trgm_aktif(conn)
+
+    kandidat = ""
+    kondisi = []
+    urutan = []
+    if istilah:
+        utama = max(range(len(istilah)), key=lambda i: len(istilah[i]))
+        t = istilah[utama]
+        sumber = [
+            f"""SELECT l.lahan_id FROM alamat a JOIN lahan l ON l.id_alamat = a.alamat_id
+                WHERE {_cocok_istilah("LOWER(a.nama_jalan)", utama, t, trgm, per_kata=True)}""",
+            f"""SELECT l.lahan_id FROM users u JOIN lahan l ON l.id_user_petani = u.user_id
+                WHERE {_cocok_istilah("LOWER(u.name)", utama, t, trgm, per_kata=True)}""",
+        ]
+        for jenis in ("kecamatan", "kota", "provinsi"):
+            tabel, id_col, nama_col = ALAMAT_MASTER_CONFIG[jenis]
+            sumber.append(
+                f"""SELECT l.lahan_id FROM {tabel} w
+                    JOIN alamat a ON a.id_{jenis} = w.{id_col}
+                    JOIN lahan l  ON l.id_alamat = a.alamat_id
+                    WHERE {_cocok_istilah(f"LOWER(w.{nama_col})", utama, t, trgm, per_kata=True)}"""
+            )
+        if params[f"id{utama}"] is not None:
+            sumber.append(f"SELECT lahan_id FROM lahan WHERE lahan_id = %(id{utama})s")
+        kandidat = "JOIN (" + "\nUNION\n".join(sumber) + ") k ON k.lahan_id = l.lahan_id"
+
+        for i, t in enumerate(istilah):
+            cocok = f"{TEKS_CARI_LAHAN} LIKE %(potongan{i})s"
+            if trgm and len(t) >= MIN_HURUF_TRIGRAM:
+                cocok += f" OR %(t{i})s <%% {TEKS_CARI_LAHAN}"
+            if params[f"id{i}"] is not None:
+                cocok += f" OR l.lahan_id = %(id{i})s"
+            kondisi.append(f"({cocok})")
+
+        urutan.append("l.lahan_id::text = %(kata)s DESC")
+        if trgm:
+            urutan.append(f"word_similarity(%(kata)s, {TEKS_CARI_LAHAN}) DESC")
+        # Frasa utuh dulu, lalu cocok di bagian depan teks (jalan, kecamatan) lebih
+        # spesifik dari provinsi/petani
+        params["utama"] = istilah[utama]
+        urutan.append(f"NULLIF(strpos({TEKS_CARI_LAHAN}, %(kata)s), 0) NULLS LAST")
+        urutan.append(f"NULLIF(strpos({TEKS_CARI_LAHAN}, %(utama)s), 0) NULLS LAST")
+    urutan.append("l.lahan_id")
+
+    query = f"""
         SELECT
             l.lahan_id,
+            u_p.name        AS nama_petani,
+            u_s.user_id     AS surveyor_id,
+            u_s.name        AS nama_surveyor,
             l.ketinggian,
-
-            u_p.user_id        AS petani_id,
-            u_p.name           AS nama_petani,
-
-            u_s.user_id        AS surveyor_id,
-            u_s.name           AS nama_surveyor,
-
-            a.alamat_id,
             a.nama_jalan,
             kc.nama_kecamatan,
-            k.nama_kota,
-            p.nama_provinsi
+            kt.nama_kota,
+            p.nama_provinsi,
+            l.jumlah_survey AS survey_count,
+            l.survey_terakhir
         FROM lahan l
-        LEFT JOIN users u_p       ON u_p.user_id    = l.id_user_petani
-        LEFT JOIN users u_s       ON u_s.user_id    = l.id_user_surveyor
-        LEFT JOIN alamat a        ON a.alamat_id    = l.id_alamat
-        LEFT JOIN kecamatan kc    ON kc.kecamatan_id = a.id_kecamatan
-        LEFT JOIN kota k          ON k.kota_id      = a.id_kota
-        LEFT JOIN provinsi p      ON p.provinsi_id  = a.id_provinsi
-        ORDER BY l.lahan_id;
-        """
-    )
-    lahan = cursor.fetchall()
+        {kandidat}
+        LEFT JOIN users u_p       ON u_p.user_id      = l.id_user_petani
+        LEFT JOIN users u_s       ON u_s.user_id      = l.id_user_surveyor
+        LEFT JOIN alamat a        ON a.alamat_id      = l.id_alamat
+        LEFT JOIN kecamatan kc    ON kc.kecamatan_id  = a.id_kecamatan
+        LEFT JOIN kota kt         ON kt.kota_id       = a.id_kota
+        LEFT JOIN provinsi p      ON p.provinsi_id    = a.id_provinsi
+        {"WHERE " + " AND ".join(kondisi) if kondisi else ""}
+        ORDER BY {", ".join(urutan)}
+        LIMIT %(batas)s OFFSET %(offset)s;
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
 
-    # 3. Ambil semua survey_data + iklim + tanah + tanaman + petani (via lahan)
-    cursor.execute(
-        """
-        SELECT
-            sd.survey_id,
-            sd.id_lahan,
 
-            sd.id_user_surveyor,
-            us.name               AS nama_surveyor,
+def cetak_hasil_user(rows) -> None:
+    for user_id, name, username, email, no_telp, roles in rows:
+        print(
+            f"  - ID: {user_id} | Nama: {name} | Username: {username} | "
+            f"Email: {display(email)} | Telp: {display(no_telp)} | Role: {', '.join(roles) or '-'}"
+        )
 
-            sd.status_survey,
-            sd.tanggal_survey,
 
-            sd.id_iklim,
-            ik.jenis_cuaca,
+def cari_interaktif(label: str, cari, cetak) -> int | None:
+    """
+    Cari per halaman: ketik kata untuk mencari (kosong di awal = semua),
+    ID dari hasil untuk memilih, n/p untuk pindah halaman, 0 untuk kembali.
+    cari(kata, batas, offset) mengembalikan baris dengan ID di kolom pertama.
+    """
+    batas = UKURAN_HALAMAN
+    kata = None
+    offset = 0
+    rows: list[tuple[Any, ...]] = []
 
-            sd.id_tanah,
-            kt.kondisi_tanah,
-            kt.ph,
-            kt.kandungan_nutrisi,
-            kt.kelembapan,
-
-            sd.id_tanaman,
-            t.nama                AS nama_tanaman,
-
-            u_p.user_id           AS petani_id,
-            u_p.name              AS nama_petani
-        FROM survey_data sd
-        LEFT JOIN users us          ON us.user_id = sd.id_user_surveyor
-        LEFT JOIN iklim ik          ON ik.iklim_id = sd.id_iklim
-        LEFT JOIN kondisi_tanah kt  ON kt.kondisi_tanah_id = sd.id_tanah
-        LEFT JOIN tanaman t         ON t.tanaman_id = sd.id_tanaman
-        LEFT JOIN lahan l           ON l.lahan_id = sd.id_lahan
-        LEFT JOIN users u_p         ON u_p.user_id = l.id_user_petani
-        ORDER BY sd.survey_id;
-        """
-    )
-    survey_data = cursor.fetchall()
+    while True:
+        if kata is None:
+            inp = input(f"Cari {label} (kosong = semua, 0 = kembali): ").strip()
+        else:
+            inp = input("Pilihan: ").strip()
 
-    cursor.close()
+        if inp == "0":
+            return None
+        if kata is not None and inp.isascii() and inp.isdigit() and any(row[0] == int(inp) for row in rows[:batas]):
+            return int(inp)
 
-    return {
-        "petani": petani,
-        "lahan": lahan,
-        "survey_data": survey_data,
-    }
+        if kata is not None and inp.lower() == "n":
+            if len(rows) <= batas:
+                print("Sudah halaman terakhir.")
+                continue
+            offset += batas
+        elif kata is not None and inp.lower() == "p":
+            if not offset:
+                print("Sudah halaman pertama.")
+                continue
+            offset = max(0, offset - batas)
+        elif kata is not None and not inp:
+            return None
+        else:
+            kata, offset = inp, 0
 
-# Analysis
+        rows = cari(kata, batas + 1, offset)
+        judul = f"cocok dengan '{kata}'" if kata else "semua"
+        print(f"\n--- {label} {judul} (halaman {offset // batas + 1}) ---")
+        if not rows:
+            print(f"  (Tidak ada {label} yang cocok)")
+        else:
+            cetak(rows[:batas])
+
+        bantuan = ["ID = pilih", "ketik kata lain = cari lagi"]
+        if len(rows) > batas:
+            bantuan.append("n = halaman berikutnya")
+        if offset:
+            bantuan.append("p = halaman sebelumnya")
+        bantuan.append("kosong/0 = kembali")
+        print("  " + " | ".join(bantuan))
+
+# Export data
+
+def kondisi_export(
+    jenis: str,
+    provinsi: str | None = None,
+    kota: str | None = None,
+    dari: date | None = None,
+    sampai: date | None = None,
+) -> tuple[list[str], tuple[Any, ...]]:
+    """
+    Susun filter export. provinsi/kota boleh ID atau nama.
+    Tanggal: petani = tanggal daftar, lahan = survey terakhir, survey_data = tanggal survey.
+    """
+    data = DATA_LAHAN[jenis]
+    kondisi: list[str] = []
+    params: list[Any] = []
+
+    if provinsi:
+        kondisi.append(
+            f"""{data['alamat']} IN (
+                SELECT a2.alamat_id FROM alamat a2
+                JOIN provinsi p2 ON p2.provinsi_id = a2.id_provinsi
+                WHERE p2.provinsi_id::TEXT = %s OR LOWER(p2.nama_provinsi) = LOWER(%s)
+            )"""
+        )
+        params += [provinsi, provinsi]
+    if kota:
+        kondisi.append(
+            f"""{data['alamat']} IN (
+                SELECT a2.alamat_id FROM alamat a2
+                JOIN kota k2 ON k2.kota_id = a2.id_kota
+                WHERE k2.kota_id::TEXT = %s OR LOWER(k2.nama_kota) = LOWER(%s)
+            )"""
+        )
+        params += [kota, kota]
+    if dari:
+        kondisi.append(f"{data['tanggal']} >= %s")
+        params.append(dari)
+    if sampai:
+        kondisi.append(f"{data['tanggal']} <= %s")
+        params.append(sampai)
+    return kondisi, tuple(params)
 
-def delete_lahan(conn, lahan_id: int) -> bool:
+
+def export_csv(conn, jenis: str, path: str, kondisi=None, params=()) -> int:
     """
-    Hapus lahan berdasarkan lahan_id.
-    Hapus dulu survey_data yang terkait, baru hapus lahan.
+    Export overview ke CSV lewat COPY TO STDOUT, langsung ditulis ke file.
+    :return: jumlah baris
     """
     with conn.cursor() as cur:
-        # Cek keberadaan lahan
-        cur.execute("SELECT 1 FROM lahan WHERE lahan_id = %s", (lahan_id,))
-        if not cur.fetchone():
-            print(f"Lahan ID {lahan_id} tidak ditemukan.")
-            return False
-
-        # Hapus survey_data terkait
-        cur.execute("DELETE FROM survey_data WHERE id_lahan = %s", (lahan_id,))
-        
-        # Hapus lahan
-        cur.execute("DELETE FROM lahan WHERE lahan_id = %s", (lahan_id,))
-        conn.commit()
-        return True
+        query = cur.mogrify(query_data_lahan(jenis, kondisi), params).decode()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+        return cur.rowcount
+
+
+# OID tipe PostgreSQL -> nama tipe pyarrow, selain ini disimpan sebagai string
+TIPE_PARQUET = {
+    20: "int64", 21: "int64", 23: "int64",
+    700: "float64", 701: "float64",
+    16: "bool_",
+    1082: "date32",
+}
 
 
-def add_lahan(
+def export_parquet(
     conn,
-    id_user_petani: int | None,
-    id_user_surveyor: int | None,
-    id_alamat: int | None,
-    ketinggian: float | None,
-) -> Optional[int]:
+    jenis: str,
+    path: str,
+    kondisi=None,
+    params=(),
+    ukuran_batch: int = 10_000,
+) -> int | None:
     """
-    Tambah data lahan.
-    :return: lahan_id atau None.
+    Export overview ke Parquet per batch dari server-side cursor,
+    jadi memori hanya sebesar satu batch.
+    :return: jumlah baris, None kalau pyarrow tidak terpasang
     """
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            INSERT INTO lahan (id_user_petani, id_user_surveyor, id_alamat, ketinggian)
-            VALUES (%s, %s, %s, %s)
-            RETURNING lahan_id;
-            """,
-            (id_user_petani, id_user_surveyor, id_alamat, ketinggian),
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("Export Parquet butuh pyarrow (pip install pyarrow).")
+        return None
+
+    query = query_data_lahan(jenis, kondisi)
+    nama_cursor = f"export_{jenis}_{secrets.token_hex(4)}"
+    total = 0
+    with conn.cursor(name=nama_cursor) as cur:
+        cur.itersize = ukuran_batch
+        cur.execute(query, params)
+        rows = cur.fetchmany(ukuran_batch)
+
+        schema = pa.schema([
+            (kolom.name, getattr(pa, TIPE_PARQUET.get(kolom.type_code, "string"))())
+            for kolom in cur.description
+        ])
+        teks = {
+            i for i, kolom in enumerate(cur.description)
+            if kolom.type_code not in TIPE_PARQUET
+        }
+
+        with pq.ParquetWriter(path, schema) as writer:
+            while rows:
+                kolom = [list(c) for c in zip(*rows)]
+                for i in teks:
+                    kolom[i] = [None if v is None else str(v) for v in kolom[i]]
+                writer.write_table(pa.Table.from_arrays(kolom, schema=schema))
+                total += len(rows)
+                rows = cur.fetchmany(ukuran_batch)
+    return total
+
+
+def cetak_data_petani(rows) -> None:
+    for user_id, name, username, email, no_telp in rows:
+        print(
+            f"  - ID: {user_id} | Nama: {name} | Username: {username} | "
+            f"Email: {display(email)} | No Telp: {display(no_telp)}"
         )
-        row = cur.fetchone()
-        conn.commit()
-        return row[0] if row else None
 
 
-def lihat_lahan_universal(conn, user: dict[str, Any]) -> list[tuple[Any, ...]]:
-    role = user["role"].lower()
-    user_id = user["id"]
+def cetak_data_lahan(rows) -> None:
+    for (
+            lahan_id,
+            ketinggian,
+            petani_id,
+            nama_petani,
+            surveyor_id,
+            nama_surveyor,
+            alamat_id,
+            nama_jalan,
+            nama_kecamatan,
+            nama_kota,
+            nama_provinsi,
+    ) in rows:
+        print(
+            f"- Lahan {lahan_id} | Petani: {display(nama_petani)} (ID {display(petani_id)}) | "
+            f"Surveyor: {display(nama_surveyor)} (ID {display(surveyor_id)}) | "
+            f"Ketinggian: {ketinggian} | Alamat: {nama_jalan}, "
+            f"{nama_kecamatan}, {nama_kota}, {nama_provinsi}"
+        )
+
+
+def cetak_data_survey(rows) -> None:
+    for (
+            survey_id,
+            id_lahan,
+            id_user_surveyor,
+            nama_surveyor,
+            status_survey,
+            tanggal_survey,
+            id_iklim,
+            jenis_cuaca,
+            id_tanah,
+            kondisi_tanah,
+            ph,
+            kandungan_nutrisi,
+            kelembapan,
+            id_tanaman,
+            nama_tanaman,
+            petani_id,
+            nama_petani,
+    ) in rows:
+        print(f"- Survey {survey_id} | Lahan {id_lahan} | Petani: {nama_petani} (ID {petani_id})")
+        print(
+            f"  Surveyor : {display(nama_surveyor)} (ID {display(id_user_surveyor)})"
+        )
+        print(
+            f"  Status   : {status_survey} | Tanggal: {tanggal_survey}"
+        )
+        print(
+            f"  Iklim    : {jenis_cuaca} | Tanah: {kondisi_tanah} "
+            f"(pH={ph}, Nutrisi={kandungan_nutrisi}, Kelembapan={kelembapan})"
+        )
+        if id_tanaman:
+            print(f"  Tanaman  : {nama_tanaman} (ID {id_tanaman})")
+        else:
+            print("  Tanaman  : -")
+
+
+CETAK_DATA_LAHAN = {
+    "petani": ("Data Petani", cetak_data_petani),
+    "lahan": ("Data Lahan", cetak_data_lahan),
+    "survey_data": ("Data Survey", cetak_data_survey),
+}
 
+
+def tampilkan_halaman_data_lahan(conn, jenis: str) -> None:
+    """
+    Tampilkan overview per halaman, navigasi n/p
+    """
+    judul, cetak = CETAK_DATA_LAHAN[jenis]
+    # kunci terakhir halaman sebelumnya untuk tiap halaman yang sudah dibuka
+    awal_halaman: list[int | None] = [None]
+
+    while True:
+        rows = ambil_halaman_data_lahan(conn, jenis, awal_halaman[-1], UKURAN_HALAMAN)
+        print(f"\n=== {judul} (halaman {len(awal_halaman)}) ===")
+        if not rows:
+            print("  (tidak ada data)")
+        else:
+            cetak(rows)
+
+        ada_berikutnya = len(rows) == UKURAN_HALAMAN
+        opsi = []
+        if ada_berikutnya:
+            opsi.append("[n] berikutnya")
+        if len(awal_halaman) > 1:
+            opsi.append("[p] sebelumnya")
+        opsi.append("[0] kembali")
+        pilih = input(f"\n{' '.join(opsi)}: ").strip().lower()
+
+        if pilih == "n" and ada_berikutnya:
+            awal_halaman.append(rows[-1][0])
+        elif pilih == "p" and len(awal_halaman) > 1:
+            awal_halaman.pop()
+        elif pilih == "0":
+            break
+
+# Dashboard wilayah
+
+# Kunci advisory supaya dua refresh dashboard tidak menghitung survey yang sama dua kali
+KUNCI_DASHBOARD = 7_202_309
+
+# survey_id yang hilang (rollback / belum commit) berhenti dicek setelah selang ini
+UMUR_CELAH_DASHBOARD = "1 day"
+
+SQL_REFRESH_DASHBOARD = [
+    """
+    CREATE TEMP TABLE dashboard_baru ON COMMIT DROP AS
+    SELECT sd.survey_id, sd.tanggal_survey, sd.id_tanaman,
+           kt.ph, kt.kandungan_nutrisi, kt.kelembapan,
+           a.id_provinsi, a.id_kota, a.id_kecamatan
+    FROM (
+        SELECT * FROM survey_data WHERE survey_id > %(watermark)s
+        UNION ALL
+        SELECT sd.* FROM survey_data sd JOIN dashboard_survey_celah c ON c.survey_id = sd.survey_id
+    ) sd
+    LEFT JOIN lahan l          ON l.lahan_id = sd.id_lahan
+    LEFT JOIN alamat a         ON a.alamat_id = l.id_alamat
+    LEFT JOIN kondisi_tanah kt ON kt.kondisi_tanah_id = sd.id_tanah;
+    """,
+    # Satu survey dihitung di provinsi, kota dan kecamatannya
+    """
+    CREATE TEMP TABLE dashboard_baru_wilayah ON COMMIT DROP AS
+    SELECT w.tingkat, w.id_wilayah, b.*
+    FROM dashboard_baru b
+    CROSS JOIN LATERAL (VALUES
+        ('provinsi', b.id_provinsi), ('kota', b.id_kota), ('kecamatan', b.id_kecamatan)
+    ) w(tingkat, id_wilayah)
+    WHERE w.id_wilayah IS NOT NULL;
+    """,
+    """
+    INSERT INTO dashboard_wilayah AS d (
+        tingkat, id_wilayah, jumlah_survey, jumlah_tanah,
+        total_ph, total_nutrisi, total_kelembapan, survey_terakhir
+    )
+    SELECT tingkat, id_wilayah, COUNT(*), COUNT(ph),
+           COALESCE(SUM(ph), 0), COALESCE(SUM(kandungan_nutrisi), 0), COALESCE(SUM(kelembapan), 0),
+           MAX(tanggal_survey)
+    FROM dashboard_baru_wilayah
+    GROUP BY tingkat, id_wilayah
+    ON CONFLICT (tingkat, id_wilayah) DO UPDATE SET
+        jumlah_survey    = d.jumlah_survey + EXCLUDED.jumlah_survey,
+        jumlah_tanah     = d.jumlah_tanah + EXCLUDED.jumlah_tanah,
+        total_ph         = d.total_ph + EXCLUDED.total_ph,
+        total_nutrisi    = d.total_nutrisi + EXCLUDED.total_nutrisi,
+        total_kelembapan = d.total_kelembapan + EXCLUDED.total_kelembapan,
+        survey_terakhir  = GREATEST(d.survey_terakhir, EXCLUDED.survey_terakhir);
+    """,
+    """
+    INSERT INTO dashboard_survey_harian AS d (tingkat, id_wilayah, tanggal, jumlah)
+    SELECT tingkat, id_wilayah, tanggal_survey, COUNT(*)
+    FROM dashboard_baru_wilayah
+    WHERE tanggal_survey IS NOT NULL
+    GROUP BY tingkat, id_wilayah, tanggal_survey
+    ON CONFLICT (tingkat, id_wilayah, tanggal) DO UPDATE SET jumlah = d.jumlah + EXCLUDED.jumlah;
+    """,
+    """
+    INSERT INTO dashboard_tanaman AS d (tingkat, id_wilayah, id_tanaman, jumlah)
+    SELECT tingkat, id_wilayah, id_tanaman, COUNT(*)
+    FROM dashboard_baru_wilayah
+    WHERE id_tanaman IS NOT NULL
+    GROUP BY tingkat, id_wilayah, id_tanaman
+    ON CONFLICT (tingkat, id_wilayah, id_tanaman) DO UPDATE SET jumlah = d.jumlah + EXCLUDED.jumlah;
+    """,
+    # Celah yang sekarang sudah terlihat, atau sudah terlalu lama, tidak dicek lagi
+    f"""
+    DELETE FROM dashboard_survey_celah c
+    WHERE c.survey_id IN (SELECT survey_id FROM dashboard_baru)
+       OR c.dicatat < now() - interval '{UMUR_CELAH_DASHBOARD}';
+    """,
+    """
+    INSERT INTO dashboard_survey_celah (survey_id)
+    SELECT g
+    FROM generate_series(
+        %(watermark)s + 1,
+        (SELECT COALESCE(MAX(survey_id), %(watermark)s) FROM dashboard_baru)
+    ) g
+    WHERE NOT EXISTS (SELECT 1 FROM dashboard_baru b WHERE b.survey_id = g)
+    ON CONFLICT DO NOTHING;
+    """,
+    # Jumlah lahan berubah karena klaim dan lahan baru, dihitung ulang (tabel lahan jauh lebih kecil)
+    """
+    WITH per_alamat AS (
+        SELECT a.id_provinsi, a.id_kota, a.id_kecamatan,
+               COUNT(*) AS jumlah, COUNT(l.id_user_surveyor) AS diklaim
+        FROM lahan l
+        JOIN alamat a ON a.alamat_id = l.id_alamat
+        GROUP BY a.id_provinsi, a.id_kota, a.id_kecamatan
+    ),
+    per_wilayah AS (
+        SELECT w.tingkat, w.id_wilayah, SUM(p.jumlah) AS jumlah, SUM(p.diklaim) AS diklaim
+        FROM per_alamat p
+        CROSS JOIN LATERAL (VALUES
+            ('provinsi', p.id_provinsi), ('kota', p.id_kota), ('kecamatan', p.id_kecamatan)
+        ) w(tingkat, id_wilayah)
+        WHERE w.id_wilayah IS NOT NULL
+        GROUP BY w.tingkat, w.id_wilayah
+    ),
+    kosongkan AS (
+        UPDATE dashboard_wilayah d
+        SET jumlah_lahan = 0, lahan_diklaim = 0
+        WHERE d.jumlah_lahan > 0
+          AND NOT EXISTS (
+              SELECT 1 FROM per_wilayah p WHERE p.tingkat = d.tingkat AND p.id_wilayah = d.id_wilayah
+          )
+    )
+    INSERT INTO dashboard_wilayah AS d (tingkat, id_wilayah, jumlah_lahan, lahan_diklaim)
+    SELECT tingkat, id_wilayah, jumlah, diklaim FROM per_wilayah
+    ON CONFLICT (tingkat, id_wilayah) DO UPDATE SET
+        jumlah_lahan = EXCLUDED.jumlah_lahan,
+        lahan_diklaim = EXCLUDED.lahan_diklaim
+    WHERE (d.jumlah_lahan, d.lahan_diklaim) IS DISTINCT FROM (EXCLUDED.jumlah_lahan, EXCLUDED.lahan_diklaim);
+    """,
+    """
+    UPDATE dashboard_watermark
+    SET survey_id_terakhir = GREATEST(
+            survey_id_terakhir, (SELECT COALESCE(MAX(survey_id), 0) FROM dashboard_baru)
+        ),
+        diperbarui = now()
+    WHERE id = 1;
+    """,
+]
+
+
+def refresh_dashboard(conn, penuh: bool = False) -> dict[str, Any]:
+    """
+    Perbarui agregat dashboard dari survey_data yang baru sejak refresh terakhir.
+    penuh: hapus semua agregat lalu hitung dari awal (misal setelah banyak survey/lahan dihapus)
+    :return: ringkasan (survey baru, watermark, detik)
+    """
+    mulai = time.perf_counter()
     with conn.cursor() as cur:
-        if role == "surveyor":
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (KUNCI_DASHBOARD,))
+        if penuh:
             cur.execute(
                 """
-                SELECT
-                    l.lahan_id,
-                    u_p.name        AS nama_petani,
-                    u_s.user_id     AS surveyor_id,
-                    u_s.name        AS nama_surveyor,
-                    l.ketinggian,
-                    a.nama_jalan,
-                    kc.nama_kecamatan,
-                    kt.nama_kota,
-                    p.nama_provinsi,
-                    (SELECT COUNT(*) FROM survey_data sd WHERE sd.id_lahan = l.lahan_id) AS survey_count
-                FROM lahan l
-                LEFT JOIN users u_p       ON u_p.user_id      = l.id_user_petani
-                LEFT JOIN users u_s       ON u_s.user_id      = l.id_user_surveyor
-                LEFT JOIN alamat a        ON a.alamat_id      = l.id_alamat
-                LEFT JOIN kecamatan kc    ON kc.kecamatan_id  = a.id_kecamatan
-                LEFT JOIN kota kt         ON kt.kota_id       = a.id_kota
-                LEFT JOIN provinsi p      ON p.provinsi_id    = a.id_provinsi
-                ORDER BY l.lahan_id;
+                TRUNCATE dashboard_wilayah, dashboard_survey_harian, dashboard_tanaman, dashboard_survey_celah;
+                UPDATE dashboard_watermark SET survey_id_terakhir = 0 WHERE id = 1;
                 """
             )
-        elif role == "petani":
+        cur.execute("SELECT survey_id_terakhir FROM dashboard_watermark WHERE id = 1")
+        watermark = cur.fetchone()[0]
+        for sql in SQL_REFRESH_DASHBOARD:
+            cur.execute(sql, {"watermark": watermark})
+        cur.execute("SELECT COUNT(*) FROM dashboard_baru")
+        survey_baru = cur.fetchone()[0]
+        cur.execute("SELECT survey_id_terakhir FROM dashboard_watermark WHERE id = 1")
+        watermark = cur.fetchone()[0]
+    conn.commit()
+    return {
+        "survey_baru": survey_baru,
+        "watermark": watermark,
+        "detik": round(time.perf_counter() - mulai, 3),
+    }
+
+
+def ambil_dashboard(
+    conn,
+    tingkat: str,
+    batas: int = 20,
+    hari: int = 7,
+) -> list[dict[str, Any]]:
+    """
+    Wilayah dengan lahan terbanyak di tingkat tsb, dibaca dari tabel agregat saja
+    """
+    tabel, id_col, nama_col = ALAMAT_MASTER_CONFIG[tingkat]
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT d.id_wilayah, w.{nama_col}, d.jumlah_lahan, d.lahan_diklaim, d.jumlah_survey,
+                   (SELECT COALESCE(SUM(h.jumlah), 0) FROM dashboard_survey_harian h
+                    WHERE h.tingkat = d.tingkat AND h.id_wilayah = d.id_wilayah
+                      AND h.tanggal > current_date - %(hari)s),
+                   d.total_ph / NULLIF(d.jumlah_tanah, 0),
+                   d.total_nutrisi / NULLIF(d.jumlah_tanah, 0),
+                   d.total_kelembapan / NULLIF(d.jumlah_tanah, 0),
+                   d.survey_terakhir,
+                   ARRAY(
+                       SELECT t.nama FROM dashboard_tanaman dt
+                       JOIN tanaman t ON t.tanaman_id = dt.id_tanaman
+                       WHERE dt.tingkat = d.tingkat AND dt.id_wilayah = d.id_wilayah
+                       ORDER BY dt.jumlah DESC, dt.id_tanaman
+                       LIMIT 3
+                   )
+            FROM dashboard_wilayah d
+            LEFT JOIN {tabel} w ON w.{id_col} = d.id_wilayah
+            WHERE d.tingkat = %(tingkat)s
+            ORDER BY d.jumlah_lahan DESC, d.jumlah_survey DESC, d.id_wilayah
+            LIMIT %(batas)s
+            """,
+            {"tingkat": tingkat, "batas": batas, "hari": hari},
+        )
+        kolom = (
+            "id", "nama", "lahan", "diklaim", "survey", "survey_terbaru",
+            "ph", "nutrisi", "kelembapan", "survey_terakhir", "tanaman_teratas",
+        )
+        return [dict(zip(kolom, row)) for row in cur.fetchall()]
+
+
+def ambil_detail_dashboard(
+    conn,
+    tingkat: str,
+    id_wilayah: int,
+    hari: int = 14,
+) -> dict[str, Any]:
+    """
+    Survey per hari dan tanaman teratas satu wilayah
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT tanggal, jumlah FROM dashboard_survey_harian
+            WHERE tingkat = %s AND id_wilayah = %s AND tanggal > current_date - %s
+            ORDER BY tanggal
+            """,
+            (tingkat, id_wilayah, hari),
+        )
+        harian = cur.fetchall()
+        cur.execute(
+            """
+            SELECT t.tanaman_id, t.nama, dt.jumlah FROM dashboard_tanaman dt
+            JOIN tanaman t ON t.tanaman_id = dt.id_tanaman
+            WHERE dt.tingkat = %s AND dt.id_wilayah = %s
+            ORDER BY dt.jumlah DESC, dt.id_tanaman
+            LIMIT 10
+            """,
+            (tingkat, id_wilayah),
+        )
+        tanaman = cur.fetchall()
+    return {"harian": harian, "tanaman": tanaman}
+
+
+def tampilkan_dashboard(conn) -> None:
+    """
+    Dashboard wilayah di menu admin, navigasi tingkat / detail / refresh
+    """
+    tingkat = "provinsi"
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("SELECT diperbarui FROM dashboard_watermark WHERE id = 1")
+            diperbarui = cur.fetchone()[0]
+        rows = ambil_dashboard(conn, tingkat)
+        conn.rollback()
+
+        print(f"\n=== Dashboard per {tingkat} (data per {display(diperbarui)}) ===")
+        if not rows:
+            print("  (belum ada data, pilih [r] untuk refresh)")
+        for r in rows:
+            rata = (
+                f"pH {r['ph']:.2f} | Nutrisi {r['nutrisi']:.1f} | Kelembapan {r['kelembapan']:.1f}"
+                if r["ph"] is not None else "belum ada data tanah"
+            )
+            print(
+                f"- ID: {r['id']} | {display(r['nama'])} | Lahan: {r['lahan']} "
+                f"(diambil {r['diklaim']}, belum {r['lahan'] - r['diklaim']}) | "
+                f"Survey: {r['survey']} ({r['survey_terbaru']} dalam 7 hari) | {rata} | "
+                f"Tanaman: {', '.join(r['tanaman_teratas']) or '-'}"
+            )
+
+        pilih = input(
+            "\n[1] provinsi [2] kota [3] kecamatan [d] detail wilayah [r] refresh [0] kembali: "
+        ).strip().lower()
+        if pilih in ("1", "2", "3"):
+            tingkat = {"1": "provinsi", "2": "kota", "3": "kecamatan"}[pilih]
+        elif pilih == "r":
+            hasil = refresh_dashboard(conn)
+            print(f"{hasil['survey_baru']} survey baru masuk dashboard ({hasil['detik']} detik).")
+        elif pilih == "d":
+            try:
+                id_wilayah = int(input(f"ID {tingkat}: ").strip())
+            except ValueError:
+                print("ID harus angka.")
+                continue
+            detail = ambil_detail_dashboard(conn, tingkat, id_wilayah)
+            conn.rollback()
+            print("\nSurvey per hari (14 hari terakhir):")
+            if not detail["harian"]:
+                print("  (tidak ada survey)")
+            for tanggal, jumlah in detail["harian"]:
+                print(f"  {tanggal} | {jumlah:>6} | {'#' * min(jumlah, 60)}")
+            print("\nTanaman yang paling sering dipilih:")
+            if not detail["tanaman"]:
+                print("  (belum ada)")
+            for tanaman_id, nama, jumlah in detail["tanaman"]:
+                print(f"  - ID {tanaman_id}: {nama} ({jumlah} survey)")
+            enter_break()
+        elif pilih == "0":
+            break
+
+# Analysis
+
+def delete_lahan(conn, lahan_id: int) -> bool:
+    """
+    Hapus lahan berdasarkan lahan_id, beserta survey, penanaman dan kondisi_tanahnya.
+    """
+    hasil = hapus_lahan_massal(conn, lahan_ids=[lahan_id])
+    if hasil is None:
+        return False
+    if not hasil["lahan"]:
+        print(f"Lahan ID {lahan_id} tidak ditemukan.")
+        return False
+    return True
+
+
+# Hapus massal
+
+# {target}: SELECT lahan_id (alias l) yang dihapus. Anak lahan dihapus eksplisit di
+# statement yang sama (bukan lewat cascade) supaya jumlah barisnya bisa dilaporkan.
+# kondisi_tanah hanya dihapus kalau tidak dipakai survey di luar target.
+SQL_HAPUS_LAHAN = """
+    WITH target AS (
+        {target}
+        FOR UPDATE OF l
+    ),
+    survey AS (
+        DELETE FROM survey_data sd
+        USING target t
+        WHERE sd.id_lahan = t.lahan_id
+        RETURNING sd.survey_id, sd.id_tanah
+    ),
+    tanam AS (
+        DELETE FROM penanaman pn
+        USING survey s
+        WHERE pn.id_survey = s.survey_id
+        RETURNING 1
+    ),
+    tanah AS (
+        DELETE FROM kondisi_tanah kt
+        USING (SELECT DISTINCT id_tanah FROM survey WHERE id_tanah IS NOT NULL) s
+        WHERE kt.kondisi_tanah_id = s.id_tanah
+          AND NOT EXISTS (
+              SELECT 1 FROM survey_data sd
+              WHERE sd.id_tanah = kt.kondisi_tanah_id
+                AND (sd.id_lahan IS NULL OR sd.id_lahan NOT IN (SELECT lahan_id FROM target))
+          )
+        RETURNING 1
+    ),
+    hapus AS (
+        DELETE FROM lahan l
+        USING target t
+        WHERE l.lahan_id = t.lahan_id
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM hapus),
+        (SELECT COUNT(*) FROM survey),
+        (SELECT COUNT(*) FROM tanam),
+        (SELECT COUNT(*) FROM tanah);
+"""
+
+# Lepas surveyor dari lahan/survey (riwayat survey tetap ada), lalu hapus role dan user
+SQL_HAPUS_USER = """
+    WITH lahan_lepas AS (
+        UPDATE lahan SET id_user_surveyor = NULL
+        WHERE id_user_surveyor = ANY(%(user)s)
+        RETURNING 1
+    ),
+    survey_lepas AS (
+        UPDATE survey_data SET id_user_surveyor = NULL
+        WHERE id_user_surveyor = ANY(%(user)s)
+        RETURNING 1
+    ),
+    peran AS (
+        DELETE FROM user_roles
+        WHERE id_user = ANY(%(user)s)
+        RETURNING 1
+    ),
+    hapus AS (
+        DELETE FROM users
+        WHERE user_id = ANY(%(user)s)
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM hapus),
+        (SELECT COUNT(*) FROM lahan_lepas),
+        (SELECT COUNT(*) FROM survey_lepas),
+        (SELECT COUNT(*) FROM peran);
+"""
+
+
+def _hapus_lahan_target(cur, target: str, params: dict[str, Any]) -> dict[str, int]:
+    cur.execute(SQL_HAPUS_LAHAN.format(target=target), params)
+    lahan, survey, penanaman, tanah = cur.fetchone()
+    return {"lahan": lahan, "survey": survey, "penanaman": penanaman, "kondisi_tanah": tanah}
+
+
+def _selesai_hapus(conn, coba: bool) -> None:
+    if coba:
+        conn.rollback()
+    else:
+        conn.commit()
+
+
+def hapus_lahan_massal(
+    conn,
+    lahan_ids: list[int] | None = None,
+    id_kecamatan: int | None = None,
+    id_kota: int | None = None,
+    id_provinsi: int | None = None,
+    id_petani: int | None = None,
+    coba: bool = False,
+) -> Optional[dict[str, int]]:
+    """
+    Hapus banyak lahan sekaligus beserta survey, penanaman dan kondisi_tanahnya,
+    dalam satu statement dan satu transaksi. Filter digabung dengan AND, minimal satu diisi.
+    coba=True: hitung saja lalu rollback.
+    :return: jumlah baris terhapus per tabel (lahan, survey, penanaman, kondisi_tanah), None kalau gagal
+    """
+    kondisi = []
+    params: dict[str, Any] = {
+        "lahan": lahan_ids,
+        "kecamatan": id_kecamatan,
+        "kota": id_kota,
+        "provinsi": id_provinsi,
+        "petani": id_petani,
+    }
+    if lahan_ids is not None:
+        kondisi.append("l.lahan_id = ANY(%(lahan)s)")
+    for kolom, nilai in (("id_kecamatan", id_kecamatan), ("id_kota", id_kota), ("id_provinsi", id_provinsi)):
+        if nilai is not None:
+            kondisi.append(f"a.{kolom} = %({kolom[3:]})s")
+    if id_petani is not None:
+        kondisi.append("l.id_user_petani = %(petani)s")
+    if not kondisi:
+        print("Isi minimal satu filter lahan yang akan dihapus.")
+        return None
+
+    target = f"""
+        SELECT l.lahan_id
+        FROM lahan l
+        LEFT JOIN alamat a ON a.alamat_id = l.id_alamat
+        WHERE {" AND ".join(kondisi)}
+    """
+    try:
+        with conn.cursor() as cur:
+            hasil = _hapus_lahan_target(cur, target, params)
+        _selesai_hapus(conn, coba)
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Gagal menghapus lahan: {str(e).splitlines()[0]}")
+        return None
+    return hasil
+
+
+def hapus_user_massal(
+    conn,
+    user_ids: list[int] | None = None,
+    usernames: list[str] | None = None,
+    role: str | None = None,
+    tidak_aktif_hari: int | None = None,
+    coba: bool = False,
+) -> Optional[dict[str, int]]:
+    """
+    Hapus banyak user sekaligus dalam satu transaksi: lahan milik petani ikut terhapus
+    (dengan survey, penanaman, kondisi_tanah), lahan/survey surveyor dilepas (surveyor jadi NULL).
+    Filter digabung dengan AND, minimal satu diisi.
+    tidak_aktif_hari: user lebih lama dari N hari tanpa survey (surveyor) dan tanpa lahan
+    yang disurvey (petani) dalam N hari terakhir.
+    Admin hanya ikut terhapus kalau disebut lewat user_ids/usernames.
+    coba=True: hitung saja lalu rollback.
+    :return: jumlah baris per tabel, None kalau gagal
+    """
+    kondisi = []
+    params: dict[str, Any] = {
+        "user": user_ids,
+        "username": usernames,
+        "role": role,
+        "hari": tidak_aktif_hari,
+    }
+    if user_ids is not None:
+        kondisi.append("u.user_id = ANY(%(user)s)")
+    if usernames is not None:
+        kondisi.append("u.username = ANY(%(username)s)")
+    if role:
+        kondisi.append(
+            """EXISTS (
+                SELECT 1 FROM user_roles ur JOIN roles r ON r.role_id = ur.id_role
+                WHERE ur.id_user = u.user_id AND LOWER(r.nama_role) = LOWER(%(role)s)
+            )"""
+        )
+    if tidak_aktif_hari is not None:
+        kondisi.append(
+            """u.pembuatan < current_date - %(hari)s
+            AND NOT EXISTS (
+                SELECT 1 FROM survey_data sd
+                WHERE sd.id_user_surveyor = u.user_id
+                  AND sd.tanggal_survey > current_date - %(hari)s
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM lahan l
+                WHERE l.id_user_petani = u.user_id
+                  AND l.survey_terakhir > current_date - %(hari)s
+            )"""
+        )
+    if not kondisi:
+        print("Isi minimal satu filter user yang akan dihapus.")
+        return None
+    if user_ids is None and usernames is None:
+        kondisi.append(
+            """NOT EXISTS (
+                SELECT 1 FROM user_roles ur JOIN roles r ON r.role_id = ur.id_role
+                WHERE ur.id_user = u.user_id AND LOWER(r.nama_role) = 'admin'
+            )"""
+        )
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT u.user_id FROM users u
+                WHERE {" AND ".join(kondisi)}
+                ORDER BY u.user_id
+                FOR UPDATE OF u
+                """,
+                params,
+            )
+            target = [row[0] for row in cur.fetchall()]
+            hasil = _hapus_lahan_target(
+                cur,
+                "SELECT l.lahan_id FROM lahan l WHERE l.id_user_petani = ANY(%(user)s)",
+                {"user": target},
+            )
+            cur.execute(SQL_HAPUS_USER, {"user": target})
+            user, lahan_lepas, survey_lepas, peran = cur.fetchone()
+        _selesai_hapus(conn, coba)
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Gagal menghapus user: {str(e).splitlines()[0]}")
+        return None
+    return {
+        "user": user,
+        "user_roles": peran,
+        **hasil,
+        "lahan_dilepas": lahan_lepas,
+        "survey_dilepas": survey_lepas,
+    }
+
+
+def cetak_hasil_hapus(hasil: dict[str, int], coba: bool = False) -> None:
+    print("Akan terhapus (coba, tidak disimpan):" if coba else "Terhapus:")
+    for tabel, jumlah in hasil.items():
+        print(f"  {tabel}: {jumlah}")
+    if hasil.get("survey"):
+        # Agregat dashboard hanya menambah survey baru, survey terhapus perlu hitung ulang
+        print("Survey ikut terhapus, jalankan: python projekFinal.py dashboard-refresh --penuh")
+
+
+def add_lahan(
+    conn,
+    id_user_petani: int | None,
+    id_user_surveyor: int | None,
+    id_alamat: int | None,
+    ketinggian: float | None,
+) -> Optional[int]:
+    """
+    Tambah data lahan.
+    :return: lahan_id atau None.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO lahan (id_user_petani, id_user_surveyor, id_alamat, ketinggian)
+            VALUES (%s, %s, %s, %s)
+            RETURNING lahan_id;
+            """,
+            (id_user_petani, id_user_surveyor, id_alamat, ketinggian),
+        )
+        row = cur.fetchone()
+        conn.commit()
+        return row[0] if row else None
+
+
+def lihat_lahan_universal(conn, user: dict[str, Any]) -> list[tuple[Any, ...]]:
+    role = user["role"].lower()
+    user_id = user["id"]
+
+    with conn.cursor() as cur, label_query(role):
+        if role == "surveyor":
             cur.execute(
                 """
                 SELECT
@@ -701,7 +2612,8 @@ def lihat_lahan_universal(conn, user: dict[str, Any]) -> list[tuple[Any, ...]]:
                     kc.nama_kecamatan,
                     kt.nama_kota,
                     p.nama_provinsi,
-                    (SELECT COUNT(*) FROM survey_data sd WHERE sd.id_lahan = l.lahan_id) AS survey_count
+                    l.jumlah_survey AS survey_count,
+                    l.survey_terakhir
                 FROM lahan l
                 LEFT JOIN users u_p       ON u_p.user_id      = l.id_user_petani
                 LEFT JOIN users u_s       ON u_s.user_id      = l.id_user_surveyor
@@ -709,11 +2621,11 @@ def lihat_lahan_universal(conn, user: dict[str, Any]) -> list[tuple[Any, ...]]:
                 LEFT JOIN kecamatan kc    ON kc.kecamatan_id  = a.id_kecamatan
                 LEFT JOIN kota kt         ON kt.kota_id       = a.id_kota
                 LEFT JOIN provinsi p      ON p.provinsi_id    = a.id_provinsi
-                WHERE l.id_user_petani = %s
                 ORDER BY l.lahan_id;
-                """,
-                (user_id,),
+                """
             )
+        elif role == "petani":
+            jalankan_statement(cur, "lihat_lahan_petani", (user_id,))
         else:  # admin
             cur.execute(
                 """
@@ -727,7 +2639,8 @@ def lihat_lahan_universal(conn, user: dict[str, Any]) -> list[tuple[Any, ...]]:
                     kc.nama_kecamatan,
                     kt.nama_kota,
                     p.nama_provinsi,
-                    (SELECT COUNT(*) FROM survey_data sd WHERE sd.id_lahan = l.lahan_id) AS survey_count
+                    l.jumlah_survey AS survey_count,
+                    l.survey_terakhir
                 FROM lahan l
                 LEFT JOIN users u_p       ON u_p.user_id      = l.id_user_petani
                 LEFT JOIN users u_s       ON u_s.user_id      = l.id_user_surveyor
@@ -793,6 +2706,9 @@ def add_tanaman(
 
         tanaman_id = row[0] if row else None
         if tanaman_id is not None:
+            CACHE_TANAMAN.tambah(
+                (tanaman_id, nama_tanaman, ketinggian, ph, kandungan_nutrisi, kelembapan, iklim_id)
+            )
             print(f"Tanaman '{nama_tanaman}' (ID {tanaman_id}) berhasil disimpan.")
         return tanaman_id
 
@@ -811,6 +2727,7 @@ def delete_tanaman(conn, tanaman_id: int) -> bool:
         cur.execute("DELETE FROM tanaman WHERE tanaman_id = %s", (tanaman_id,))
         if cur.rowcount > 0:
             conn.commit()
+            CACHE_TANAMAN.hapus(tanaman_id)
             return True
         else:
             print(f"Tanaman ID {tanaman_id} tidak ditemukan.")
@@ -820,9 +2737,10 @@ def delete_tanaman(conn, tanaman_id: int) -> bool:
 def hitung_survey(conn, lahan_id: int) -> int:
     """
     Hitung berapa kali surveyor melakukan survey
+    (dibaca dari lahan.jumlah_survey yang diupdate trigger survey_data)
     """
     with conn.cursor() as cur:
-        cur.execute("SELECT COUNT(*) FROM survey_data WHERE id_lahan = %s", (lahan_id,))
+        jalankan_statement(cur, "hitung_survey", (lahan_id,))
         row = cur.fetchone()
         return row[0] if row else 0
 
@@ -841,22 +2759,10 @@ def add_survey_data(
     """
     tanggal = date.today()
 
-    query = """
-        INSERT INTO survey_data (
-            id_user_surveyor,
-            id_lahan,
-            id_iklim,
-            id_tanah,
-            status_survey,
-            id_tanaman,
-            tanggal_survey
-        ) VALUES (%s,%s,%s,%s,%s,%s,%s)
-        RETURNING survey_id;
-    """
-
     with conn.cursor() as cur:
-        cur.execute(
-            query,
+        jalankan_statement(
+            cur,
+            "add_survey_data",
             (
                 id_user_surveyor,
                 id_lahan,
@@ -872,66 +2778,209 @@ def add_survey_data(
         return row[0] if row else None
 
 
-def claim_lahan_for_surveyor(
-    conn: connection,
-    lahan_id: int,
-    surveyor_id: int,
-) -> bool:
+# Rentang nilai survey yang diterima (sama untuk menu, layanan dan import)
+RENTANG_SURVEY = {
+    "ketinggian": ("Ketinggian", 0, 3000),
+    "ph": ("pH", 0, 14),
+    "nutrisi": ("Nutrisi", 0, 100),
+    "kelembapan": ("Kelembapan", 0, 100),
+}
+
+
+def cek_rentang_survey(kolom: str, nilai: float) -> Optional[str]:
+    """
+    Cek nilai survey masuk rentang RENTANG_SURVEY.
+    :return: pesan error atau None kalau valid
+    """
+    label, minimal, maksimal = RENTANG_SURVEY[kolom]
+    # NaN lolos dari perbandingan di bawah, inf tidak bermakna sebagai ukuran
+    if not math.isfinite(nilai):
+        return f"{label} harus angka yang valid."
+    if nilai > maksimal:
+        return f"{label} tidak boleh lebih dari {maksimal}."
+    if nilai < minimal:
+        return f"{label} tidak boleh kurang dari {minimal}."
+    return None
+
+
+def add_kondisi_tanah(
+    conn,
+    kondisi_tanah: str,
+    ph: float,
+    kandungan_nutrisi: float,
+    kelembapan: float,
+) -> Optional[int]:
     """
-    Coba klaim lahan untuk surveyor
+    Tambah kondisi tanah hasil survey.
+    Belum di-commit, ikut tersimpan saat add_survey_data commit.
     """
     with conn.cursor() as cur:
         cur.execute(
             """
-            SELECT id_user_surveyor
-            FROM lahan
-            WHERE lahan_id = %s
+            INSERT INTO kondisi_tanah (kondisi_tanah, ph, kandungan_nutrisi, kelembapan)
+            VALUES (%s, %s, %s, %s)
+            RETURNING kondisi_tanah_id
             """,
-            (lahan_id,),
+            (kondisi_tanah, ph, kandungan_nutrisi, kelembapan),
         )
-        
         row = cur.fetchone()
-        if row is None:
-            conn.rollback()
-            return False
-        
-        current_surveyor_id = row[0]
+        return row[0] if row else None
+
+
+def claim_lahan_for_surveyor(
+    conn: connection,
+    lahan_id: int,
+    surveyor_id: int,
+) -> bool:
+    """
+    Coba klaim lahan untuk surveyor dalam satu query.
+    Berhasil kalau lahan belum diklaim atau memang sudah milik surveyor ini.
+    """
+    with conn.cursor() as cur:
+        # UPDATE bersyarat: kalau dua surveyor balapan, yang kedua menunggu lock
+        # lalu kondisi IS NULL dicek ulang, jadi hanya satu yang menang
+        jalankan_statement(cur, "claim_lahan_for_surveyor", (lahan_id, surveyor_id))
+        berhasil = cur.fetchone()[0]
+    conn.commit()
+    return berhasil
 
-        if current_surveyor_id is None:
+
+def submit_survey(
+    conn: connection,
+    lahan_id: int,
+    surveyor_id: int,
+    id_iklim: int,
+    kondisi_tanah: str,
+    ph: float,
+    nutrisi: float,
+    kelembapan: float,
+    ketinggian: float | None = None,
+    id_tanaman: int | None = None,
+    status_survey: str = "waiting",
+) -> tuple[Optional[int], int]:
+    """
+    Klaim lahan, update ketinggian, simpan kondisi tanah dan survey dalam
+    satu transaksi lewat fungsi submit_survey di database (migrasi 007).
+    Error database (FK, deadlock, lock timeout) diteruskan ke pemanggil
+    setelah rollback; menu memakai submit_survey_menu.
+    :return: (survey_id, jumlah survey lahan); survey_id None kalau lahan milik
+             surveyor lain / tidak ada.
+    """
+    params = (
+        lahan_id, surveyor_id, id_iklim, kondisi_tanah, ph, nutrisi, kelembapan,
+        ketinggian, id_tanaman, status_survey, date.today(),
+    )
+    # Tanpa transaksi terbuka, cukup satu statement autocommit (tanpa BEGIN/COMMIT terpisah)
+    satu_statement = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    try:
+        if satu_statement:
+            conn.autocommit = True
+        with conn.cursor() as cur:
             cur.execute(
-                """
-                UPDATE lahan
-                SET id_user_surveyor = %s
-                WHERE lahan_id = %s
-                """,
-                (surveyor_id, lahan_id),
+                "SELECT id_survey, jumlah FROM submit_survey(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                params,
             )
+            survey_id, jumlah = cur.fetchone()
+        if not satu_statement:
             conn.commit()
-            return True
-        
-        if current_surveyor_id == surveyor_id:
-            return True
+    except psycopg2.Error:
+        if not satu_statement:
+            conn.rollback()
+        raise
+    finally:
+        if satu_statement:
+            conn.autocommit = False
 
-        return False
+    return survey_id, jumlah or 0
+
+
+def submit_survey_menu(conn: connection, *args, **kwargs) -> Optional[tuple[Optional[int], int]]:
+    """
+    submit_survey untuk menu: error database dicetak, hasilnya None.
+    """
+    try:
+        return submit_survey(conn, *args, **kwargs)
+    except psycopg2.Error as e:
+        print(f"Gagal menyimpan survey: {str(e).splitlines()[0]}")
+        return None
+
+
+# Batas pencarian lahan berikutnya, dari lokasi acuan surveyor
+TINGKAT_LOKASI = ("kecamatan", "kota", "provinsi")
+
+
+def claim_lahan_berikutnya(
+    conn: connection,
+    surveyor_id: int,
+    kecamatan_id: int | None = None,
+    batas_tingkat: str | None = None,
+) -> int | None:
+    """
+    Klaim lahan belum diklaim yang paling dekat: kecamatan sama dulu,
+    lalu kota, lalu provinsi, lalu sisanya.
+    Acuan lokasi dari alamat surveyor, atau kecamatan_id kalau diisi.
+    batas_tingkat: "kecamatan"/"kota"/"provinsi" untuk membatasi jarak, None = semua.
+    Lahan yang sedang dikunci surveyor lain dilewati (SKIP LOCKED), jadi tidak saling tunggu.
+    :return: lahan_id yang diklaim, None kalau tidak ada
+    """
+    if batas_tingkat is not None and batas_tingkat not in TINGKAT_LOKASI:
+        print(f"Batas tingkat '{batas_tingkat}' tidak dikenal.")
+        return None
+    tingkat_maks = TINGKAT_LOKASI.index(batas_tingkat) if batas_tingkat else len(TINGKAT_LOKASI)
+
+    with conn.cursor() as cur:
+        # Probe per tingkat ada di fungsi database (migrasi 012), satu round trip
+        cur.execute(
+            "SELECT klaim_lahan_berikutnya(%s, %s, %s)",
+            (surveyor_id, kecamatan_id, tingkat_maks),
+        )
+        row = cur.fetchone()
+    conn.commit()
+    return row[0] if row else None
+
+
+# Statistik tanah per lahan, diisi trigger di database (migrasi 006)
+JENDELA_STATISTIK = {
+    "3_survey": "3 survey terakhir",
+    "7_hari": "7 hari",
+    "30_hari": "30 hari",
+}
+KOLOM_STATISTIK = (
+    "jumlah",
+    "ph_avg", "ph_min", "ph_max", "ph_std",
+    "nutrisi_avg", "nutrisi_min", "nutrisi_max", "nutrisi_std",
+    "kelembapan_avg", "kelembapan_min", "kelembapan_max", "kelembapan_std",
+)
+
+
+def ambil_statistik_tanah(conn, lahan_ids: list[int]) -> dict[int, dict[str, dict[str, Any]]]:
+    """
+    Ambil statistik tanah yang sudah dihitung.
+    :return: {lahan_id: {jendela: {kolom: nilai}}}
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT id_lahan, jendela, {", ".join(KOLOM_STATISTIK)}
+            FROM statistik_tanah_lahan
+            WHERE id_lahan = ANY(%s)
+            """,
+            (list(lahan_ids),),
+        )
+        rows = cur.fetchall()
+
+    hasil: dict[int, dict[str, dict[str, Any]]] = {}
+    for lahan_id, jendela, *nilai in rows:
+        hasil.setdefault(lahan_id, {})[jendela] = dict(zip(KOLOM_STATISTIK, nilai))
+    return hasil
 
 
 def hitung_rata_tanah_3_hari_terakhir(conn, lahan_id: int):
     query = """
-        SELECT 
-            AVG(ph)                AS ph_avg,
-            AVG(kandungan_nutrisi) AS nutrisi_avg,
-            AVG(kelembapan)        AS kelembapan_avg
-        FROM (
-            SELECT 
-                kt.ph,
-                kt.kandungan_nutrisi,
-                kt.kelembapan
-            FROM survey_data sd
-            JOIN kondisi_tanah kt ON kt.kondisi_tanah_id = sd.id_tanah
-            WHERE sd.id_lahan = %s
-            ORDER BY sd.tanggal_survey DESC
-            LIMIT 3
-        ) t;
+        SELECT ph_avg, nutrisi_avg, kelembapan_avg
+        FROM statistik_tanah_lahan
+        WHERE id_lahan = %s
+          AND jendela = '3_survey';
     """
     with conn.cursor() as cur:
         cur.execute(query, (lahan_id,))
@@ -948,13 +2997,10 @@ def hitung_rata_tanah_3_hari_terakhir(conn, lahan_id: int):
     }
 
 
-def lihat_hasil_survey_petani(conn, user: dict[str, Any]) -> list[tuple[Any, ...]]:
+def ambil_hasil_survey_petani(conn, user_id: int) -> list[tuple[Any, ...]]:
     """
-    Tampilkan hasil analisis (survey) untuk semua lahan milik petani yang login.
-    Fokus ke data yang DISURVEY oleh surveyor (tabel survey_data).
+    Ambil hasil survey lahan milik petani (tanpa print)
     """
-    user_id = user["id"]
-
     query = """
         SELECT
             l.lahan_id,
@@ -1005,12 +3051,40 @@ def lihat_hasil_survey_petani(conn, user: dict[str, Any]) -> list[tuple[Any, ...
 
     with conn.cursor() as cur:
         cur.execute(query, (user_id,))
-        rows = cur.fetchall()
+        return cur.fetchall()
+
+
+def cetak_statistik_tanah(statistik: dict[str, dict[str, Any]]) -> None:
+    """
+    Cetak statistik tanah satu lahan: rata-rata (min-max) per jendela
+    """
+    if not statistik:
+        return
+    print("  Statistik tanah (rata-rata, min-max):")
+    for jendela, label in JENDELA_STATISTIK.items():
+        s = statistik.get(jendela)
+        if not s:
+            continue
+        bagian = [
+            f"{nama} {s[kolom + '_avg']:.1f} ({s[kolom + '_min']:.1f}-{s[kolom + '_max']:.1f})"
+            for nama, kolom in (("pH", "ph"), ("Nutrisi", "nutrisi"), ("Kelembapan", "kelembapan"))
+        ]
+        print(f"    {label:<18} n={s['jumlah']:<3} " + " | ".join(bagian))
+
+
+def lihat_hasil_survey_petani(conn, user: dict[str, Any]) -> list[tuple[Any, ...]]:
+    """
+    Tampilkan hasil analisis (survey) untuk semua lahan milik petani yang login.
+    Fokus ke data yang DISURVEY oleh surveyor (tabel survey_data).
+    """
+    rows = ambil_hasil_survey_petani(conn, user["id"])
 
     if not rows:
         print("\nBelum ada hasil survey untuk lahan kamu.")
         return rows
 
+    statistik = ambil_statistik_tanah(conn, list({row[0] for row in rows}))
+
     print("\n=== HASIL SURVEY SELAMA 3 HARI TERAKHIR LAHAN SAYA ===")
     current_lahan = None
     for row in rows:
@@ -1047,6 +3121,7 @@ def lihat_hasil_survey_petani(conn, user: dict[str, Any]) -> list[tuple[Any, ...
                 f"  Alamat   : {nama_jalan}, {nama_kecamatan}, "
                 f"{nama_kota}, {nama_provinsi}"
             )
+            cetak_statistik_tanah(statistik.get(lahan_id, {}))
             print("  Survey:")
 
         if nama_tanaman_master:
@@ -1139,131 +3214,84 @@ def menu_admin(conn, user):
     """
 
     while True:
-        clear_terminal()
-        header()
-        print(f"\n=== MENU ADMIN (Login sebagai: {user['username']}) ===")
-        print("1. Hapus user")
-        print("2. Lihat user")
-        print("3. Lihat data lahan")
-        print("4. Hapus lahan")
-        print("5. Input tanaman")
-        print("6. Hapus tanaman")
-        print("0. Logout")
+        tampilkan_layar(
+            f"\n=== MENU ADMIN (Login sebagai: {user['username']}) ===",
+            "1. Hapus user",
+            "2. Lihat user",
+            "3. Lihat data lahan",
+            "4. Hapus lahan",
+            "5. Input tanaman",
+            "6. Hapus tanaman",
+            "7. Dashboard wilayah",
+            "0. Logout",
+        )
 
         pilihan = input("Pilih menu: ").strip()
 
         if pilihan == "1":
             print("\n=== Hapus user ===")
-            username = input("Username: ")
-            role = str(input("Role: ")).strip().lower()
+            user_id = cari_interaktif(
+                "user", lambda kata, batas, offset: cari_user(conn, kata, batas=batas, offset=offset),
+                cetak_hasil_user,
+            )
+            data_user = get_user_by_id(conn, user_id) if user_id is not None else None
+            if data_user is None:
+                clear_terminal()
+                continue
 
-            try:
-                user_id = delete_user(conn, username, role)
-                if user_id is None:
-                    print(f"User '{username}' dengan role '{role}' tidak ditemukan atau tidak dihapus.")
-                else:
-                    print(f"User dengan ID {user_id} dari {role} berhasil dihapus")
-            except Exception as error:
-                print(f"Ada error: {error}")
+            username = data_user["username"]
+            yakin = input(f"Yakin hapus user '{username}' (ID {user_id})? (y/n): ").strip().lower()
+            if yakin == "y":
+                try:
+                    if delete_user(conn, username) is None:
+                        print(f"User '{username}' tidak ditemukan atau tidak dihapus.")
+                    else:
+                        print(f"User dengan ID {user_id} berhasil dihapus")
+                except Exception as error:
+                    print(f"Ada error: {error}")
+            else:
+                print("Batal.")
             enter_break()
 
         elif pilihan == "2":
-            all_users = read_all_users(conn)
-            print("\n=== Daftar user ===")
-            petani_list = all_users.get("petani", [])
-            surveyor_list = all_users.get("surveyor", [])
-
-            print(f"\nPetani ({len(petani_list)}):")
-            if not petani_list:
-                print("  (belum ada petani)")
-            else:
-                for user_id, name, username in petani_list:
-                    print(f"  - ID: {user_id} | Nama: {name} | Username: {username}")
-
-            print(f"\nSurveyor ({len(surveyor_list)}):")
-            if not surveyor_list:
-                print("  (belum ada surveyor)")
-            else:
-                for user_id, name, username in surveyor_list:
-                    print(f"  - ID: {user_id} | Nama: {name} | Username: {username}")
-
-            enter_break()
+            print("\n=== Cari user ===")
+            print("Filter role: 1. Semua  2. Petani  3. Surveyor  4. Admin")
+            role = {"2": "petani", "3": "surveyor", "4": "admin"}.get(input("Pilih (1-4): ").strip())
+            user_id = cari_interaktif(
+                "user", lambda kata, batas, offset: cari_user(conn, kata, role, batas, offset),
+                cetak_hasil_user,
+            )
+            data_user = get_user_by_id(conn, user_id) if user_id is not None else None
+            if data_user is not None:
+                print(f"\n=== Detail user {user_id} ===")
+                for kunci, nilai in data_user.items():
+                    print(f"  {kunci}: {display(nilai)}")
+                enter_break()
 
         elif pilihan == "3":
-            data = lihat_data_lahan(conn)
-            petani_list = data.get("petani", [])
-            data_lahan = data.get("lahan", [])
-            data_survey = data.get("survey_data", [])
-
-            print("\n=== Data Petani ===")
-            for user_id, name, username, email, no_telp in petani_list:
-                print(
-                    f"  - ID: {user_id} | Nama: {name} | Username: {username} | "
-                    f"Email: {display(email)} | No Telp: {display(no_telp)}"
-                )
-
-            print("\n=== Data Lahan ===")
-            for (
-                    lahan_id,
-                    ketinggian,
-                    petani_id,
-                    nama_petani,
-                    surveyor_id,
-                    nama_surveyor,
-                    alamat_id,
-                    nama_jalan,
-                    nama_kecamatan,
-                    nama_kota,
-                    nama_provinsi,
-            ) in data_lahan:
-                print(
-                    f"- Lahan {lahan_id} | Petani: {display(nama_petani)} (ID {display(petani_id)}) | "
-                    f"Surveyor: {display(nama_surveyor)} (ID {display(surveyor_id)}) | "
-                    f"Ketinggian: {ketinggian} | Alamat: {nama_jalan}, "
-                    f"{nama_kecamatan}, {nama_kota}, {nama_provinsi}"
-                )
-
-            print("\n=== Data Survey ===")
-            for (
-                    survey_id,
-                    id_lahan,
-                    id_user_surveyor,
-                    nama_surveyor,
-                    status_survey,
-                    tanggal_survey,
-                    id_iklim,
-                    jenis_cuaca,
-                    id_tanah,
-                    kondisi_tanah,
-                    ph,
-                    kandungan_nutrisi,
-                    kelembapan,
-                    id_tanaman,
-                    nama_tanaman,
-                    petani_id,
-                    nama_petani,
-            ) in data_survey:
-                print(f"- Survey {survey_id} | Lahan {id_lahan} | Petani: {nama_petani} (ID {petani_id})")
-                print(
-                    f"  Surveyor : {display(nama_surveyor)} (ID {display(id_user_surveyor)})"
-                )
-                print(
-                    f"  Status   : {status_survey} | Tanggal: {tanggal_survey}"
-                )
-                print(
-                    f"  Iklim    : {jenis_cuaca} | Tanah: {kondisi_tanah} "
-                    f"(pH={ph}, Nutrisi={kandungan_nutrisi}, Kelembapan={kelembapan})"
-                )
-                if id_tanaman:
-                    print(f"  Tanaman  : {nama_tanaman} (ID {id_tanaman})")
-                else:
-                    print("  Tanaman  : -")
-            enter_break()
+            print("\n=== Lihat data lahan ===")
+            print("1. Data petani")
+            print("2. Data lahan")
+            print("3. Data survey")
+            jenis = {"1": "petani", "2": "lahan", "3": "survey_data"}.get(
+                input("Pilih data: ").strip()
+            )
+            if jenis is None:
+                print("Pilihan tidak valid.")
+                enter_break()
+            else:
+                tampilkan_halaman_data_lahan(conn, jenis)
 
         elif pilihan == "4":
             print("\n=== Hapus Lahan ===")
             try:
-                lahan_id = int(input("Masukkan ID Lahan yang akan dihapus: "))
+                lahan_id = cari_interaktif(
+                    "lahan", lambda kata, batas, offset: cari_lahan(conn, kata, batas, offset),
+                    simpel_lahan_print,
+                )
+                if lahan_id is None:
+                    clear_terminal()
+                    continue
                 yakin = input(f"Yakin hapus lahan {lahan_id}? (y/n): ").lower()
                 if yakin == 'y':
                     if delete_lahan(conn, lahan_id):
@@ -1354,6 +3382,9 @@ def menu_admin(conn, user):
                 print("ID harus angka.")
             enter_break()
 
+        elif pilihan == "7":
+            tampilkan_dashboard(conn)
+
         elif pilihan == "0":
             print("Logout dari admin.")
             break
@@ -1369,14 +3400,14 @@ def menu_petani(conn, user):
     petani_id = user["id"]
 
     while True:
-        clear_terminal()
-        header()
-        print(f"\n=== MENU PETANI (Login sebagai: {user['username']}) ===")
-        print("1. Input lahan milik saya")
-        print("2. Lihat lahan saya")
-        print("3. Lihat hasil analisis di lahan saya")
-        print("4. Update profile saya")
-        print("0. Logout")
+        tampilkan_layar(
+            f"\n=== MENU PETANI (Login sebagai: {user['username']}) ===",
+            "1. Input lahan milik saya",
+            "2. Lihat lahan saya",
+            "3. Lihat hasil analisis di lahan saya",
+            "4. Update profile saya",
+            "0. Logout",
+        )
 
         pilihan = input("Pilih menu: ").strip()
 
@@ -1443,11 +3474,375 @@ def update_lahan_ketinggian(conn, lahan_id: int, ketinggian: float) -> bool:
 
 def get_iklim_by_id(conn, id_iklim):
     with conn.cursor() as cur:
-        cur.execute("SELECT * FROM iklim WHERE iklim_id = %s", (id_iklim,))
+        jalankan_statement(cur, "get_iklim_by_id", (id_iklim,))
         result = cur.fetchone()
     return result
 
 
+# Pencocokan tanaman
+
+# Toleransi tiap kriteria (ketinggian, pH, nutrisi, kelembapan)
+TOLERANSI_TANAMAN = (
+    200.0,  # mdpl
+    1.0,    # pH
+    20.0,   # persen/indeks
+    15.0,   # persen
+)
+
+# Bobot skor tiap kriteria, urutannya sama dengan TOLERANSI_TANAMAN
+BOBOT_TANAMAN = (2.0, 2.0, 1.0, 1.0)
+BOBOT_IKLIM = 3.0
+SKOR_MINIMAL_REKOMENDASI = 5.0
+
+QUERY_KATALOG_TANAMAN = """
+    SELECT
+        tanaman_id,
+        nama,
+        ketinggian,
+        ph,
+        kandungan_nutrisi,
+        kelembapan,
+        iklim_id
+    FROM tanaman
+"""
+
+
+class KatalogTanaman:
+    """
+    Katalog tanaman dalam bentuk array numpy.
+    Satu survey atau banyak survey sekaligus dicocokkan ke seluruh katalog
+    dalam satu kali hitung, tanpa loop per tanaman.
+    """
+
+    def __init__(self, rows: list[tuple[Any, ...]]):
+        rows = list(rows)
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.nama = [r[1] for r in rows]
+        # kolom: ketinggian, ph, nutrisi, kelembapan, iklim (None -> NaN)
+        self.fitur = np.array(
+            [[np.nan if v is None else float(v) for v in r[2:7]] for r in rows],
+            dtype=np.float64,
+        ).reshape(len(rows), 5)
+        # Tanaman yang datanya tidak lengkap selalu masuk kategori lain dengan skor 0
+        self.lengkap = ~np.isnan(self.fitur).any(axis=1)
+
+    @classmethod
+    def _dari_array(cls, ids: Any, nama: list[str], fitur: Any) -> "KatalogTanaman":
+        katalog = cls.__new__(cls)
+        katalog.ids = ids
+        katalog.nama = nama
+        katalog.fitur = fitur
+        katalog.lengkap = ~np.isnan(fitur).any(axis=1)
+        return katalog
+
+    def __len__(self) -> int:
+        return len(self.nama)
+
+    def indeks(self) -> "IndeksTanaman":
+        """
+        Indeks tetangga terdekat, dibangun saat pertama dipakai.
+        Katalog tidak pernah diubah (tambah/hapus membuat katalog baru),
+        jadi indeks ikut dibangun ulang otomatis setelah katalog berubah.
+        """
+        indeks = self.__dict__.get("_indeks")
+        if indeks is None:
+            indeks = self._indeks = IndeksTanaman(self)
+        return indeks
+
+    def dengan_tanaman(self, row: tuple[Any, ...]) -> "KatalogTanaman":
+        """
+        Katalog baru dengan satu tanaman tambahan (format row sama dengan QUERY_KATALOG_TANAMAN)
+        """
+        tambahan = KatalogTanaman([row])
+        return KatalogTanaman._dari_array(
+            np.concatenate([self.ids, tambahan.ids]),
+            self.nama + tambahan.nama,
+            np.concatenate([self.fitur, tambahan.fitur]),
+        )
+
+    def tanpa_tanaman(self, tanaman_id: int) -> "KatalogTanaman":
+        """
+        Katalog baru tanpa tanaman dengan tanaman_id tsb
+        """
+        sisa = self.ids != tanaman_id
+        return KatalogTanaman._dari_array(
+            self.ids[sisa],
+            [n for n, s in zip(self.nama, sisa.tolist()) if s],
+            self.fitur[sisa],
+        )
+
+    def skor(self, survey: Any) -> Any:
+        """
+        Hitung skor semua tanaman untuk tiap survey.
+        :param survey: array (m, 5) berisi ketinggian, ph, nutrisi, kelembapan, iklim_id
+        :return: (skor (m, n), cocok_iklim (m, n))
+        """
+        survey = np.asarray(survey, dtype=np.float64).reshape(-1, 5)
+        selisih = np.abs(survey[:, None, :4] - self.fitur[None, :, :4])
+        cocok = selisih <= np.asarray(TOLERANSI_TANAMAN)
+        cocok_iklim = survey[:, None, 4] == self.fitur[None, :, 4]
+
+        skor = cocok @ np.asarray(BOBOT_TANAMAN) + cocok_iklim * BOBOT_IKLIM
+        skor = np.where(self.lengkap, skor, 0.0)
+        cocok_iklim &= self.lengkap
+        return skor, cocok_iklim
+
+    def _pisahkan(self, skor: Any, cocok_iklim: Any) -> tuple[list[tuple], list[tuple]]:
+        # Urutan sama dengan sort(reverse=True) atas (skor, tanaman_id, nama)
+        urutan = np.lexsort((self.ids, skor))[::-1]
+        direkomendasikan = (cocok_iklim & (skor >= SKOR_MINIMAL_REKOMENDASI))[urutan]
+
+        recommended = []
+        others = []
+        for idx, rekom in zip(urutan.tolist(), direkomendasikan.tolist()):
+            item = (int(self.ids[idx]), self.nama[idx])
+            if rekom:
+                recommended.append(item)
+            else:
+                others.append(item)
+        return recommended, others
+
+    def cocokkan(
+        self,
+        ketinggian: float,
+        ph: float,
+        nutrisi: float,
+        kelembapan: float,
+        iklim_id: int,
+    ) -> tuple[list[tuple], list[tuple]]:
+        """
+        Cocokkan satu survey, hasilnya (recommended, others)
+        """
+        return self.cocokkan_batch([(ketinggian, ph, nutrisi, kelembapan, iklim_id)])[0]
+
+    def cocokkan_batch(
+        self,
+        surveys: Any,
+        ukuran_blok: int = 1024,
+    ) -> list[tuple[list[tuple], list[tuple]]]:
+        """
+        Cocokkan banyak survey sekaligus.
+        Dihitung per blok supaya matriks (survey x tanaman) tidak terlalu besar.
+        """
+        surveys = np.asarray(surveys, dtype=np.float64).reshape(-1, 5)
+        hasil = []
+        for mulai in range(0, len(surveys), ukuran_blok):
+            skor, cocok_iklim = self.skor(surveys[mulai:mulai + ukuran_blok])
+            for i in range(len(skor)):
+                hasil.append(self._pisahkan(skor[i], cocok_iklim[i]))
+        return hasil
+
+
+class _PohonKD:
+    """
+    KD-tree sederhana di atas array numpy. Titik di satu daun disimpan
+    berurutan, jadi jarak satu daun dihitung sekaligus dengan numpy.
+    Titik disimpan dalam satuan asli, jarak dihitung setelah dibagi skala.
+    """
+
+    def __init__(self, titik: Any, indeks: Any, skala: Any, ukuran_daun: int = 32):
+        self.ukuran_daun = ukuran_daun
+        self.skala = skala
+        self._urutan = np.arange(len(titik))
+        self._titik = titik
+        self.kiri: list[int] = []
+        self.kanan: list[int] = []
+        self.awal: list[int] = []
+        self.akhir: list[int] = []
+        bawah: list[Any] = []
+        atas: list[Any] = []
+        if len(titik):
+            self._buat(0, len(titik), bawah, atas)
+        self.bawah = np.array(bawah).reshape(-1, titik.shape[1])
+        self.atas = np.array(atas).reshape(-1, titik.shape[1])
+        self.titik = titik[self._urutan]
+        self.indeks = indeks[self._urutan]
+        del self._urutan, self._titik
+
+    def _buat(self, awal: int, akhir: int, bawah: list, atas: list) -> int:
+        node = len(self.awal)
+        self.kiri.append(-1)
+        self.kanan.append(-1)
+        self.awal.append(awal)
+        self.akhir.append(akhir)
+
+        anggota = self._urutan[awal:akhir]
+        titik = self._titik[anggota]
+        bawah.append(titik.min(axis=0))
+        atas.append(titik.max(axis=0))
+
+        if akhir - awal > self.ukuran_daun:
+            # Belah di median dimensi yang paling lebar (dalam satuan skala)
+            dim = int(np.argmax((atas[node] - bawah[node]) / self.skala))
+            tengah = (awal + akhir) // 2
+            urut = np.argpartition(titik[:, dim], tengah - awal)
+            self._urutan[awal:akhir] = anggota[urut]
+            self.kiri[node] = self._buat(awal, tengah, bawah, atas)
+            self.kanan[node] = self._buat(tengah, akhir, bawah, atas)
+        return node
+
+    def terdekat(self, q: Any, k: int, radius: Any | None, kunci: Any) -> list[tuple[float, int]]:
+        """
+        k titik terdekat (jarak euclid setelah dibagi skala) dari q, urut (jarak, kunci).
+        radius: kalau diisi (satuan asli per dimensi), hanya titik dengan |titik - q| <= radius
+        di semua dimensi. Selisih dihitung persis seperti KatalogTanaman.skor supaya
+        batas toleransi (sering pas untuk nilai katalog bulat) tidak beda karena pembulatan.
+        :return: list (jarak^2, posisi di array asal)
+        """
+        if not self.awal or k <= 0:
+            return []
+
+        antrian = [(0.0, 0)]
+        terbaik: list[tuple[float, int, int]] = []  # max-heap (-jarak^2, -kunci, posisi)
+        while antrian:
+            jarak_kotak, node = heapq.heappop(antrian)
+            if len(terbaik) == k and jarak_kotak > -terbaik[0][0]:
+                break
+
+            if self.kiri[node] < 0:
+                awal, akhir = self.awal[node], self.akhir[node]
+                selisih = self.titik[awal:akhir] - q
+                terskala = selisih / self.skala
+                jarak = np.einsum("ij,ij->i", terskala, terskala)
+                posisi = self.indeks[awal:akhir]
+                if radius is not None:
+                    dalam = (np.abs(selisih) <= radius).all(axis=1)
+                    jarak, posisi = jarak[dalam], posisi[dalam]
+                for j, p in zip(jarak.tolist(), posisi.tolist()):
+                    item = (-j, -int(kunci[p]), p)
+                    if len(terbaik) < k:
+                        heapq.heappush(terbaik, item)
+                    elif item > terbaik[0]:
+                        heapq.heapreplace(terbaik, item)
+                continue
+
+            for anak in (self.kiri[node], self.kanan[node]):
+                bawah, atas = self.bawah[anak], self.atas[anak]
+                # Titik p di kotak: p - q >= bawah - q dan q - p >= q - atas, jadi kalau
+                # salah satunya > radius, |p - q| juga > radius (pembulatan monoton)
+                if radius is not None and ((bawah - q > radius) | (q - atas > radius)).any():
+                    continue
+                d = (np.clip(q, bawah, atas) - q) / self.skala
+                heapq.heappush(antrian, (float(d @ d), anak))
+
+        return [(-j, p) for j, _, p in sorted(terbaik, reverse=True)]
+
+
+class IndeksTanaman:
+    """
+    Indeks tetangga terdekat atas katalog: satu KD-tree per iklim, jarak fitur
+    (ketinggian, pH, nutrisi, kelembapan) dibagi TOLERANSI_TANAMAN sehingga
+    1 satuan = 1 toleransi. "Dalam toleransi" = semua |selisih| <= TOLERANSI_TANAMAN,
+    sama dengan KatalogTanaman.skor.
+    """
+
+    def __init__(self, katalog: "KatalogTanaman"):
+        self.katalog = katalog
+        self.skala = np.asarray(TOLERANSI_TANAMAN)
+        self._pohon: dict[float, _PohonKD] = {}
+
+        lengkap = np.flatnonzero(katalog.lengkap)
+        iklim = katalog.fitur[lengkap, 4]
+        for nilai in np.unique(iklim).tolist():
+            anggota = lengkap[iklim == nilai]
+            self._pohon[nilai] = _PohonKD(katalog.fitur[anggota, :4], anggota, self.skala)
+
+    def terdekat(
+        self,
+        ketinggian: float,
+        ph: float,
+        nutrisi: float,
+        kelembapan: float,
+        iklim_id: int,
+        k: int = 5,
+        dalam_toleransi: bool = True,
+    ) -> list[tuple[int, str, float]]:
+        """
+        k tanaman dengan iklim sama yang paling dekat ke kondisi survey.
+        :return: list (tanaman_id, nama, jarak dalam satuan toleransi)
+        """
+        pohon = self._pohon.get(float(iklim_id))
+        if pohon is None:
+            return []
+        q = np.array([ketinggian, ph, nutrisi, kelembapan], dtype=np.float64)
+        hasil = pohon.terdekat(q, k, self.skala if dalam_toleransi else None, self.katalog.ids)
+        return [
+            (int(self.katalog.ids[p]), self.katalog.nama[p], float(np.sqrt(j)))
+            for j, p in hasil
+        ]
+
+
+class CacheKatalogTanaman:
+    """
+    Cache katalog tanaman di dalam proses.
+    Katalog dimuat sekali dari database, lalu ditambal oleh add_tanaman /
+    delete_tanaman setelah commit. Setiap perubahan menaikkan versi.
+    Perubahan dari proses lain tidak terlihat, panggil invalidasi() kalau perlu.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._katalog: KatalogTanaman | None = None
+        self.versi = 0
+        self.hit = 0
+        self.miss = 0
+
+    def ambil(self, conn) -> KatalogTanaman:
+        with self._lock:
+            if self._katalog is not None:
+                self.hit += 1
+                return self._katalog
+            self.miss += 1
+            versi_awal = self.versi
+
+        with conn.cursor() as cur:
+            cur.execute(QUERY_KATALOG_TANAMAN)
+            katalog = KatalogTanaman(cur.fetchall())
+
+        with self._lock:
+            # Jangan simpan kalau katalog berubah selama dimuat
+            if self._katalog is None and self.versi == versi_awal:
+                self._katalog = katalog
+            return katalog
+
+    def invalidasi(self) -> None:
+        with self._lock:
+            self._katalog = None
+            self.versi += 1
+
+    def tambah(self, row: tuple[Any, ...]) -> None:
+        with self._lock:
+            if self._katalog is not None:
+                self._katalog = self._katalog.dengan_tanaman(row)
+            self.versi += 1
+
+    def hapus(self, tanaman_id: int) -> None:
+        with self._lock:
+            if self._katalog is not None:
+                self._katalog = self._katalog.tanpa_tanaman(tanaman_id)
+            self.versi += 1
+
+    def statistik(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "versi": self.versi,
+                "dimuat": self._katalog is not None,
+                "jumlah_tanaman": len(self._katalog) if self._katalog is not None else 0,
+                "hit": self.hit,
+                "miss": self.miss,
+            }
+
+
+CACHE_TANAMAN = CacheKatalogTanaman()
+
+
+def ambil_katalog_tanaman(conn) -> KatalogTanaman:
+    """
+    Ambil katalog tanaman (dari cache kalau sudah dimuat)
+    """
+    return CACHE_TANAMAN.ambil(conn)
+
+
 def cocokin_tanaman(
     conn,
     ketinggian: float,
@@ -1459,64 +3854,182 @@ def cocokin_tanaman(
     """
     Cari tanaman yang cocok berdasarkan kriterianya
     """
-    # Ambil semua tanaman
+    katalog = ambil_katalog_tanaman(conn)
+    return katalog.cocokkan(ketinggian, ph, nutrisi, kelembapan, iklim_id)
+
+
+def cari_tanaman_terdekat(
+    conn,
+    ketinggian: float,
+    ph: float,
+    nutrisi: float,
+    kelembapan: float,
+    iklim_id: int,
+    k: int = 5,
+    dalam_toleransi: bool = True,
+) -> list[tuple[int, str, float]]:
+    """
+    Top-k tanaman paling mirip kondisi survey lewat indeks KD-tree,
+    tanpa menilai seluruh katalog
+    """
+    katalog = ambil_katalog_tanaman(conn)
+    return katalog.indeks().terdekat(ketinggian, ph, nutrisi, kelembapan, iklim_id, k, dalam_toleransi)
+
+
+def _terdekat_brute(katalog: KatalogTanaman, q: Any, k: int, dalam_toleransi: bool) -> list[int]:
+    """Pembanding IndeksTanaman.terdekat: nilai seluruh katalog, kriteria toleransi sama dengan skor()"""
+    skala = np.asarray(TOLERANSI_TANAMAN)
+    selisih = katalog.fitur[:, :4] - q[:4]
+    pilih = katalog.lengkap & (katalog.fitur[:, 4] == q[4])
+    if dalam_toleransi:
+        pilih &= (np.abs(selisih) <= skala).all(axis=1)
+    terskala = selisih[pilih] / skala
+    jarak = np.einsum("ij,ij->i", terskala, terskala)
+    ids = katalog.ids[pilih]
+    return ids[np.lexsort((ids, jarak))][:k].tolist()
+
+
+def _cek_indeks_tanaman(jumlah: int, jumlah_query: int, k: int, seed: int) -> bool:
+    """
+    Bandingkan IndeksTanaman.terdekat dengan hitung seluruh katalog, pada katalog
+    sintetis bernilai bulat dan query yang selisihnya pas di batas toleransi.
+    """
+    acak = np.random.default_rng(seed)
+    rows = [
+        # Kasus batas yang pernah lolos dari brute force tapi terpangkas di KD-tree
+        (1, "batas kelembapan", 72.0, 4.0, 83.0, 25.0, 2),
+    ]
+    for i in range(2, jumlah + 1):
+        rows.append((
+            i,
+            f"Tanaman {i}",
+            float(acak.integers(0, 60) * 50),
+            float(acak.integers(40, 81)) / 10,
+            float(acak.integers(40, 101)),
+            float(acak.integers(20, 101)),
+            int(acak.integers(1, 3)),
+        ))
+    katalog = KatalogTanaman(rows)
+    indeks = katalog.indeks()
+    skala = np.asarray(TOLERANSI_TANAMAN)
+
+    queries = [np.array([82.0, 4.7, 94.0, 10.0, 2.0])]
+    for _ in range(jumlah_query):
+        dasar = katalog.fitur[acak.integers(0, len(katalog))].copy()
+        # Tiap dimensi: geser pas sejauh toleransi (ke atas/bawah) atau acak di dalamnya
+        arah = acak.integers(-1, 2, size=4)
+        geser = np.where(
+            acak.random(4) < 0.5, arah * skala, acak.uniform(-1.5, 1.5, size=4) * skala
+        )
+        dasar[:4] += geser
+        queries.append(dasar)
+
+    beda = 0
+    for q in queries:
+        for dalam_toleransi in (True, False):
+            dari_indeks = [
+                t_id for t_id, _, _ in indeks.terdekat(*q[:4], int(q[4]), k, dalam_toleransi)
+            ]
+            if dari_indeks != _terdekat_brute(katalog, q, k, dalam_toleransi):
+                beda += 1
+                if beda <= 5:
+                    print(f"Beda hasil untuk query {q.tolist()} (dalam_toleransi={dalam_toleransi})")
+
+    total = len(queries) * 2
+    print(f"{total - beda} dari {total} query top-{k} sama dengan hitung seluruh katalog ({len(katalog)} tanaman).")
+    return beda == 0
+
+
+# Rekomendasi batch
+
+# Rata-rata 3 survey terakhir dan iklim survey terakhir, dari statistik_tanah_lahan
+QUERY_RATA_TANAH_SEMUA_LAHAN = """
+    SELECT
+        l.lahan_id,
+        l.ketinggian,
+        st.ph_avg,
+        st.nutrisi_avg,
+        st.kelembapan_avg,
+        st.id_iklim_terakhir AS id_iklim
+    FROM statistik_tanah_lahan st
+    JOIN lahan l ON l.lahan_id = st.id_lahan
+    WHERE st.jendela = '3_survey'
+      AND l.ketinggian IS NOT NULL
+      {filter}
+      AND st.jumlah >= %s
+    ORDER BY l.lahan_id;
+"""
+
+
+def hitung_rekomendasi(
+    conn,
+    lahan_ids: list[int] | None = None,
+    min_survey: int = 3,
+) -> list[tuple[tuple[Any, ...], list[tuple], list[tuple]]]:
+    """
+    Hitung rekomendasi tanaman tanpa menyimpan, dari rata-rata tanah
+    3 survey terakhir dan iklim survey terakhir tiap lahan.
+    :return: list (baris rata-rata lahan, recommended, others)
+    """
+    if lahan_ids is None:
+        query = QUERY_RATA_TANAH_SEMUA_LAHAN.format(filter="")
+        params: tuple[Any, ...] = (min_survey,)
+    else:
+        query = QUERY_RATA_TANAH_SEMUA_LAHAN.format(filter="AND st.id_lahan = ANY(%s)")
+        params = (list(lahan_ids), min_survey)
+
     with conn.cursor() as cur:
-        cur.execute("""
-            SELECT 
-                tanaman_id, 
-                nama, 
-                ketinggian, 
-                ph, 
-                kandungan_nutrisi, 
-                kelembapan, 
-                iklim_id
-            FROM tanaman
-        """)
-        all_plants = cur.fetchall()
+        cur.execute(query, params)
+        rows = cur.fetchall()
 
-    recommended_scored: list[tuple[float, int, str]] = []
-    others_scored: list[tuple[float, int, str]] = []
+    # Lahan yang survey terakhirnya tanpa iklim tidak bisa direkomendasikan
+    rows = [r for r in rows if r[5] is not None]
 
-    for p in all_plants:
-        t_id, t_nama, t_h, t_ph, t_nut, t_hum, t_iklim = p
+    katalog = ambil_katalog_tanaman(conn)
+    hasil = katalog.cocokkan_batch([(r[1], r[2], r[3], r[4], r[5]) for r in rows])
+    return [(row, recommended, others) for row, (recommended, others) in zip(rows, hasil)]
 
-        # Kalau ada nilai yang kosong, masuk kategori lain
-        if any(v is None for v in (t_h, t_ph, t_nut, t_hum, t_iklim)):
-            others_scored.append((0.0, t_id, t_nama))
-            continue
 
-        # Toleransi
-        match_h   = abs(ketinggian - t_h) <= 200       # mdpl
-        match_ph  = abs(ph - t_ph) <= 1.0              # pH
-        match_nut = abs(nutrisi - t_nut) <= 20         # persen/indeks
-        match_hum = abs(kelembapan - t_hum) <= 15      # persen
-        match_ik  = (iklim_id == t_iklim)
-
-        # Scoring tiap kolom
-        score = 0.0
-        if match_ik:
-            score += 3.0
-        if match_h:
-            score += 2.0
-        if match_ph:
-            score += 2.0
-        if match_nut:
-            score += 1.0
-        if match_hum:
-            score += 1.0
-
-        if match_ik and score >= 5.0:
-            recommended_scored.append((score, t_id, t_nama))
-        else:
-            others_scored.append((score, t_id, t_nama))
+def hitung_rekomendasi_batch(
+    conn,
+    lahan_ids: list[int] | None = None,
+    min_survey: int = 3,
+) -> dict[str, int]:
+    """
+    Hitung ulang rekomendasi tanaman untuk semua lahan (atau lahan_ids saja).
+    Hasil lama diganti dengan yang baru di tabel rekomendasi_lahan dalam satu transaksi.
+    """
+    hasil = hitung_rekomendasi(conn, lahan_ids, min_survey)
 
-    recommended_scored.sort(reverse=True)
-    others_scored.sort(reverse=True)
+    baris_baru = []
+    for (lahan_id, _, ph_avg, nutrisi_avg, kelembapan_avg, id_iklim), recommended, _ in hasil:
+        for peringkat, (tanaman_id, _) in enumerate(recommended, start=1):
+            baris_baru.append(
+                (lahan_id, peringkat, tanaman_id, id_iklim, ph_avg, nutrisi_avg, kelembapan_avg)
+            )
 
-    recommended = [(t_id, t_nama) for score, t_id, t_nama in recommended_scored]
-    others = [(t_id, t_nama) for score, t_id, t_nama in others_scored]
+    with conn.cursor() as cur:
+        if lahan_ids is None:
+            cur.execute("DELETE FROM rekomendasi_lahan")
+        else:
+            cur.execute(
+                "DELETE FROM rekomendasi_lahan WHERE id_lahan = ANY(%s)",
+                (list(lahan_ids),),
+            )
+        execute_values(
+            cur,
+            """
+            INSERT INTO rekomendasi_lahan (
+                id_lahan, peringkat, id_tanaman, id_iklim,
+                ph_avg, nutrisi_avg, kelembapan_avg
+            ) VALUES %s
+            """,
+            baris_baru,
+            page_size=1000,
+        )
+    conn.commit()
 
-    return recommended, others 
+    return {"lahan": len(hasil), "rekomendasi": len(baris_baru)}
 
 
 def menu_surveyor(conn, user):
@@ -1526,29 +4039,43 @@ def menu_surveyor(conn, user):
     surveyor_id = user["id"]
 
     while True:
-        clear_terminal()
-        header()
-        print(f"\n=== MENU SURVEYOR (Login sebagai: {user['username']}) ===")
-        print("1. Survey lahan yang sudah ada")
-        print("2. Update profile saya")
-        print("0. Logout")
+        tampilkan_layar(
+            f"\n=== MENU SURVEYOR (Login sebagai: {user['username']}) ===",
+            "1. Survey lahan yang sudah ada",
+            "2. Update profile saya",
+            "0. Logout",
+        )
 
         pilihan = input("Pilih menu: ").strip()
 
         if pilihan == "1":
-            simpel_lahan_print(lihat_lahan_universal(conn, user))
+            daftar_lahan = lihat_lahan_universal(conn, user)
+            simpel_lahan_print(daftar_lahan)
 
             print("\n=== Input survey data ===")
-            try:
-                lahan_id = int(input("ID lahan yang disurvey: ").strip())
-            except ValueError:
-                print("ID lahan harus angka.")
-                enter_break()
-                clear_terminal()
-                continue
+            inp = input("ID lahan yang disurvey (kosong = ambil lahan terdekat berikutnya): ").strip()
+            if not inp:
+                lahan_id = claim_lahan_berikutnya(conn, surveyor_id)
+                if lahan_id is None:
+                    print("Tidak ada lahan yang belum diambil.")
+                    enter_break()
+                    clear_terminal()
+                    continue
+                print(f"Lahan {lahan_id} diambil untuk anda.")
+            else:
+                try:
+                    lahan_id = int(inp)
+                except ValueError:
+                    print("ID lahan harus angka.")
+                    enter_break()
+                    clear_terminal()
+                    continue
 
-            claim = claim_lahan_for_surveyor(conn, lahan_id, surveyor_id)
-            if not claim:
+            # Cek awal dari daftar yang sudah tampil, klaim sebenarnya saat submit_survey
+            lahan = next((row for row in daftar_lahan if row[0] == lahan_id), None)
+            if lahan is not None and lahan[2] not in (None, surveyor_id):
+                lahan = None
+            if lahan is None and inp:
                 print("Lahan ini sudah diambil surveyor lain atau tidak ada.")
                 enter_break()
                 clear_terminal()
@@ -1562,12 +4089,12 @@ def menu_surveyor(conn, user):
             
             try:
                 real_ketinggian = int(input("Ketinggian Real Lahan (meter): ").strip())
-                if real_ketinggian > 3000:
-                    print("Ketinggian tidak boleh lebih dari 3000.")
+                error = cek_rentang_survey("ketinggian", real_ketinggian)
+                if error:
+                    print(error)
                     enter_break()
                     clear_terminal()
                     continue
-                update_lahan_ketinggian(conn, lahan_id, real_ketinggian)
             except ValueError:
                 print("Ketinggian harus angka.")
                 enter_break()
@@ -1592,70 +4119,59 @@ def menu_surveyor(conn, user):
                 enter_break()
                 clear_terminal()
                 continue
+            nama_iklim = dict(iklim_list).get(id_iklim)
+            if nama_iklim is None:
+                print("ID iklim tidak ada.")
+                enter_break()
+                clear_terminal()
+                continue
 
             kondisi_tanah = str(input("Kondisi tanah (gembur/lumpur/subur): ").strip())
             ph = float(input("pH (misal: 6.0): ").strip())
-            if ph > 14:
-                print("pH tidak boleh lebih dari 14.")
+            error = cek_rentang_survey("ph", ph)
+            if error:
+                print(error)
                 enter_break()
                 clear_terminal()
                 continue
             nutrisi = float(input("Nutrisi (misal: 7.0): ").strip())
-            if nutrisi > 100:
-                print("Nutrisi tidak boleh lebih dari 100.")
+            error = cek_rentang_survey("nutrisi", nutrisi)
+            if error:
+                print(error)
                 enter_break()
                 clear_terminal()
                 continue
             kelembapan = float(input("Kelembapan (misal: 6.0): ").strip())
-            if kelembapan > 100:
-                print("Kelembapan tidak boleh lebih dari 100.")
-                enter_break()
-                clear_terminal()
-                continue
-
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO kondisi_tanah (kondisi_tanah, ph, kandungan_nutrisi, kelembapan)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING kondisi_tanah_id
-                    """,
-                    (kondisi_tanah, ph, nutrisi, kelembapan),
-                )
-                row = cur.fetchone()
-
-            if not row or row[0] is None:
-                print("Gagal menambahkan kondisi tanah.")
+            error = cek_rentang_survey("kelembapan", kelembapan)
+            if error:
+                print(error)
                 enter_break()
                 clear_terminal()
                 continue
 
-            id_tanah = row[0]
-            jumlah_survey = hitung_survey(conn, lahan_id)
+            # Jumlah survey sebelum ini dari daftar lahan, lahan berikutnya baru diklaim (belum ada di daftar)
+            jumlah_survey = lahan[9] if lahan is not None else hitung_survey(conn, lahan_id)
+            kondisi = (lahan_id, surveyor_id, id_iklim, kondisi_tanah, ph, nutrisi, kelembapan, real_ketinggian)
 
             if jumlah_survey < 2:
-                survey_id = add_survey_data(
-                        conn=conn,
-                        id_lahan=lahan_id,
-                        id_user_surveyor=surveyor_id,
-                        id_iklim=id_iklim,
-                        id_tanah=id_tanah,
-                        id_tanaman=None,
-                        status_survey="waiting"
+                hasil = submit_survey_menu(conn, *kondisi, id_tanaman=None, status_survey="waiting")
+                if hasil is None:
+                    pass
+                elif hasil[0] is None:
+                    print("Lahan ini sudah diambil surveyor lain atau tidak ada.")
+                else:
+                    print(
+                        f"Data survey ke-{hasil[1]} tersimpan. "
+                        "Rekomendasi tanaman akan muncul setelah 3 kali survey."
                     )
-                print(
-                    f"Data survey ke-{jumlah_survey + 1} tersimpan. "
-                    "Rekomendasi tanaman akan muncul setelah 3 kali survey."
-                )
                 enter_break()
                 clear_terminal()
                 continue
             
             print("\n=== HASIL ANALISIS & REKOMENDASI ===")
             recom, others = cocokin_tanaman(conn, real_ketinggian, ph, nutrisi, kelembapan, id_iklim)
-            cuaca = get_iklim_by_id(conn, id_iklim)
             
-            print(f"Kriteria: Alt={real_ketinggian}, pH={ph}, Nut={nutrisi}, Hum={kelembapan}, Iklim={cuaca[1]}")
+            print(f"Kriteria: Alt={real_ketinggian}, pH={ph}, Nut={nutrisi}, Hum={kelembapan}, Iklim={nama_iklim}")
             
             if recom:
                 print(f"\nTanaman yang direkomendasikan ({len(recom)}):")
@@ -1664,12 +4180,12 @@ def menu_surveyor(conn, user):
             else:
                 print("\nTidak ada tanaman yang pas dengan kriteria.")
 
-            print(f"\nTanaman Lainnya ({len(others)}):")
-            # Nampilin 5 rekomendasi lainnya
-            for o_id, o_nama in others[:5]:
-                print(f"  - ID {o_id}: {o_nama}")
-            if len(others) > 5:
-                print(f"  ... dan {len(others)-5} lainnya.")
+            terdekat = cari_tanaman_terdekat(
+                conn, real_ketinggian, ph, nutrisi, kelembapan, id_iklim, k=5, dalam_toleransi=False
+            )
+            print(f"\nTanaman paling mirip kondisi lahan (dari {len(recom) + len(others)} tanaman):")
+            for t_id, t_nama, jarak in terdekat:
+                print(f"  - ID {t_id}: {t_nama} (jarak {jarak:.2f}x toleransi)")
 
             id_tanaman = None
             
@@ -1696,25 +4212,18 @@ def menu_surveyor(conn, user):
                     id_tanaman = int(input("ID Tanaman: "))
                 except ValueError: pass
             
-            # simpan ke survey_data
-            survey_id = add_survey_data(
-                conn=conn,
-                id_lahan=lahan_id,
-                id_user_surveyor=surveyor_id,
-                id_iklim=id_iklim,
-                id_tanah=id_tanah,
-                id_tanaman=id_tanaman,
-                status_survey="selesai",
-            )
+            # simpan klaim, ketinggian, kondisi tanah dan survey sekaligus
+            hasil = submit_survey_menu(conn, *kondisi, id_tanaman=id_tanaman, status_survey="selesai")
 
-            if survey_id is not None:
+            if hasil is None:
+                print("Gagal menambahkan survey.")
+            elif hasil[0] is None:
+                print("Lahan ini sudah diambil surveyor lain atau tidak ada.")
+            else:
                 print(
-                    f"Survey baru dengan ID {survey_id} berhasil ditambahkan "
+                    f"Survey baru dengan ID {hasil[0]} berhasil ditambahkan "
                     f"untuk lahan {lahan_id}."
                 )
-                
-            else:
-                print("Gagal menambahkan survey.")
             enter_break()
 
         elif pilihan == "2":
@@ -1877,84 +4386,2607 @@ def login(conn: psycopg2.extensions.connection) -> Optional[dict[str, str | int]
     username = input("Username: ").strip()
     password = input("Password: ").strip()
 
+    user = autentikasi(conn, username, password, role)
+    if user:
+        print(f"Login berhasil! Anda masuk sebagai {user['role']}: {user['username']}")
+        return user
+    else:
+        print("Login gagal! Username/password/role tidak cocok.")
+        return None
+
+
+def autentikasi(
+    conn: psycopg2.extensions.connection,
+    username: str,
+    password: str,
+    role: str,
+) -> Optional[dict[str, str | int]]:
+    """
+    Cek username, password dan role tanpa input/print.
+    :return: data user atau None
+    """
     cur = conn.cursor()
     # Cek user password role
-    cur.execute(
-        """
-        SELECT
-            u.user_id,
-            u.username,
-            u.name,
-            r.nama_role
-        FROM users u
-        JOIN user_roles ur ON ur.id_user = u.user_id
-        JOIN roles r       ON r.role_id = ur.id_role
-        WHERE u.username = %s
-        AND u.password = %s
-        AND LOWER(r.nama_role) = LOWER(%s);
-        """,
-        (username, password, role),
-    )
+    jalankan_statement(cur, "autentikasi", (username, password, role))
 
     row = cur.fetchone()
     cur.close()
 
-    if row:
-        user_id, username_db, name_db, role_db = row
-        user = {
-            "id": user_id,
-            "username": username_db,
-            "name": name_db,
-            "role": role_db.lower(),
-        }
-        print(f"Login berhasil! Anda masuk sebagai {role_db}: {username_db}")
-        return user
-    else:
-        print("Login gagal! Username/password/role tidak cocok.")
+    if not row:
         return None
 
-# Main
+    user_id, username_db, name_db, role_db = row
+    return {
+        "id": user_id,
+        "username": username_db,
+        "name": name_db,
+        "role": role_db.lower(),
+    }
 
-if __name__ == '__main__':
-    conn = get_connection()
-    clear_terminal()
-    try:
-        while True:
-            clear_terminal()
-            header()
-            print("1. Login")
-            print("2. Registrasi user baru")
-            print("0. Keluar")
+# Import survey massal
 
-            pilihan = input("Pilih menu: ").strip()
+# Kolom file import. kondisi_tanah dan tanggal boleh kosong (default "-" dan hari ini).
+# surveyor boleh user_id atau username, iklim boleh iklim_id atau jenis_cuaca.
+# id_tanaman, status_survey (default waiting) dan id_klien boleh kosong;
+# baris dengan id_klien yang sudah pernah masuk tidak diimpor ulang.
+KOLOM_IMPORT_SURVEY = (
+    "lahan_id", "surveyor", "iklim", "kondisi_tanah",
+    "ph", "nutrisi", "kelembapan", "ketinggian", "tanggal",
+    "id_tanaman", "status_survey", "id_klien",
+)
 
-            if pilihan == "1":
-                user = login(conn)
-                if not user:
-                    # Login gagal, kembali ke menu utama
-                    continue
-                role = user.get('role')
-                if role == "admin":
-                    menu_admin(conn, user)
-                elif role == "petani":
-                    menu_petani(conn, user)
-                elif role == "surveyor":
-                    menu_surveyor(conn, user)
-                else:
-                    print("Role tidak dikenali.")
+# Alasan tolak import yang sebenarnya berarti survey sudah ada di server
+ALASAN_SUDAH_DIIMPOR = "sudah pernah diimpor"
 
+SQL_IMPORT_SURVEY = [
+    # Surveyor: cocokkan user_id atau username yang punya role surveyor
+    """
+    UPDATE survey_impor s
+    SET id_surveyor = u.user_id
+    FROM users u
+    JOIN user_roles ur ON ur.id_user = u.user_id
+    JOIN roles r       ON r.role_id = ur.id_role
+    WHERE LOWER(r.nama_role) = 'surveyor'
+      AND (u.username = s.surveyor
+           OR (s.surveyor ~ '^[0-9]+$' AND u.user_id = s.surveyor::int));
+    """,
+    """
+    UPDATE survey_impor s
+    SET id_iklim = ik.iklim_id
+    FROM iklim ik
+    WHERE LOWER(ik.jenis_cuaca) = LOWER(s.iklim)
+       OR (s.iklim ~ '^[0-9]+$' AND ik.iklim_id = s.iklim::int);
+    """,
+    # Kunci lahan yang disentuh supaya klaim tidak balapan dengan surveyor lain
+    """
+    SELECT l.lahan_id
+    FROM lahan l
+    WHERE l.lahan_id IN (SELECT lahan_id FROM survey_impor)
+    ORDER BY l.lahan_id
+    FOR UPDATE;
+    """,
+    """
+    UPDATE survey_impor s
+    SET alasan = CASE
+        WHEN l.lahan_id IS NULL   THEN 'lahan tidak ada'
+        WHEN s.id_surveyor IS NULL THEN 'surveyor tidak dikenal'
+        WHEN s.id_iklim IS NULL    THEN 'iklim tidak dikenal'
+        WHEN s.id_tanaman IS NOT NULL
+             AND NOT EXISTS (SELECT 1 FROM tanaman t WHERE t.tanaman_id = s.id_tanaman)
+            THEN 'tanaman tidak ada'
+        WHEN l.id_user_surveyor IS NOT NULL AND l.id_user_surveyor <> s.id_surveyor
+            THEN 'lahan sudah diambil surveyor lain'
+    END
+    FROM survey_impor s2
+    LEFT JOIN lahan l ON l.lahan_id = s2.lahan_id
+    WHERE s2.baris = s.baris;
+    """,
+    # id_klien yang sudah ada di server: tidak diimpor lagi, survey_id lamanya dikembalikan.
+    # Dicek setelah lock lahan, sync yang sama dan berjalan bersamaan menunggu yang pertama.
+    f"""
+    UPDATE survey_impor s
+    SET alasan = '{ALASAN_SUDAH_DIIMPOR}',
+        survey_id = sd.survey_id
+    FROM survey_data sd
+    WHERE sd.id_klien = s.id_klien;
+    """,
+    """
+    UPDATE survey_impor s
+    SET alasan = 'id_klien kembar di file'
+    FROM survey_impor pertama
+    WHERE pertama.id_klien = s.id_klien
+      AND pertama.baris < s.baris
+      AND s.alasan IS NULL;
+    """,
+    # Lahan belum diklaim: yang pertama di file yang dapat, surveyor lain ditolak
+    """
+    UPDATE survey_impor s
+    SET alasan = 'lahan sudah diambil surveyor lain'
+    FROM (
+        SELECT DISTINCT ON (lahan_id) lahan_id, id_surveyor
+        FROM survey_impor
+        WHERE alasan IS NULL
+        ORDER BY lahan_id, baris
+    ) pertama
+    WHERE s.lahan_id = pertama.lahan_id
+      AND s.alasan IS NULL
+      AND s.id_surveyor <> pertama.id_surveyor;
+    """,
+    """
+    UPDATE lahan l
+    SET id_user_surveyor = s.id_surveyor
+    FROM (SELECT DISTINCT lahan_id, id_surveyor FROM survey_impor WHERE alasan IS NULL) s
+    WHERE l.lahan_id = s.lahan_id
+      AND l.id_user_surveyor IS NULL;
+    """,
+    # Ketinggian lahan diambil dari bacaan terbaru
+    """
+    UPDATE lahan l
+    SET ketinggian = s.ketinggian
+    FROM (
+        SELECT DISTINCT ON (lahan_id) lahan_id, ketinggian
+        FROM survey_impor
+        WHERE alasan IS NULL AND ketinggian IS NOT NULL
+        ORDER BY lahan_id, tanggal DESC, baris DESC
+    ) s
+    WHERE l.lahan_id = s.lahan_id;
+    """,
+    # ID kondisi_tanah dan survey dipesan dulu supaya tiap baris tahu pasangannya
+    """
+    UPDATE survey_impor
+    SET id_tanah = nextval(pg_get_serial_sequence('kondisi_tanah', 'kondisi_tanah_id')),
+        survey_id = nextval(pg_get_serial_sequence('survey_data', 'survey_id'))
+    WHERE alasan IS NULL;
+    """,
+    """
+    INSERT INTO kondisi_tanah (kondisi_tanah_id, kondisi_tanah, ph, kandungan_nutrisi, kelembapan)
+    SELECT id_tanah, kondisi_tanah, ph, nutrisi, kelembapan
+    FROM survey_impor
+    WHERE alasan IS NULL
+    ORDER BY baris;
+    """,
+    """
+    INSERT INTO survey_data (
+        survey_id, id_user_surveyor, id_lahan, id_iklim, id_tanah,
+        status_survey, id_tanaman, tanggal_survey, id_klien
+    )
+    SELECT survey_id, id_surveyor, lahan_id, id_iklim, id_tanah,
+           status_survey, id_tanaman, tanggal, id_klien
+    FROM survey_impor
+    WHERE alasan IS NULL
+    ORDER BY baris;
+    """,
+]
 
-            elif pilihan == "2":
-                signup(conn)
-            elif pilihan == "0":
-                print("Keluar dari program")
-                clear_terminal()
-                break
+
+def baca_file_survey(path: str, format_file: str | None = None):
+    """
+    Baca file survey CSV (dengan header) atau JSONL, satu dict per baris.
+    Baris JSONL yang rusak dikirim sebagai None, nanti ditolak validasi_baris_survey.
+    """
+    format_file = format_file or ("jsonl" if path.lower().endswith((".jsonl", ".json")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if format_file == "jsonl":
+            for baris in f:
+                if baris.strip():
+                    try:
+                        yield json.loads(baris)
+                    except ValueError:
+                        yield None
+        else:
+            yield from csv.DictReader(f)
+
+
+def validasi_baris_survey(data: dict[str, Any]) -> tuple[Optional[tuple[Any, ...]], Optional[str]]:
+    """
+    Validasi satu baris import dengan rentang yang sama seperti menu surveyor.
+    :return: (baris siap COPY, None) atau (None, pesan error)
+    """
+    if not isinstance(data, dict):
+        return None, "baris bukan objek JSON"
+    data = {str(k).strip().lower(): v for k, v in data.items()}
+    teks = {k: str(v).strip() if v is not None else "" for k, v in data.items()}
+
+    for kolom in ("lahan_id", "surveyor", "iklim", "ph", "nutrisi", "kelembapan"):
+        if not teks.get(kolom):
+            return None, f"{kolom} wajib diisi"
+
+    try:
+        lahan_id = int(teks["lahan_id"])
+        nilai = {k: float(teks[k]) for k in ("ph", "nutrisi", "kelembapan")}
+        nilai["ketinggian"] = float(teks["ketinggian"]) if teks.get("ketinggian") else None
+        id_tanaman = int(teks["id_tanaman"]) if teks.get("id_tanaman") else None
+    except ValueError:
+        return None, "lahan_id/ph/nutrisi/kelembapan/ketinggian/id_tanaman harus angka"
+
+    for kolom, angka in nilai.items():
+        if angka is None:
+            continue
+        error = cek_rentang_survey(kolom, angka)
+        if error:
+            return None, error
+
+    try:
+        tanggal = date.fromisoformat(teks["tanggal"]) if teks.get("tanggal") else date.today()
+    except ValueError:
+        return None, "tanggal harus format YYYY-MM-DD"
+    if tanggal > date.today():
+        return None, "tanggal tidak boleh di masa depan"
+
+    kondisi_tanah = teks.get("kondisi_tanah") or "-"
+    if len(kondisi_tanah) > 20:
+        return None, "kondisi_tanah maksimal 20 karakter"
+    status_survey = teks.get("status_survey") or "waiting"
+    if len(status_survey) > 15:
+        return None, "status_survey maksimal 15 karakter"
+    id_klien = teks.get("id_klien") or None
+    if id_klien is not None and len(id_klien) > 36:
+        return None, "id_klien maksimal 36 karakter"
+
+    return (
+        lahan_id, teks["surveyor"], teks["iklim"], kondisi_tanah,
+        nilai["ph"], nilai["nutrisi"], nilai["kelembapan"], nilai["ketinggian"], tanggal,
+        id_tanaman, status_survey, id_klien,
+    ), None
+
+
+def import_survey(conn, baris_data) -> dict[str, Any]:
+    """
+    Import banyak survey sekaligus: validasi di Python, COPY ke tabel staging,
+    lalu klaim lahan, update ketinggian, insert kondisi_tanah dan survey_data
+    secara set-based dalam satu transaksi.
+    :return: ringkasan (dibaca, diimpor, lahan, ditolak [(no_baris, alasan)],
+             survey {no_baris: survey_id} termasuk yang sudah pernah diimpor)
+    """
+    buffer = io.StringIO()
+    penulis = csv.writer(buffer)
+    ditolak: list[tuple[int, str]] = []
+    dibaca = 0
+
+    for no_baris, data in enumerate(baris_data, start=1):
+        dibaca += 1
+        row, error = validasi_baris_survey(data)
+        if error:
+            ditolak.append((no_baris, error))
+            continue
+        penulis.writerow((no_baris,) + tuple("" if v is None else v for v in row))
+    buffer.seek(0)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TEMP TABLE survey_impor (
+                baris INTEGER PRIMARY KEY,
+                lahan_id INTEGER,
+                surveyor TEXT,
+                iklim TEXT,
+                kondisi_tanah VARCHAR(20),
+                ph FLOAT,
+                nutrisi FLOAT,
+                kelembapan FLOAT,
+                ketinggian REAL,
+                tanggal DATE,
+                id_tanaman INTEGER,
+                status_survey VARCHAR(15),
+                id_klien VARCHAR(36),
+                id_surveyor INTEGER,
+                id_iklim INTEGER,
+                id_tanah INTEGER,
+                survey_id INTEGER,
+                alasan TEXT
+            ) ON COMMIT DROP;
+            """
+        )
+        cur.copy_expert(
+            "COPY survey_impor (baris, " + ", ".join(KOLOM_IMPORT_SURVEY) + ") "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        for sql in SQL_IMPORT_SURVEY:
+            cur.execute(sql)
+
+        cur.execute("SELECT baris, alasan FROM survey_impor WHERE alasan IS NOT NULL")
+        ditolak.extend(cur.fetchall())
+        cur.execute(
+            "SELECT COUNT(*), array_agg(DISTINCT lahan_id) FROM survey_impor WHERE alasan IS NULL"
+        )
+        diimpor, lahan_ids = cur.fetchone()
+        cur.execute("SELECT baris, survey_id FROM survey_impor WHERE survey_id IS NOT NULL")
+        survey = dict(cur.fetchall())
+    conn.commit()
+
+    ditolak.sort()
+    return {
+        "dibaca": dibaca,
+        "diimpor": diimpor,
+        "lahan": lahan_ids or [],
+        "ditolak": ditolak,
+        "survey": survey,
+    }
+
+# Mode offline surveyor
+
+OFFLINE_CONFIG = {
+    'file': 'labulis_offline.sqlite',
+    'ukuran_batch': 200,  # survey per transaksi saat sync
+}
+
+# Salinan lokal katalog tanaman, iklim dan lahan (milik surveyor + belum diambil),
+# ditambah jurnal survey yang menunggu sync. Kolom lahan sama dengan lihat_lahan_universal.
+SKEMA_OFFLINE = """
+    CREATE TABLE IF NOT EXISTS info (
+        kunci TEXT PRIMARY KEY,
+        nilai TEXT
+    );
+    CREATE TABLE IF NOT EXISTS tanaman (
+        tanaman_id INTEGER PRIMARY KEY,
+        nama TEXT,
+        ketinggian REAL,
+        ph REAL,
+        kandungan_nutrisi REAL,
+        kelembapan REAL,
+        iklim_id INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS iklim (
+        iklim_id INTEGER PRIMARY KEY,
+        jenis_cuaca TEXT
+    );
+    CREATE TABLE IF NOT EXISTS lahan (
+        lahan_id INTEGER PRIMARY KEY,
+        nama_petani TEXT,
+        surveyor_id INTEGER,
+        nama_surveyor TEXT,
+        ketinggian REAL,
+        nama_jalan TEXT,
+        nama_kecamatan TEXT,
+        nama_kota TEXT,
+        nama_provinsi TEXT,
+        survey_count INTEGER,
+        survey_terakhir TEXT
+    );
+    CREATE TABLE IF NOT EXISTS survey (
+        id_klien TEXT PRIMARY KEY,
+        lahan_id INTEGER NOT NULL,
+        id_iklim INTEGER NOT NULL,
+        kondisi_tanah TEXT,
+        ph REAL,
+        nutrisi REAL,
+        kelembapan REAL,
+        ketinggian REAL,
+        id_tanaman INTEGER,
+        status_survey TEXT,
+        tanggal TEXT,
+        dibuat TEXT,
+        status_sync TEXT NOT NULL DEFAULT 'antri',  -- antri / terkirim / konflik / ditolak
+        survey_id INTEGER,
+        alasan TEXT
+    );
+    CREATE INDEX IF NOT EXISTS survey_status_sync_idx ON survey (status_sync, dibuat);
+"""
+
+ALASAN_KONFLIK_KLAIM = "lahan sudah diambil surveyor lain"
+
+
+def buka_jurnal_offline(path: str) -> sqlite3.Connection:
+    """
+    Buka (atau buat) file jurnal offline
+    """
+    jurnal = sqlite3.connect(path)
+    jurnal.executescript(SKEMA_OFFLINE)
+    return jurnal
+
+
+def info_offline(jurnal: sqlite3.Connection) -> dict[str, str]:
+    return dict(jurnal.execute("SELECT kunci, nilai FROM info"))
+
+
+def siapkan_offline(conn, jurnal: sqlite3.Connection, user: dict[str, Any]) -> Optional[dict[str, int]]:
+    """
+    Salin katalog tanaman, iklim dan lahan yang bisa disurvey ke jurnal offline.
+    Survey yang masih antri tetap disimpan.
+    """
+    info = info_offline(jurnal)
+    antri = jurnal.execute("SELECT COUNT(*) FROM survey WHERE status_sync = 'antri'").fetchone()[0]
+    if antri and info.get("surveyor_id") != str(user["id"]):
+        print(f"Jurnal masih berisi {antri} survey milik {info.get('username')}, sync dulu sebelum ganti surveyor.")
+        return None
+
+    with conn.cursor() as cur:
+        cur.execute(QUERY_KATALOG_TANAMAN)
+        tanaman = cur.fetchall()
+    iklim = get_all_iklim(conn)
+    lahan = [
+        row[:10] + (row[10].isoformat() if row[10] else None,)
+        for row in lihat_lahan_universal(conn, user)
+        if row[2] in (None, user["id"])
+    ]
+    conn.rollback()
+
+    with jurnal:
+        for tabel in ("tanaman", "iklim", "lahan"):
+            jurnal.execute(f"DELETE FROM {tabel}")
+        jurnal.executemany("INSERT INTO tanaman VALUES (?, ?, ?, ?, ?, ?, ?)", tanaman)
+        jurnal.executemany("INSERT INTO iklim VALUES (?, ?)", iklim)
+        jurnal.executemany("INSERT INTO lahan VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", lahan)
+        jurnal.executemany(
+            "INSERT OR REPLACE INTO info VALUES (?, ?)",
+            [
+                ("surveyor_id", str(user["id"])),
+                ("username", user["username"]),
+                ("disiapkan", datetime.now().isoformat(timespec="seconds")),
+            ],
+        )
+    return {"tanaman": len(tanaman), "iklim": len(iklim), "lahan": len(lahan)}
+
+
+def lahan_offline(jurnal: sqlite3.Connection) -> list[tuple[Any, ...]]:
+    """
+    Lahan di salinan lokal, jumlah survey ditambah survey yang masih antri
+    """
+    return jurnal.execute(
+        """
+        SELECT l.lahan_id, l.nama_petani, l.surveyor_id, l.nama_surveyor, l.ketinggian,
+               l.nama_jalan, l.nama_kecamatan, l.nama_kota, l.nama_provinsi,
+               l.survey_count + COUNT(s.id_klien), COALESCE(MAX(s.tanggal), l.survey_terakhir)
+        FROM lahan l
+        LEFT JOIN survey s ON s.lahan_id = l.lahan_id AND s.status_sync = 'antri'
+        GROUP BY l.lahan_id
+        ORDER BY l.lahan_id
+        """
+    ).fetchall()
+
+
+def simpan_survey_offline(
+    jurnal: sqlite3.Connection,
+    lahan_id: int,
+    id_iklim: int,
+    kondisi_tanah: str,
+    ph: float,
+    nutrisi: float,
+    kelembapan: float,
+    ketinggian: float | None = None,
+    id_tanaman: int | None = None,
+    status_survey: str = "waiting",
+) -> Optional[str]:
+    """
+    Validasi (sama dengan import survey) lalu simpan ke jurnal.
+    :return: id_klien survey atau None kalau tidak valid
+    """
+    info = info_offline(jurnal)
+    row, error = validasi_baris_survey({
+        "lahan_id": lahan_id, "surveyor": info.get("surveyor_id"), "iklim": id_iklim,
+        "kondisi_tanah": kondisi_tanah, "ph": ph, "nutrisi": nutrisi, "kelembapan": kelembapan,
+        "ketinggian": ketinggian, "id_tanaman": id_tanaman, "status_survey": status_survey,
+    })
+    if error:
+        print(error)
+        return None
+
+    id_klien = uuid.uuid4().hex
+    with jurnal:
+        jurnal.execute(
+            """
+            INSERT INTO survey (
+                id_klien, lahan_id, id_iklim, kondisi_tanah, ph, nutrisi, kelembapan,
+                ketinggian, id_tanaman, status_survey, tanggal, dibuat
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                id_klien, row[0], id_iklim, row[3], row[4], row[5], row[6],
+                row[7], row[9], row[10], row[8].isoformat(), datetime.now().isoformat(),
+            ),
+        )
+    return id_klien
+
+
+def sync_offline(conn, jurnal: sqlite3.Connection, ukuran_batch: int | None = None) -> dict[str, Any]:
+    """
+    Kirim survey yang antri lewat import_survey, satu transaksi per batch.
+    Aman diulang: survey yang sudah masuk dikenali dari id_klien.
+    :return: ringkasan (terkirim, konflik [(id_klien, lahan_id)], ditolak [(id_klien, alasan)], lahan)
+    """
+    ukuran_batch = ukuran_batch or OFFLINE_CONFIG['ukuran_batch']
+    surveyor_id = info_offline(jurnal).get("surveyor_id")
+    hasil = {"terkirim": 0, "konflik": [], "ditolak": [], "lahan": set()}
+    if surveyor_id is None:
+        return hasil
+
+    while True:
+        rows = jurnal.execute(
+            """
+            SELECT id_klien, lahan_id, id_iklim, kondisi_tanah, ph, nutrisi, kelembapan,
+                   ketinggian, tanggal, id_tanaman, status_survey
+            FROM survey
+            WHERE status_sync = 'antri'
+            ORDER BY dibuat
+            LIMIT ?
+            """,
+            (ukuran_batch,),
+        ).fetchall()
+        if not rows:
+            break
+
+        baris_data = [
+            {
+                "lahan_id": r[1], "surveyor": surveyor_id, "iklim": r[2], "kondisi_tanah": r[3],
+                "ph": r[4], "nutrisi": r[5], "kelembapan": r[6], "ketinggian": r[7], "tanggal": r[8],
+                "id_tanaman": r[9], "status_survey": r[10], "id_klien": r[0],
+            }
+            for r in rows
+        ]
+        impor = import_survey(conn, baris_data)
+        alasan_baris = dict(impor["ditolak"])
+        hasil["lahan"].update(impor["lahan"])
+
+        perubahan = []
+        for no_baris, r in enumerate(rows, start=1):
+            id_klien, lahan_id = r[0], r[1]
+            alasan = alasan_baris.get(no_baris)
+            if no_baris in impor["survey"]:
+                perubahan.append(("terkirim", impor["survey"][no_baris], None, id_klien))
+                hasil["terkirim"] += 1
+            elif alasan == ALASAN_KONFLIK_KLAIM:
+                perubahan.append(("konflik", None, alasan, id_klien))
+                hasil["konflik"].append((id_klien, lahan_id))
             else:
-                print("Pilihan tidak valid, coba lagi")
+                perubahan.append(("ditolak", None, alasan, id_klien))
+                hasil["ditolak"].append((id_klien, alasan))
+        with jurnal:
+            jurnal.executemany(
+                "UPDATE survey SET status_sync = ?, survey_id = ?, alasan = ? WHERE id_klien = ?",
+                perubahan,
+            )
+
+    hasil["lahan"] = sorted(hasil["lahan"])
+    return hasil
+
+
+def menu_surveyor_offline(jurnal: sqlite3.Connection) -> None:
+    """
+    Menu survey tanpa koneksi database: data lahan dan katalog dari salinan lokal,
+    survey disimpan ke jurnal sampai di-sync.
+    """
+    info = info_offline(jurnal)
+    if "surveyor_id" not in info:
+        print("Jurnal offline belum disiapkan, jalankan dulu: python projekFinal.py offline-prepare")
+        return
+    surveyor_id = int(info["surveyor_id"])
+    katalog = KatalogTanaman(jurnal.execute("SELECT * FROM tanaman").fetchall())
+    iklim_list = jurnal.execute("SELECT iklim_id, jenis_cuaca FROM iklim ORDER BY iklim_id").fetchall()
+
+    while True:
+        antri = jurnal.execute("SELECT COUNT(*) FROM survey WHERE status_sync = 'antri'").fetchone()[0]
+        tampilkan_layar(
+            f"\n=== MENU SURVEYOR OFFLINE ({info['username']}, data per {info['disiapkan']}) ===",
+            f"{antri} survey menunggu sync",
+            "1. Survey lahan",
+            "2. Lihat survey yang belum di-sync",
+            "0. Keluar",
+        )
+        pilihan = input("Pilih menu: ").strip()
+
+        if pilihan == "1":
+            daftar_lahan = lahan_offline(jurnal)
+            simpel_lahan_print(daftar_lahan)
+
+            print("\n=== Input survey data (offline) ===")
+            try:
+                lahan_id = int(input("ID lahan yang disurvey: ").strip())
+            except ValueError:
+                print("ID lahan harus angka.")
+                enter_break()
+                continue
+            lahan = next((row for row in daftar_lahan if row[0] == lahan_id), None)
+            if lahan is None or lahan[2] not in (None, surveyor_id):
+                print("Lahan ini sudah diambil surveyor lain atau tidak ada.")
+                enter_break()
+                continue
+
+            try:
+                ketinggian = float(input("Ketinggian Real Lahan (meter): ").strip())
+                print("\nPilih Iklim:")
+                for iklim_id, jenis_cuaca in iklim_list:
+                    print(f"  {iklim_id}. {jenis_cuaca}")
+                id_iklim = int(input("ID Iklim: ").strip())
+                kondisi_tanah = input("Kondisi tanah (gembur/lumpur/subur): ").strip()
+                ph = float(input("pH (misal: 6.0): ").strip())
+                nutrisi = float(input("Nutrisi (misal: 7.0): ").strip())
+                kelembapan = float(input("Kelembapan (misal: 6.0): ").strip())
+            except ValueError:
+                print("Ketinggian, ID iklim, pH, nutrisi dan kelembapan harus angka.")
+                enter_break()
+                continue
+            nama_iklim = dict(iklim_list).get(id_iklim)
+            if nama_iklim is None:
+                print("ID iklim tidak ada.")
+                enter_break()
+                continue
+
+            id_tanaman = None
+            status = "waiting"
+            if lahan[9] >= 2:
+                status = "selesai"
+                recom, others = katalog.cocokkan(ketinggian, ph, nutrisi, kelembapan, id_iklim)
+                print("\n=== HASIL ANALISIS & REKOMENDASI ===")
+                print(f"Kriteria: Alt={ketinggian}, pH={ph}, Nut={nutrisi}, Hum={kelembapan}, Iklim={nama_iklim}")
+                if recom:
+                    print(f"\nTanaman yang direkomendasikan ({len(recom)}):")
+                    for r_id, r_nama in recom:
+                        print(f"  - ID {r_id}: {r_nama}")
+                else:
+                    print("\nTidak ada tanaman yang pas dengan kriteria.")
+                terdekat = katalog.indeks().terdekat(
+                    ketinggian, ph, nutrisi, kelembapan, id_iklim, k=5, dalam_toleransi=False
+                )
+                print(f"\nTanaman paling mirip kondisi lahan (dari {len(katalog)} tanaman):")
+                for t_id, t_nama, jarak in terdekat:
+                    print(f"  - ID {t_id}: {t_nama} (jarak {jarak:.2f}x toleransi)")
+                try:
+                    id_tanaman = int(input("ID tanaman yang dipilih (kosong = tidak merekomendasikan): ").strip())
+                except ValueError:
+                    pass
+
+            id_klien = simpan_survey_offline(
+                jurnal, lahan_id, id_iklim, kondisi_tanah, ph, nutrisi, kelembapan,
+                ketinggian, id_tanaman, status,
+            )
+            if id_klien is not None:
+                print(f"Survey ke-{lahan[9] + 1} untuk lahan {lahan_id} disimpan di jurnal, menunggu sync.")
+            enter_break()
+
+        elif pilihan == "2":
+            rows = jurnal.execute(
+                """
+                SELECT lahan_id, tanggal, ph, nutrisi, kelembapan, id_tanaman, status_survey
+                FROM survey WHERE status_sync = 'antri' ORDER BY dibuat
+                """
+            ).fetchall()
+            if not rows:
+                print("\nTidak ada survey yang menunggu sync.")
+            for lahan_id, tanggal, ph, nutrisi, kelembapan, id_tanaman, status in rows:
+                print(
+                    f"- Lahan {lahan_id} | {tanggal} | pH {ph} | Nutrisi {nutrisi} | "
+                    f"Kelembapan {kelembapan} | Tanaman {display(id_tanaman)} | {status}"
+                )
+            enter_break()
+
+        elif pilihan == "0":
+            break
+        else:
+            print("Pilihan tidak valid, coba lagi.")
+            enter_break()
+
+# Layanan HTTP
+
+LAYANAN_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8080,
+    'worker': 16,
+    'umur_sesi': 8 * 3600,  # detik
+    # Koneksi keep-alive yang diam lebih lama dari ini ditutup, supaya tidak menahan worker
+    'timeout_idle': 15,  # detik
+}
+
+KOLOM_LAHAN = (
+    "lahan_id", "nama_petani", "surveyor_id", "nama_surveyor", "ketinggian",
+    "nama_jalan", "nama_kecamatan", "nama_kota", "nama_provinsi", "survey_count",
+    "survey_terakhir",
+)
+
+KOLOM_HASIL_SURVEY = (
+    "lahan_id", "ketinggian", "petani_id", "nama_petani", "surveyor_id", "nama_surveyor",
+    "nama_jalan", "nama_kecamatan", "nama_kota", "nama_provinsi",
+    "survey_id", "tanggal_survey", "status_survey", "jenis_cuaca", "kondisi_tanah",
+    "ph", "kandungan_nutrisi", "kelembapan", "tanaman_id", "nama_tanaman_master",
+)
+
+
+class KesalahanLayanan(Exception):
+    """
+    Error yang dikirim ke client sebagai respons JSON
+    """
+
+    def __init__(self, status: int, pesan: str):
+        super().__init__(pesan)
+        self.status = status
+        self.pesan = pesan
+
+
+class MetrikLatensi:
+    """
+    Catatan latensi per endpoint. Persentil dihitung dari sampel terakhir saja.
+    """
+
+    def __init__(self, maks_sampel: int = 2048):
+        self._lock = threading.Lock()
+        self._maks_sampel = maks_sampel
+        self._data: dict[str, dict[str, Any]] = {}
+
+    def catat(self, endpoint: str, detik: float, status: int) -> None:
+        with self._lock:
+            data = self._data.get(endpoint)
+            if data is None:
+                data = {"jumlah": 0, "error": 0, "total": 0.0, "maks": 0.0,
+                        "sampel": deque(maxlen=self._maks_sampel)}
+                self._data[endpoint] = data
+            data["jumlah"] += 1
+            data["total"] += detik
+            data["maks"] = max(data["maks"], detik)
+            data["sampel"].append(detik)
+            if status >= 500:
+                data["error"] += 1
+
+    def ringkasan(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            salinan = {k: dict(v, sampel=list(v["sampel"])) for k, v in self._data.items()}
+
+        hasil = {}
+        for endpoint, data in salinan.items():
+            p50, p95, p99 = np.percentile(data["sampel"], [50, 95, 99]) * 1000
+            hasil[endpoint] = {
+                "jumlah": data["jumlah"],
+                "error": data["error"],
+                "rata_ms": round(data["total"] / data["jumlah"] * 1000, 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "maks_ms": round(data["maks"] * 1000, 3),
+            }
+        return hasil
+
+
+class SesiLayanan:
+    """
+    Token login client -> data user
+    """
+
+    def __init__(self, umur: float):
+        self._lock = threading.Lock()
+        self._umur = umur
+        self._sesi: dict[str, tuple[dict[str, Any], float]] = {}
+
+    def buat(self, user: dict[str, Any]) -> str:
+        token = secrets.token_urlsafe(24)
+        with self._lock:
+            self._sesi[token] = (user, time.monotonic() + self._umur)
+        return token
+
+    def ambil(self, token: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            sesi = self._sesi.get(token)
+            if sesi is None:
+                return None
+            user, kadaluarsa = sesi
+            if time.monotonic() > kadaluarsa:
+                del self._sesi[token]
+                return None
+            return user
+
+
+METRIK_LAYANAN = MetrikLatensi()
+SESI_LAYANAN = SesiLayanan(LAYANAN_CONFIG['umur_sesi'])
+
+
+def _wajib_role(user: dict[str, Any], *roles: str) -> None:
+    if user["role"] not in roles:
+        raise KesalahanLayanan(403, f"Hanya untuk role: {', '.join(roles)}")
+
+
+def _ambil_nilai(data: dict[str, Any], kunci: str, tipe=float, wajib: bool = True):
+    nilai = data.get(kunci)
+    if nilai is None:
+        if wajib:
+            raise KesalahanLayanan(400, f"'{kunci}' wajib diisi")
+        return None
+    try:
+        return tipe(nilai)
+    except (TypeError, ValueError):
+        raise KesalahanLayanan(400, f"'{kunci}' harus berupa {tipe.__name__}")
+
+
+def api_login(user, data: dict[str, Any]) -> dict[str, Any]:
+    username = _ambil_nilai(data, "username", str)
+    password = _ambil_nilai(data, "password", str)
+    role = _ambil_nilai(data, "role", str).strip().lower()
+
+    user = get_pool().jalankan(autentikasi, username, password, role)
+    if not user:
+        raise KesalahanLayanan(401, "Username/password/role tidak cocok")
+    return {"token": SESI_LAYANAN.buat(user), "user": user}
+
+
+def api_lihat_lahan(user, data: dict[str, Any]) -> dict[str, Any]:
+    rows = get_pool().jalankan(lihat_lahan_universal, user)
+    return {"lahan": [dict(zip(KOLOM_LAHAN, row)) for row in rows]}
+
+
+def api_add_lahan(user, data: dict[str, Any]) -> dict[str, Any]:
+    _wajib_role(user, "petani", "admin")
+    if user["role"] == "petani":
+        id_petani = user["id"]
+    else:
+        id_petani = _ambil_nilai(data, "id_user_petani", int)
+
+    lahan_id = get_pool().jalankan(
+        add_lahan,
+        id_user_petani=id_petani,
+        id_user_surveyor=None,
+        id_alamat=_ambil_nilai(data, "id_alamat", int),
+        ketinggian=_ambil_nilai(data, "ketinggian", float, wajib=False),
+    )
+    if lahan_id is None:
+        raise KesalahanLayanan(500, "Gagal menambahkan lahan")
+    return {"lahan_id": lahan_id}
+
+
+def api_claim_lahan_berikutnya(user, data: dict[str, Any]) -> dict[str, Any]:
+    _wajib_role(user, "surveyor")
+    kecamatan_id = _ambil_nilai(data, "id_kecamatan", int, wajib=False)
+    batas_tingkat = _ambil_nilai(data, "batas", str, wajib=False)
+    if batas_tingkat is not None and batas_tingkat not in TINGKAT_LOKASI:
+        raise KesalahanLayanan(400, f"batas harus salah satu dari {', '.join(TINGKAT_LOKASI)}")
+
+    with get_pool().koneksi() as conn:
+        lahan_id = claim_lahan_berikutnya(conn, user["id"], kecamatan_id, batas_tingkat)
+    if lahan_id is None:
+        raise KesalahanLayanan(404, "Tidak ada lahan yang belum diambil")
+    return {"lahan_id": lahan_id}
+
+
+def api_add_survey(user, data: dict[str, Any]) -> dict[str, Any]:
+    _wajib_role(user, "surveyor")
+    lahan_id = _ambil_nilai(data, "id_lahan", int)
+    ph = _ambil_nilai(data, "ph")
+    nutrisi = _ambil_nilai(data, "nutrisi")
+    kelembapan = _ambil_nilai(data, "kelembapan")
+    for kolom, nilai in (("ph", ph), ("nutrisi", nutrisi), ("kelembapan", kelembapan)):
+        error = cek_rentang_survey(kolom, nilai)
+        if error:
+            raise KesalahanLayanan(400, error)
+
+    ketinggian = _ambil_nilai(data, "ketinggian", wajib=False)
+    if ketinggian is not None:
+        error = cek_rentang_survey("ketinggian", ketinggian)
+        if error:
+            raise KesalahanLayanan(400, error)
+
+    hasil = get_pool().jalankan(
+        submit_survey,
+        lahan_id,
+        user["id"],
+        _ambil_nilai(data, "id_iklim", int),
+        _ambil_nilai(data, "kondisi_tanah", str),
+        ph,
+        nutrisi,
+        kelembapan,
+        ketinggian=ketinggian,
+        id_tanaman=_ambil_nilai(data, "id_tanaman", int, wajib=False),
+        status_survey=_ambil_nilai(data, "status_survey", str, wajib=False) or "waiting",
+    )
+    if hasil[0] is None:
+        raise KesalahanLayanan(409, "Lahan ini sudah diambil surveyor lain atau tidak ada")
+    return {"survey_id": hasil[0], "jumlah_survey": hasil[1]}
+
+
+def api_cocokin_tanaman(user, data: dict[str, Any]) -> dict[str, Any]:
+    kriteria = (
+        _ambil_nilai(data, "ketinggian"),
+        _ambil_nilai(data, "ph"),
+        _ambil_nilai(data, "nutrisi"),
+        _ambil_nilai(data, "kelembapan"),
+        _ambil_nilai(data, "iklim_id", int),
+    )
+    k = _ambil_nilai(data, "k", int, wajib=False)
+    if k is not None:
+        # Mode top-k: hanya tanaman terdekat dalam toleransi, lewat indeks
+        terdekat = get_pool().jalankan(cari_tanaman_terdekat, *kriteria, k)
+        return {
+            "terdekat": [
+                {"tanaman_id": t_id, "nama": nama, "jarak": jarak} for t_id, nama, jarak in terdekat
+            ],
+        }
+
+    recommended, others = get_pool().jalankan(cocokin_tanaman, *kriteria)
+    return {
+        "recommended": [{"tanaman_id": t_id, "nama": nama} for t_id, nama in recommended],
+        "others": [{"tanaman_id": t_id, "nama": nama} for t_id, nama in others],
+    }
+
+
+def api_hasil_survey_petani(user, data: dict[str, Any]) -> dict[str, Any]:
+    _wajib_role(user, "petani")
+    with get_pool().koneksi() as conn:
+        rows = ambil_hasil_survey_petani(conn, user["id"])
+        statistik = ambil_statistik_tanah(conn, list({row[0] for row in rows}))
+    return {
+        "hasil": [dict(zip(KOLOM_HASIL_SURVEY, row)) for row in rows],
+        "statistik": {str(lahan_id): s for lahan_id, s in statistik.items()},
+    }
+
+
+def api_metrik(user, data: dict[str, Any]) -> dict[str, Any]:
+    _wajib_role(user, "admin")
+    return {
+        "endpoint": METRIK_LAYANAN.ringkasan(),
+        "pool": get_pool().statistik(),
+        "cache_tanaman": CACHE_TANAMAN.statistik(),
+        "query": STATISTIK_QUERY.ringkasan(),
+        "query_lambat": STATISTIK_QUERY.query_lambat(),
+    }
+
+
+# SQLSTATE data dari klien yang ditolak database (FK tidak ada, NOT NULL, CHECK,
+# format/panjang/rentang nilai) dan konflik dengan transaksi lain (deadlock,
+# serialization, lock timeout, data ganda). Error database lainnya tetap 500.
+KODE_ERROR_KLIEN = {"23503", "23502", "23514", "22P02", "22001", "22003"}
+KODE_ERROR_KONFLIK = {"23505", "40P01", "40001", "55P03"}
+
+
+def _status_error_db(error: psycopg2.Error) -> int:
+    if error.pgcode in KODE_ERROR_KLIEN:
+        return 400
+    if error.pgcode in KODE_ERROR_KONFLIK:
+        return 409
+    return 500
+
+
+# (metode, path) -> (fungsi, wajib login)
+RUTE_LAYANAN = {
+    ("POST", "/login"): (api_login, False),
+    ("GET", "/lahan"): (api_lihat_lahan, True),
+    ("POST", "/lahan"): (api_add_lahan, True),
+    ("POST", "/lahan/klaim-berikutnya"): (api_claim_lahan_berikutnya, True),
+    ("POST", "/survey"): (api_add_survey, True),
+    ("POST", "/cocokin-tanaman"): (api_cocokin_tanaman, True),
+    ("GET", "/hasil-survey"): (api_hasil_survey_petani, True),
+    ("GET", "/metrik"): (api_metrik, True),
+}
+
+
+class HandlerLayanan(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def timeout(self) -> float:
+        # Dipakai StreamRequestHandler.setup() sebagai timeout socket
+        return LAYANAN_CONFIG["timeout_idle"]
+
+    def do_GET(self):
+        self._tangani("GET")
+
+    def do_POST(self):
+        self._tangani("POST")
+
+    def _tangani(self, metode: str) -> None:
+        mulai = time.perf_counter()
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        rute = RUTE_LAYANAN.get((metode, path))
+        try:
+            if rute is None:
+                # Body request ini tidak dibaca, sisanya akan terbaca sebagai request berikutnya
+                self.close_connection = True
+                raise KesalahanLayanan(404, "Endpoint tidak ditemukan")
+            fungsi, wajib_login = rute
+            data = self._baca_json()
+            user = self._user() if wajib_login else None
+            status, hasil = 200, fungsi(user, data)
+        except KesalahanLayanan as error:
+            status, hasil = error.status, {"error": error.pesan}
+        except PoolHabis as error:
+            status, hasil = 503, {"error": str(error)}
+        except psycopg2.Error as error:
+            status, hasil = _status_error_db(error), {"error": f"Error database: {error.pgerror or error}"}
+        except Exception as error:
+            # Bug di fungsi API tetap dijawab dan tercatat di metrik
+            print(f"Error internal di {metode} {path}: {error!r}", file=sys.stderr)
+            status, hasil = 500, {"error": f"Error internal: {type(error).__name__}"}
+            self.close_connection = True
+
+        self._kirim(status, hasil)
+        endpoint = f"{metode} {path}" if rute else "lainnya"
+        METRIK_LAYANAN.catat(endpoint, time.perf_counter() - mulai, status)
+
+    def _baca_json(self) -> dict[str, Any]:
+        try:
+            panjang = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            panjang = -1
+        if panjang < 0 or "Transfer-Encoding" in self.headers:
+            # Sisa body tidak bisa dipisahkan dari request berikutnya
+            self.close_connection = True
+            raise KesalahanLayanan(400, "Body wajib memakai Content-Length yang valid")
+        if not panjang:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(panjang))
+        except ValueError:
+            raise KesalahanLayanan(400, "Body harus JSON")
+        if not isinstance(data, dict):
+            raise KesalahanLayanan(400, "Body harus objek JSON")
+        return data
+
+    def _user(self) -> dict[str, Any]:
+        auth = self.headers.get("Authorization", "")
+        token = auth[7:] if auth.startswith("Bearer ") else ""
+        user = SESI_LAYANAN.ambil(token) if token else None
+        if user is None:
+            raise KesalahanLayanan(401, "Belum login atau sesi habis")
+        return user
+
+    def _kirim(self, status: int, hasil: dict[str, Any]) -> None:
+        body = json.dumps(hasil, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Latensi sudah dicatat di METRIK_LAYANAN
+        pass
+
+
+class ServerLayanan(HTTPServer):
+    """
+    HTTP server dengan thread pool tetap, tiap request dikerjakan satu worker
+    """
+
+    request_queue_size = 128
+
+    def __init__(self, alamat: tuple[str, int], worker: int):
+        super().__init__(alamat, HandlerLayanan)
+        self.executor = ThreadPoolExecutor(max_workers=worker, thread_name_prefix="labulis")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._proses, request, client_address)
+
+    def _proses(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def jalankan_layanan(host: str, port: int, worker: int) -> None:
+    """
+    Jalankan layanan HTTP/JSON sampai dihentikan (Ctrl+C)
+    """
+    server = ServerLayanan((host, port), worker)
+    print(f"Layanan LABULIS jalan di http://{host}:{port} dengan {worker} worker")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nLayanan dihentikan")
+    finally:
+        server.server_close()
+
+# Migrasi skema
+
+FOLDER_MIGRASI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrasi")
+
+# Nomor bebas untuk pg_advisory_lock supaya migrasi tidak jalan dobel
+KUNCI_MIGRASI = 72025
+
+
+def daftar_migrasi(folder: str = FOLDER_MIGRASI) -> list[tuple[int, str, str]]:
+    """
+    Daftar file migrasi NNN_nama.sql, urut dari versi terkecil
+    :return: list of tuple (versi, nama, path)
+    """
+    hasil = []
+    for nama_file in os.listdir(folder):
+        versi, _, sisa = nama_file.partition("_")
+        if not nama_file.endswith(".sql") or not versi.isdigit():
+            continue
+        hasil.append((int(versi), sisa[:-4], os.path.join(folder, nama_file)))
+    hasil.sort()
+    return hasil
+
+
+def migrasi_terpasang(conn) -> dict[int, Any]:
+    """
+    Versi migrasi yang sudah diterapkan -> waktu diterapkan
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrasi (
+                versi INTEGER PRIMARY KEY,
+                nama VARCHAR(200) NOT NULL,
+                diterapkan TIMESTAMP default now()
+            );
+            """
+        )
+        cur.execute("SELECT versi, diterapkan FROM schema_migrasi ORDER BY versi")
+        rows = cur.fetchall()
+    conn.commit()
+    return dict(rows)
+
+
+def jalankan_migrasi(conn, folder: str = FOLDER_MIGRASI) -> list[int]:
+    """
+    Terapkan migrasi yang belum tercatat di schema_migrasi.
+    Satu file = satu transaksi, kalau gagal berhenti di file itu.
+    :return: versi yang baru diterapkan
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", (KUNCI_MIGRASI,))
+    try:
+        sudah = migrasi_terpasang(conn)
+        diterapkan = []
+        for versi, nama, path in daftar_migrasi(folder):
+            if versi in sudah:
+                continue
+            with open(path, encoding="utf-8") as f:
+                sql = f.read()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql)
+                    cur.execute(
+                        "INSERT INTO schema_migrasi (versi, nama) VALUES (%s, %s)",
+                        (versi, nama),
+                    )
+                conn.commit()
+            except psycopg2.Error as error:
+                conn.rollback()
+                print(f"Migrasi {versi:03d}_{nama} gagal: {error}")
+                raise
+            print(f"Migrasi {versi:03d}_{nama} diterapkan.")
+            diterapkan.append(versi)
+        if diterapkan:
+            # Migrasi bisa memasang ekstensi, cek ulang saat pencarian berikutnya
+            _pg_trgm_aktif.clear()
+        return diterapkan
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (KUNCI_MIGRASI,))
+        conn.commit()
+
+
+# Data contoh untuk cek index, dibuat di dalam transaksi lalu di-rollback
+SEED_CEK_INDEX = """
+    INSERT INTO provinsi (nama_provinsi)
+    SELECT 'cek provinsi ' || g FROM generate_series(1, 500 * %(skala)s) g;
+    INSERT INTO kota (nama_kota)
+    SELECT 'cek kota ' || g FROM generate_series(1, 2000 * %(skala)s) g;
+    INSERT INTO kecamatan (nama_kecamatan)
+    SELECT 'cek kecamatan ' || g FROM generate_series(1, 5000 * %(skala)s) g;
+
+    INSERT INTO alamat (nama_jalan, id_kota, id_kecamatan, id_provinsi)
+    SELECT
+        'cek jalan ' || g,
+        k.ids[1 + g %% array_length(k.ids, 1)],
+        kc.ids[1 + g %% array_length(kc.ids, 1)],
+        p.ids[1 + g %% array_length(p.ids, 1)]
+    FROM generate_series(1, 20000 * %(skala)s) g,
+        (SELECT array_agg(kota_id) AS ids FROM kota) k,
+        (SELECT array_agg(kecamatan_id) AS ids FROM kecamatan) kc,
+        (SELECT array_agg(provinsi_id) AS ids FROM provinsi) p;
+
+    INSERT INTO users (name, username, password)
+    SELECT 'Cek User ' || g, 'cek_user_' || g, 'x'
+    FROM generate_series(1, 20000 * %(skala)s) g;
+
+    INSERT INTO user_roles (id_user, id_role)
+    SELECT u.user_id, r.role_id
+    FROM users u
+    JOIN roles r ON LOWER(r.nama_role) = CASE WHEN u.user_id %% 10 = 0 THEN 'surveyor' ELSE 'petani' END
+    WHERE u.username LIKE 'cek\\_user\\_%%';
+
+    INSERT INTO lahan (id_user_petani, id_alamat, ketinggian)
+    SELECT u.ids[1 + g %% array_length(u.ids, 1)], a.ids[1 + g %% array_length(a.ids, 1)], g %% 3000
+    FROM generate_series(1, 20000 * %(skala)s) g,
+        (SELECT array_agg(user_id) AS ids FROM users WHERE username LIKE 'cek\\_user\\_%%') u,
+        (SELECT array_agg(alamat_id) AS ids FROM alamat WHERE nama_jalan LIKE 'cek jalan %%') a;
+
+    INSERT INTO tanaman (id_tipe_tanaman, nama, ketinggian, ph, kandungan_nutrisi, kondisi_tanah, iklim_id, kelembapan)
+    SELECT 1 + g %% 3, 'cek tanaman ' || g, g %% 3000, 4 + g %% 5, g %% 100, 'Gembur', 1 + g %% 2, g %% 100
+    FROM generate_series(1, 3000 * %(skala)s) g;
+
+    INSERT INTO kondisi_tanah (kondisi_tanah, ph, kandungan_nutrisi, kelembapan)
+    SELECT 'cek', 4 + g %% 5, g %% 100, g %% 100
+    FROM generate_series(1, 100000 * %(skala)s) g;
+
+    INSERT INTO survey_data (id_user_surveyor, id_lahan, id_iklim, id_tanah, id_tanaman, tanggal_survey)
+    SELECT
+        NULL,
+        l.ids[1 + g %% array_length(l.ids, 1)],
+        1 + g %% 2,
+        t.ids[g],
+        NULL,
+        current_date - (g %% 365)
+    FROM generate_series(1, 100000 * %(skala)s) g,
+        (SELECT array_agg(lahan_id) AS ids FROM lahan) l,
+        (SELECT array_agg(kondisi_tanah_id ORDER BY kondisi_tanah_id DESC) AS ids FROM kondisi_tanah) t;
+
+    ANALYZE provinsi, kota, kecamatan, alamat, users, user_roles, roles,
+            lahan, tanaman, kondisi_tanah, survey_data;
+"""
+
+_rencana_tercatat: list[tuple[str, Any]] = []
+
+
+class _CursorRencana(psycopg2.extensions.cursor):
+    """
+    Cursor yang mencatat EXPLAIN dari setiap SELECT sebelum menjalankannya
+    """
+
+    def execute(self, query, vars=None):
+        if query.lstrip().upper().startswith(("SELECT", "WITH")):
+            super().execute("EXPLAIN (FORMAT JSON) " + query, vars)
+            _rencana_tercatat.append((query, self.fetchone()[0]))
+        return super().execute(query, vars)
+
+
+class _KoneksiCek(psycopg2.extensions.connection):
+    """
+    Koneksi untuk cek index: commit diabaikan supaya data contoh
+    tidak pernah tersimpan, semuanya di-rollback di akhir.
+    """
+
+    def commit(self):
+        pass
+
+
+def _seq_scan_di_rencana(node: dict[str, Any]) -> set[str]:
+    tabel = set()
+    if node.get("Node Type") == "Seq Scan":
+        tabel.add(node.get("Relation Name"))
+    for anak in node.get("Plans", []):
+        tabel |= _seq_scan_di_rencana(anak)
+    return tabel
+
+
+def cek_index_query(skala: int = 1) -> bool:
+    """
+    Isi data contoh, lalu jalankan fungsi-fungsi query modul ini dan pastikan
+    tabel yang difilter dibaca lewat index, bukan Seq Scan.
+    Pakai koneksi sendiri yang tidak bisa commit, semua data contoh di-rollback.
+    """
+    conn = get_connection(connection_factory=_KoneksiCek)
+    try:
+        return _cek_index_query(conn, skala)
+    finally:
+        conn.rollback()
+        conn.close()
+        # add_tanaman/delete_tanaman di dalam cek ikut menambal cache
+        CACHE_TANAMAN.invalidasi()
+
+
+def _cek_index_query(conn, skala: int) -> bool:
+    with conn.cursor() as cur:
+        cur.execute(SEED_CEK_INDEX, {"skala": skala})
+        cur.execute(
+            """
+            SELECT
+                (SELECT MIN(l.id_user_petani) FROM lahan l JOIN users u ON u.user_id = l.id_user_petani
+                 WHERE u.username LIKE 'cek\\_user\\_%%'),
+                (SELECT MAX(lahan_id) FROM lahan),
+                (SELECT MAX(tanaman_id) FROM tanaman WHERE nama LIKE 'cek tanaman %%'),
+                (SELECT MIN(survey_id) FROM survey_data WHERE id_lahan IS NOT NULL),
+                (SELECT MAX(user_id) FROM users WHERE username LIKE 'cek\\_user\\_%%')
+            """
+        )
+        petani_id, lahan_id, tanaman_id, survey_id, user_id = cur.fetchone()
+        cur.execute("SELECT nama, id_tipe_tanaman FROM tanaman WHERE tanaman_id = %s", (tanaman_id,))
+        nama_tanaman, tipe_tanaman = cur.fetchone()
+        # Tanaman yang dipakai survey, supaya delete_tanaman berhenti di pengecekan
+        cur.execute("UPDATE survey_data SET id_tanaman = %s WHERE survey_id = %s", (tanaman_id, survey_id))
+        # Lahan diklaim surveyor lain, supaya claim_lahan_for_surveyor tidak update
+        cur.execute("UPDATE lahan SET id_user_surveyor = %s WHERE lahan_id = %s", (user_id, lahan_id))
+
+    petani = {"id": petani_id, "role": "petani"}
+
+    # (nama, fungsi, tabel yang wajib pakai index)
+    daftar_cek = [
+        ("autentikasi", lambda: autentikasi(conn, f"cek_user_{petani_id}", "x", "petani"),
+         {"users", "user_roles"}),
+        ("get_user_by_id", lambda: get_user_by_id(conn, user_id), {"users"}),
+        ("delete_user (user tidak ada)", lambda: delete_user(conn, "cek_user_tidak_ada", "petani"),
+         {"users", "user_roles"}),
+        ("lihat_lahan_universal.petani", lambda: lihat_lahan_universal(conn, petani), {"lahan"}),
+        ("hitung_survey", lambda: hitung_survey(conn, lahan_id), {"lahan"}),
+        ("claim_lahan_for_surveyor (sudah diklaim)",
+         lambda: claim_lahan_for_surveyor(conn, lahan_id, user_id + 1), {"lahan"}),
+        ("hitung_rata_tanah_3_hari_terakhir", lambda: hitung_rata_tanah_3_hari_terakhir(conn, lahan_id),
+         {"statistik_tanah_lahan"}),
+        ("ambil_hasil_survey_petani", lambda: ambil_hasil_survey_petani(conn, petani_id),
+         {"lahan", "survey_data"}),
+        ("add_tanaman (nama kembar)",
+         lambda: add_tanaman(conn, tipe_tanaman, nama_tanaman.upper(), 0, 0, 0, "-", 1, 0),
+         {"tanaman"}),
+        ("delete_tanaman (masih dipakai)", lambda: delete_tanaman(conn, tanaman_id), {"survey_data"}),
+        ("cari_atau_buat_alamat.provinsi", lambda: cari_atau_buat_alamat(conn, "provinsi", "CEK PROVINSI 7"),
+         {"provinsi"}),
+        ("cari_atau_buat_alamat.kota", lambda: cari_atau_buat_alamat(conn, "kota", "Cek Kota 7"), {"kota"}),
+        ("cari_atau_buat_alamat.kecamatan",
+         lambda: cari_atau_buat_alamat(conn, "kecamatan", "cek kecamatan 7"), {"kecamatan"}),
+        ("cari_alamat_master.kecamatan (awalan)",
+         lambda: cari_alamat_master(conn, "kecamatan", "cek kecamatan 4"), {"kecamatan"}),
+        ("kelola_input_lokasi (validasi ID)",
+         lambda: ambil_nama_tabel_alamat(conn, "kecamatan", "kecamatan_id", "nama_kecamatan", 7),
+         {"kecamatan"}),
+        ("hitung_rekomendasi_batch (query rata-rata)",
+         lambda: conn.cursor().execute(
+             QUERY_RATA_TANAH_SEMUA_LAHAN.format(filter="AND st.id_lahan = ANY(%s)"), ([lahan_id], 3)
+         ),
+         {"statistik_tanah_lahan"}),
+    ]
+    for jenis in DATA_LAHAN:
+        daftar_cek.append((
+            f"ambil_halaman_data_lahan.{jenis}",
+            lambda jenis=jenis: ambil_halaman_data_lahan(conn, jenis, 1000),
+            {"survey_data" if jenis == "survey_data" else "lahan" if jenis == "lahan" else "users"},
+        ))
+
+    conn.cursor_factory = _CursorRencana
+    semua_ok = True
+    for nama, fungsi, wajib_index in daftar_cek:
+        _rencana_tercatat.clear()
+        fungsi()
+        seq_scan = set()
+        for _, rencana in _rencana_tercatat:
+            seq_scan |= _seq_scan_di_rencana(rencana[0]["Plan"])
+        gagal = seq_scan & wajib_index
+        if gagal:
+            semua_ok = False
+            print(f"GAGAL {nama}: Seq Scan pada {', '.join(sorted(gagal))}")
+        else:
+            print(f"OK    {nama}")
+
+    return semua_ok
+
+# Benchmark
+
+FILE_SKEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dbUAS.sql")
+TANGGAL_DATA_BENCHMARK = date(2025, 12, 31)
+UKURAN_BLOK_BENCHMARK = 200_000
+
+
+def skala_benchmark(surveys: int) -> dict[str, int]:
+    """
+    Jumlah baris tiap tabel untuk `surveys` survey
+    """
+    lahan = max(10, surveys // 10)
+    petani = max(5, lahan // 5)
+    surveyor = max(2, lahan // 50)
+    return {
+        "surveys": surveys,
+        "lahan": lahan,
+        "petani": petani,
+        "surveyor": surveyor,
+        "provinsi": 34,
+        "kota": min(514, max(5, lahan // 100)),
+        "kecamatan": min(7000, max(10, lahan // 20)),
+        "alamat": lahan + petani + surveyor,
+    }
+
+
+# Data sintetis, random() di-seed dengan setseed() jadi hasilnya sama tiap run.
+# ID dihitung dari urutan insert di database yang masih kosong.
+SQL_DATA_BENCHMARK = [
+    "INSERT INTO provinsi (nama_provinsi) SELECT 'Provinsi ' || g FROM generate_series(1, %(provinsi)s) g",
+    "INSERT INTO kota (nama_kota) SELECT 'Kota ' || g FROM generate_series(1, %(kota)s) g",
+    "INSERT INTO kecamatan (nama_kecamatan) SELECT 'Kecamatan ' || g FROM generate_series(1, %(kecamatan)s) g",
+    """
+    INSERT INTO alamat (nama_jalan, id_kecamatan, id_kota, id_provinsi)
+    SELECT 'Jalan ' || g, kc, kc %% %(kota)s + 1, (kc %% %(kota)s + 1) %% %(provinsi)s + 1
+    FROM (
+        SELECT g, 1 + floor(random() * %(kecamatan)s)::INT AS kc
+        FROM generate_series(1, %(alamat)s) g
+    ) x
+    """,
+    # petani: user_id 4.., surveyor sesudahnya (3 user awal dari dbUAS.sql)
+    """
+    INSERT INTO users (name, username, password, id_alamat)
+    SELECT 'Petani ' || g, 'petani_' || g, '23', %(lahan)s + g
+    FROM generate_series(1, %(petani)s) g
+    """,
+    """
+    INSERT INTO users (name, username, password, id_alamat)
+    SELECT 'Surveyor ' || g, 'surveyor_' || g, '23', %(lahan)s + %(petani)s + g
+    FROM generate_series(1, %(surveyor)s) g
+    """,
+    """
+    INSERT INTO user_roles (id_user, id_role)
+    SELECT u.user_id, r.role_id
+    FROM users u
+    JOIN roles r ON r.nama_role = CASE WHEN u.username LIKE 'petani\\_%%' THEN 'petani' ELSE 'surveyor' END
+    WHERE u.user_id > 3
+    """,
+    # Lahan kelipatan 5 belum diklaim surveyor
+    """
+    INSERT INTO lahan (id_user_petani, id_user_surveyor, id_alamat, ketinggian)
+    SELECT
+        4 + floor(random() * %(petani)s)::INT,
+        CASE WHEN g %% 5 <> 0 THEN 4 + %(petani)s + floor(random() * %(surveyor)s)::INT END,
+        g,
+        round((random() * 3000)::NUMERIC)
+    FROM generate_series(1, %(lahan)s) g
+    """,
+]
+
+SQL_SURVEY_BENCHMARK = [
+    """
+    INSERT INTO kondisi_tanah (kondisi_tanah, ph, kandungan_nutrisi, kelembapan)
+    SELECT
+        (ARRAY['gembur', 'lumpur', 'lempung', 'berpasir'])[1 + floor(random() * 4)::INT],
+        round((4 + random() * 4)::NUMERIC, 1),
+        round((random() * 100)::NUMERIC, 1),
+        round((random() * 100)::NUMERIC, 1)
+    FROM generate_series(%(awal)s, %(akhir)s) g
+    """,
+    """
+    INSERT INTO survey_data (id_user_surveyor, id_lahan, id_iklim, id_tanah, status_survey, tanggal_survey)
+    SELECT l.id_user_surveyor, l.lahan_id, 1 + floor(random() * 2)::INT, x.g, 'waiting',
+           %(tanggal)s::DATE - floor(random() * 365)::INT
+    FROM (
+        SELECT g, 1 + floor(random() * %(lahan)s)::INT AS lahan_acak
+        FROM generate_series(%(awal)s, %(akhir)s) g
+    ) x
+    JOIN lahan l ON l.lahan_id = CASE WHEN x.lahan_acak %% 5 = 0 THEN x.lahan_acak - 1 ELSE x.lahan_acak END
+    ORDER BY x.g
+    """,
+]
+
+
+def siapkan_database_benchmark(nama_database: str, surveys: int, seed: int) -> dict[str, int]:
+    """
+    Buat ulang database benchmark: skema dbUAS.sql + migrasi + data sintetis
+    """
+    skala = skala_benchmark(surveys)
+
+    DB_CONFIG['database'] = "postgres"
+    admin = get_connection()
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{nama_database}" WITH (FORCE)')
+        cur.execute(f'CREATE DATABASE "{nama_database}"')
+    admin.close()
+    DB_CONFIG['database'] = nama_database
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur, open(FILE_SKEMA, encoding="utf-8") as f:
+            cur.execute(f.read())
+        conn.commit()
+        jalankan_migrasi(conn)
+
+        with conn.cursor() as cur:
+            # setseed butuh nilai -1..1
+            cur.execute("SELECT setseed(%s)", ((seed % 1000) / 1000,))
+            for sql in SQL_DATA_BENCHMARK:
+                cur.execute(sql, skala)
+            conn.commit()
+
+            for awal in range(1, surveys + 1, UKURAN_BLOK_BENCHMARK):
+                akhir = min(surveys, awal + UKURAN_BLOK_BENCHMARK - 1)
+                params = dict(skala, awal=awal, akhir=akhir, tanggal=TANGGAL_DATA_BENCHMARK)
+                for sql in SQL_SURVEY_BENCHMARK:
+                    cur.execute(sql, params)
+                conn.commit()
+                print(f"  {akhir}/{surveys} survey dibuat")
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("VACUUM ANALYZE")
+    finally:
+        conn.close()
+    return skala
+
+
+def _jumlah_baris(hasil: Any) -> int:
+    if hasil is None:
+        return 0
+    if isinstance(hasil, (list, tuple)):
+        return len(hasil)
+    return 1
+
+
+def daftar_kasus_benchmark(conn, skala: dict[str, int], acak) -> list[tuple[str, int, Any]]:
+    """
+    (nama, jumlah ulang relatif, fungsi tanpa argumen) untuk tiap query yang diukur.
+    Parameter tiap panggilan diambil acak (seeded) dari data sintetis.
+    """
+    petani = lambda: 4 + acak.randrange(skala["petani"])
+    surveyor = lambda: 4 + skala["petani"] + acak.randrange(skala["surveyor"])
+    lahan = lambda: 1 + acak.randrange(skala["lahan"])
+    # lahan kelipatan 5 tidak punya survey (lihat SQL_DATA_BENCHMARK)
+    lahan_disurvey = lambda: (lambda l: l - 1 if l % 5 == 0 else l)(1 + acak.randrange(skala["lahan"]))
+
+    def login():
+        i = 1 + acak.randrange(skala["petani"])
+        return autentikasi(conn, f"petani_{i}", "23", "petani")
+
+    def halaman(jenis):
+        kunci = {"petani": petani, "lahan": lahan, "survey_data": lambda: acak.randrange(skala["surveys"])}
+        return lambda: ambil_halaman_data_lahan(conn, jenis, kunci[jenis](), UKURAN_HALAMAN)
+
+    def hasil_survey_petani():
+        rows = ambil_hasil_survey_petani(conn, petani())
+        ambil_statistik_tanah(conn, list({row[0] for row in rows}))
+        return rows
+
+    def kriteria():
+        return (acak.uniform(0, 3000), acak.uniform(4, 8), acak.uniform(0, 100), acak.uniform(0, 100),
+                acak.randint(1, 2))
+
+    return [
+        ("login", 1, login),
+        ("lihat_lahan_universal.petani", 1, lambda: lihat_lahan_universal(conn, {"role": "petani", "id": petani()})),
+        ("lihat_lahan_universal.surveyor", 1,
+         lambda: lihat_lahan_universal(conn, {"role": "surveyor", "id": surveyor()})),
+        # admin membaca semua lahan, jadi diulang lebih sedikit
+        ("lihat_lahan_universal.admin", 0, lambda: lihat_lahan_universal(conn, {"role": "admin", "id": 1})),
+        ("lihat_data_lahan.halaman.petani", 1, halaman("petani")),
+        ("lihat_data_lahan.halaman.lahan", 1, halaman("lahan")),
+        ("lihat_data_lahan.halaman.survey_data", 1, halaman("survey_data")),
+        ("lihat_data_lahan.stream.lahan", 0, lambda: list(iter_data_lahan(conn, "lahan"))),
+        ("lihat_hasil_survey_petani", 1, hasil_survey_petani),
+        ("hitung_rata_tanah_3_hari_terakhir", 1, lambda: hitung_rata_tanah_3_hari_terakhir(conn, lahan_disurvey())),
+        ("cocokin_tanaman", 1, lambda: cocokin_tanaman(conn, *kriteria())[0]),
+        ("cari_tanaman_terdekat", 1, lambda: cari_tanaman_terdekat(conn, *kriteria())),
+        ("hitung_rekomendasi.lahan", 1, lambda: hitung_rekomendasi(conn, [lahan_disurvey()])),
+    ]
+
+
+def jalankan_benchmark(conn, skala: dict[str, int], ulang: int, seed: int) -> dict[str, dict[str, float]]:
+    """
+    Ukur latency tiap kasus (setelah pemanasan), hasilnya p50/p95/p99 dan baris per detik
+    """
+    import random
+
+    acak = random.Random(seed)
+    hasil = {}
+    for nama, bobot, fungsi in daftar_kasus_benchmark(conn, skala, acak):
+        jumlah = ulang if bobot else max(3, ulang // 10)
+        fungsi()  # pemanasan (cache katalog, plan, buffer)
+        conn.rollback()
+
+        waktu = []
+        baris = 0
+        for _ in range(jumlah):
+            mulai = time.perf_counter()
+            baris += _jumlah_baris(fungsi())
+            waktu.append(time.perf_counter() - mulai)
+            conn.rollback()
+
+        waktu_ms = np.asarray(waktu) * 1000
+        p50, p95, p99 = np.percentile(waktu_ms, [50, 95, 99])
+        hasil[nama] = {
+            "n": jumlah,
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "rata_ms": round(float(waktu_ms.mean()), 3),
+            "baris": baris,
+            "baris_per_detik": round(baris / (waktu_ms.sum() / 1000), 1) if waktu_ms.sum() else 0.0,
+        }
+        print(
+            f"{nama:<40} p50 {p50:9.2f} ms  p95 {p95:9.2f} ms  "
+            f"{hasil[nama]['baris_per_detik']:>12,.0f} baris/s"
+        )
+    return hasil
+
+
+def bandingkan_benchmark(
+    lama: dict[str, Any],
+    baru: dict[str, Any],
+    ambang: float,
+    min_selisih_ms: float = 0.1,
+) -> bool:
+    """
+    Cetak perbandingan p50/p95 dua hasil benchmark.
+    Selisih di bawah min_selisih_ms dianggap noise.
+    :return: False kalau ada query yang melambat lebih dari `ambang` kali
+    """
+    ok = True
+    if lama["meta"].get("skala") != baru["meta"].get("skala"):
+        print("Perhatian: skala data kedua run berbeda, perbandingan kurang adil.")
+
+    print(f"\n{'query':<40} {'p50 lama':>10} {'p50 baru':>10} {'rasio':>7} {'p95 rasio':>10}")
+    for nama, b in baru["hasil"].items():
+        a = lama["hasil"].get(nama)
+        if a is None:
+            print(f"{nama:<40} {'-':>10} {b['p50_ms']:>10.2f}   (baru)")
+            continue
+        rasio = b["p50_ms"] / a["p50_ms"] if a["p50_ms"] else float("inf")
+        rasio95 = b["p95_ms"] / a["p95_ms"] if a["p95_ms"] else float("inf")
+        tanda = ""
+        if abs(b["p50_ms"] - a["p50_ms"]) < min_selisih_ms:
+            pass
+        elif rasio > ambang:
+            tanda = "  LEBIH LAMBAT"
+            ok = False
+        elif rasio < 1 / ambang:
+            tanda = "  lebih cepat"
+        print(f"{nama:<40} {a['p50_ms']:>10.2f} {b['p50_ms']:>10.2f} {rasio:>7.2f} {rasio95:>10.2f}{tanda}")
+    return ok
+
+# Uji beban
+
+# Perbandingan jumlah sesi per role, bisa diganti lewat --mix
+MIX_UJI_BEBAN = {"surveyor": 5, "petani": 4, "admin": 1}
+
+QUERY_TUNGGU_LOCK = """
+    SELECT
+        (SELECT COUNT(*) FROM pg_locks l
+         JOIN pg_database d ON d.oid = l.database
+         WHERE NOT l.granted AND d.datname = current_database()),
+        (SELECT COUNT(*) FROM pg_stat_activity
+         WHERE datname = current_database() AND wait_event_type = 'Lock'),
+        (SELECT deadlocks FROM pg_stat_database WHERE datname = current_database())
+"""
+
+
+class SesiUjiBeban:
+    """
+    Satu pengguna simulasi dengan koneksi sendiri (seperti satu terminal menu).
+    Tiap langkah memanggil fungsi yang sama dengan menu role-nya.
+    """
+
+    def __init__(self, role: str, skala: dict[str, int], acak, metrik: MetrikLatensi):
+        self.role = role
+        self.skala = skala
+        self.acak = acak
+        self.metrik = metrik
+        self.conn = get_connection()
+        self.user: dict[str, Any] | None = None
+
+    def _ukur(self, nama: str, fungsi, *args):
+        mulai = time.perf_counter()
+        status = 200
+        try:
+            return fungsi(*args)
+        except psycopg2.Error:
+            status = 500
+            self.conn.rollback()
+            return None
+        finally:
+            self.metrik.catat(f"{self.role}.{nama}", time.perf_counter() - mulai, status)
+
+    def login(self) -> None:
+        jumlah = self.skala["surveyor"] if self.role == "surveyor" else self.skala["petani"]
+        if self.role == "admin":
+            username = "ejak"
+        else:
+            username = f"{self.role}_{1 + self.acak.randrange(jumlah)}"
+        self.user = self._ukur("login", autentikasi, self.conn, username, "23", self.role)
+
+    def langkah(self) -> None:
+        if self.user is None:
+            self.login()
+            return
+        getattr(self, f"langkah_{self.role}")()
+
+    def langkah_surveyor(self) -> None:
+        # menu_surveyor opsi 1: lihat lahan, pilih/ambil lahan, analisis, submit_survey
+        acak, conn, surveyor_id = self.acak, self.conn, self.user["id"]
+        lahan = self._ukur("lihat_lahan", lihat_lahan_universal, conn, self.user) or []
+        milik = {row[0]: row[9] for row in lahan if row[2] == surveyor_id}
+
+        if milik and acak.random() < 0.9:
+            lahan_id = acak.choice(list(milik))
+            jumlah_survey = milik[lahan_id]
+        else:
+            lahan_id = self._ukur("klaim_berikutnya", claim_lahan_berikutnya, conn, surveyor_id)
+            if lahan_id is None:
+                return
+            jumlah_survey = self._ukur("hitung_survey", hitung_survey, conn, lahan_id)
+        conn.rollback()
+        if jumlah_survey is None:
+            # hitung_survey gagal (lock/deadlock), sudah tercatat sebagai error
+            return
+
+        kriteria = (acak.uniform(0, 3000), acak.uniform(4, 8), acak.uniform(0, 100), acak.uniform(0, 100))
+        id_iklim = acak.randint(1, 2)
+        status = "waiting"
+        if jumlah_survey >= 2:
+            self._ukur("cocokin_tanaman", cocokin_tanaman, conn, *kriteria, id_iklim)
+            status = "selesai"
+        self._ukur(
+            "submit_survey", submit_survey, conn,
+            lahan_id, surveyor_id, id_iklim, "gembur", *kriteria[1:], kriteria[0], None, status,
+        )
+
+    def langkah_petani(self) -> None:
+        # menu_petani: sesekali input lahan baru, lebih sering lihat lahan & hasil survey
+        acak, conn, petani_id = self.acak, self.conn, self.user["id"]
+        if acak.random() < 0.05:
+            id_alamat = self._ukur(
+                "add_alamat", add_alamat, conn, "Jalan uji beban",
+                1 + acak.randrange(self.skala["kota"]),
+                1 + acak.randrange(self.skala["kecamatan"]),
+                1 + acak.randrange(self.skala["provinsi"]),
+            )
+            if id_alamat is not None:
+                self._ukur("add_lahan", add_lahan, conn, petani_id, None, id_alamat, None)
+        elif acak.random() < 0.5:
+            self._ukur("lihat_lahan", lihat_lahan_universal, conn, self.user)
+        else:
+            rows = self._ukur("hasil_survey", ambil_hasil_survey_petani, conn, petani_id) or []
+            self._ukur("statistik_tanah", ambil_statistik_tanah, conn, list({row[0] for row in rows}))
+        conn.rollback()
+
+    def langkah_admin(self) -> None:
+        # menu_admin: lihat user dan overview data per halaman
+        acak, conn = self.acak, self.conn
+        if acak.random() < 0.3:
+            self._ukur("lihat_user", read_all_users, conn)
+        else:
+            jenis = acak.choice(list(DATA_LAHAN))
+            setelah = None
+            for _ in range(acak.randint(1, 3)):
+                rows = self._ukur(f"halaman_{jenis}", ambil_halaman_data_lahan, conn, jenis, setelah)
+                if not rows:
+                    break
+                setelah = rows[-1][0]
+        conn.rollback()
+
+    def tutup(self) -> None:
+        self.conn.close()
+
+
+def jalankan_uji_beban(
+    skala: dict[str, int],
+    sesi: int,
+    durasi: float,
+    jeda_ms: float,
+    mix: dict[str, int],
+    seed: int,
+) -> dict[str, Any]:
+    """
+    Jalankan `sesi` pengguna serentak selama `durasi` detik.
+    Jeda antar langkah acak eksponensial dengan rata-rata jeda_ms (waktu mikir pengguna).
+    Lock yang menunggu di database disampling tiap 100 ms.
+    """
+    import random
+
+    metrik = MetrikLatensi(maks_sampel=1_000_000)
+    acak_utama = random.Random(seed)
+    daftar_role = [role for role, bobot in mix.items() for _ in range(bobot)]
+    roles = [daftar_role[i % len(daftar_role)] for i in range(sesi)]
+    acak_utama.shuffle(roles)
+
+    berhenti = threading.Event()
+    lock_sampel: list[tuple[int, int]] = []
+    pemantau = get_connection()
+    pemantau.autocommit = True
+    with pemantau.cursor() as cur:
+        cur.execute(QUERY_TUNGGU_LOCK)
+        deadlock_awal = cur.fetchone()[2]
+
+    def pantau():
+        with pemantau.cursor() as cur:
+            while not berhenti.wait(0.1):
+                cur.execute(QUERY_TUNGGU_LOCK)
+                lock_tunggu, sesi_tunggu, _ = cur.fetchone()
+                lock_sampel.append((lock_tunggu, sesi_tunggu))
+
+    def jalankan_sesi(role: str, seed_sesi: int) -> int:
+        sesi_uji = SesiUjiBeban(role, skala, random.Random(seed_sesi), metrik)
+        langkah = 0
+        try:
+            while not berhenti.is_set():
+                sesi_uji.langkah()
+                langkah += 1
+                if jeda_ms:
+                    berhenti.wait(sesi_uji.acak.expovariate(1000 / jeda_ms))
+        finally:
+            sesi_uji.tutup()
+        return langkah
+
+    thread_pantau = threading.Thread(target=pantau, daemon=True)
+    thread_pantau.start()
+    mulai = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sesi) as executor:
+        futures = [
+            executor.submit(jalankan_sesi, role, acak_utama.randrange(2**32)) for role in roles
+        ]
+        berhenti.wait(durasi)
+        berhenti.set()
+        total_langkah = sum(f.result() for f in futures)
+    lama = time.perf_counter() - mulai
+    thread_pantau.join()
+
+    with pemantau.cursor() as cur:
+        cur.execute(QUERY_TUNGGU_LOCK)
+        deadlock_akhir = cur.fetchone()[2]
+    pemantau.close()
+
+    ringkasan = metrik.ringkasan()
+    operasi = sum(r["jumlah"] for r in ringkasan.values())
+    lock_tunggu = [l for l, _ in lock_sampel] or [0]
+    sesi_tunggu = [s for _, s in lock_sampel] or [0]
+    return {
+        "sesi": dict((role, roles.count(role)) for role in mix),
+        "durasi_detik": round(lama, 2),
+        "langkah": total_langkah,
+        "operasi": operasi,
+        "operasi_per_detik": round(operasi / lama, 1),
+        "langkah_per_detik": round(total_langkah / lama, 1),
+        "error": sum(r["error"] for r in ringkasan.values()),
+        "lock": {
+            "sampel": len(lock_sampel),
+            "sampel_ada_tunggu": sum(1 for l in lock_tunggu if l),
+            "lock_tunggu_rata": round(float(np.mean(lock_tunggu)), 2),
+            "lock_tunggu_maks": int(max(lock_tunggu)),
+            "sesi_tunggu_maks": int(max(sesi_tunggu)),
+            "deadlock": deadlock_akhir - deadlock_awal,
+        },
+        "operasi_detail": ringkasan,
+    }
+
+# Perintah tanpa menu interaktif
+
+def perintah_recommend_batch(args) -> int:
+    with get_pool().koneksi() as conn:
+        hasil = hitung_rekomendasi_batch(conn, args.lahan or None, args.min_survey)
+    print(f"{hasil['lahan']} lahan dihitung, {hasil['rekomendasi']} rekomendasi tersimpan.")
+    return 0
+
+
+def perintah_recommend(args) -> int:
+    with get_pool().koneksi() as conn:
+        hasil = hitung_rekomendasi(conn, args.lahan, args.min_survey)
+        conn.rollback()
+
+    ada = {row[0] for row, _, _ in hasil}
+    for lahan_id in args.lahan:
+        if lahan_id not in ada:
+            print(f"Lahan {lahan_id}: belum ada {args.min_survey} survey, belum bisa direkomendasikan.")
+
+    for (lahan_id, ketinggian, ph, nutrisi, kelembapan, id_iklim), recommended, _ in hasil:
+        print(
+            f"Lahan {lahan_id} (ketinggian {display(ketinggian)}, pH {ph:.2f}, "
+            f"nutrisi {nutrisi:.2f}, kelembapan {kelembapan:.2f}, iklim {id_iklim}):"
+        )
+        if not recommended:
+            print("  Tidak ada tanaman yang direkomendasikan.")
+        for peringkat, (tanaman_id, nama) in enumerate(recommended, start=1):
+            print(f"  {peringkat}. {nama} (ID {tanaman_id})")
+    return 0 if len(ada) == len(set(args.lahan)) else 1
+
+
+def perintah_list_lahan(args) -> int:
+    if args.petani is not None:
+        user = {"role": "petani", "id": args.petani}
+    elif args.surveyor is not None:
+        user = {"role": "surveyor", "id": args.surveyor}
+    else:
+        user = {"role": "admin", "id": None}
+
+    with get_pool().koneksi() as conn:
+        rows = lihat_lahan_universal(conn, user)
+        conn.rollback()
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(dict(zip(KOLOM_LAHAN, row)), default=str))
+    else:
+        simpel_lahan_print(rows)
+    return 0
+
+
+# Kode yang diukur startup-check: import modul dan susun parser, tanpa koneksi database
+KODE_CEK_STARTUP = """
+import json, sys, time
+mulai = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import projekFinal
+projekFinal.buat_parser_perintah()
+print(json.dumps({
+    "import_ms": (time.perf_counter() - mulai) * 1000,
+    "modul_tampilan": [m for m in projekFinal.MODUL_TAMPILAN if m in sys.modules],
+}))
+"""
+
+
+def perintah_startup_check(args) -> int:
+    import subprocess
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    hasil = []
+    for _ in range(args.ulang):
+        mulai = time.perf_counter()
+        keluaran = subprocess.run(
+            [sys.executable, "-c", KODE_CEK_STARTUP, folder],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        data = json.loads(keluaran)
+        data["total_ms"] = (time.perf_counter() - mulai) * 1000
+        hasil.append(data)
+
+    total = float(np.median([h["total_ms"] for h in hasil]))
+    impor = float(np.median([h["import_ms"] for h in hasil]))
+    tampilan = sorted({m for h in hasil for m in h["modul_tampilan"]})
+
+    print(f"Startup (median {args.ulang}x): {total:.1f} ms total, {impor:.1f} ms import modul")
+    ok = True
+    if tampilan:
+        print(f"GAGAL: modul tampilan ikut diimport: {', '.join(tampilan)}")
+        ok = False
+    if total > args.budget_ms:
+        print(f"GAGAL: melebihi budget {args.budget_ms:.0f} ms")
+        ok = False
+    if ok:
+        print(f"OK, di bawah budget {args.budget_ms:.0f} ms")
+    return 0 if ok else 1
+
+
+def _cek_klaim_lahan(conn, jumlah_lahan: int, threads: int) -> bool:
+    pool = get_pool()
+    token = secrets.token_hex(3)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO kecamatan (nama_kecamatan) VALUES (%s) RETURNING kecamatan_id",
+            (f"cek klaim {token}",),
+        )
+        kecamatan_id = cur.fetchone()[0]
+        cur.execute(
+            "INSERT INTO alamat (nama_jalan, id_kecamatan) VALUES (%s, %s) RETURNING alamat_id",
+            (f"cek klaim {token}", kecamatan_id),
+        )
+        alamat_id = cur.fetchone()[0]
+        cur.execute(
+            """
+            INSERT INTO users (name, username, password)
+            SELECT 'cek klaim', 'cek_klaim_' || %s || '_' || g, '-'
+            FROM generate_series(1, %s) g
+            RETURNING user_id
+            """,
+            (token, threads),
+        )
+        surveyor_ids = [r[0] for r in cur.fetchall()]
+        cur.execute(
+            """
+            INSERT INTO lahan (id_alamat)
+            SELECT %s FROM generate_series(1, %s)
+            RETURNING lahan_id
+            """,
+            (alamat_id, jumlah_lahan),
+        )
+        lahan_ids = [r[0] for r in cur.fetchall()]
+    conn.commit()
+
+    def serentak(fungsi, *args):
+        # Semua thread menunggu di barrier supaya benar-benar mulai bersamaan
+        barrier = threading.Barrier(threads)
+
+        def kerja(surveyor_id):
+            barrier.wait()
+            return pool.jalankan(fungsi, surveyor_id, *args)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(kerja, surveyor_ids))
+
+    def klaim_sampai_habis(conn_thread, surveyor_id):
+        didapat = []
+        while True:
+            lahan_id = claim_lahan_berikutnya(conn_thread, surveyor_id, kecamatan_id, "kecamatan")
+            if lahan_id is None:
+                return didapat
+            didapat.append(lahan_id)
+
+    try:
+        semua_ok = True
+
+        # 1. Semua surveyor rebutan satu lahan lewat claim_lahan_for_surveyor
+        rebutan = lahan_ids[0]
+        hasil = serentak(lambda c, s: claim_lahan_for_surveyor(c, rebutan, s))
+        menang = sum(hasil)
+        ok = menang == 1
+        semua_ok &= ok
+        print(f"{'OK   ' if ok else 'GAGAL'} claim_lahan_for_surveyor: {menang} dari {threads} surveyor menang")
+
+        # 2. Semua surveyor ambil lahan berikutnya sampai habis
+        mulai = time.perf_counter()
+        hasil = serentak(klaim_sampai_habis)
+        durasi = time.perf_counter() - mulai
+        didapat = [(lahan_id, surveyor_id) for surveyor_id, daftar in zip(surveyor_ids, hasil) for lahan_id in daftar]
+        dobel = len(didapat) - len({lahan_id for lahan_id, _ in didapat})
+
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT lahan_id, id_user_surveyor FROM lahan WHERE lahan_id = ANY(%s)",
+                (lahan_ids,),
+            )
+            pemilik = dict(cur.fetchall())
+        conn.rollback()
+        beda = sum(1 for lahan_id, surveyor_id in didapat if pemilik[lahan_id] != surveyor_id)
+        sisa = sum(1 for surveyor_id in pemilik.values() if surveyor_id is None)
+
+        ok = dobel == 0 and beda == 0 and sisa == 0 and len(didapat) == jumlah_lahan - 1
+        semua_ok &= ok
+        print(
+            f"{'OK   ' if ok else 'GAGAL'} claim_lahan_berikutnya: {len(didapat)} klaim "
+            f"untuk {jumlah_lahan - 1} lahan, {dobel} dobel, {beda} pemilik beda, {sisa} tersisa "
+            f"({len(didapat) / durasi:.0f} klaim/detik)"
+        )
+        return semua_ok
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM lahan WHERE lahan_id = ANY(%s)", (lahan_ids,))
+            cur.execute("DELETE FROM users WHERE user_id = ANY(%s)", (surveyor_ids,))
+            cur.execute("DELETE FROM alamat WHERE alamat_id = %s", (alamat_id,))
+            cur.execute("DELETE FROM kecamatan WHERE kecamatan_id = %s", (kecamatan_id,))
+        conn.commit()
+
+
+def perintah_tanaman_check(args) -> int:
+    return 0 if _cek_indeks_tanaman(args.tanaman, args.query, args.k, args.seed) else 1
+
+
+def perintah_claim_check(args) -> int:
+    POOL_CONFIG["max_koneksi"] = max(POOL_CONFIG["max_koneksi"], args.threads + 1)
+    with get_pool().koneksi() as conn:
+        return 0 if _cek_klaim_lahan(conn, args.lahan, args.threads) else 1
+
+
+def perintah_migrate(args) -> int:
+    with get_pool().koneksi() as conn:
+        if args.status:
+            sudah = migrasi_terpasang(conn)
+            for versi, nama, _ in daftar_migrasi():
+                status = f"diterapkan {sudah[versi]}" if versi in sudah else "belum"
+                print(f"{versi:03d}_{nama}: {status}")
+            return 0
+
+        diterapkan = jalankan_migrasi(conn)
+        if not diterapkan:
+            print("Skema sudah versi terbaru.")
+    if args.cek:
+        return 0 if cek_index_query(args.skala) else 1
+    return 0
+
+
+def perintah_import_surveys(args) -> int:
+    total_ditolak = 0
+    with get_pool().koneksi() as conn:
+        for path in args.file:
+            hasil = import_survey(conn, baca_file_survey(path, args.format))
+            print(f"{path}: {hasil['diimpor']} dari {hasil['dibaca']} survey diimpor.")
+            for no_baris, alasan in hasil["ditolak"]:
+                print(f"  baris {no_baris}: {alasan}")
+            total_ditolak += len(hasil["ditolak"])
+
+            if hasil["lahan"] and not args.tanpa_rekomendasi:
+                rekom = hitung_rekomendasi_batch(conn, hasil["lahan"])
+                print(f"  Rekomendasi {rekom['lahan']} lahan diperbarui.")
+    return 1 if total_ditolak else 0
+
+
+def perintah_offline_prepare(args) -> int:
+    password = args.password if args.password is not None else input("Password: ").strip()
+    with get_pool().koneksi() as conn:
+        user = autentikasi(conn, args.username, password, "surveyor")
+        if user is None:
+            print("Username/password salah atau bukan surveyor.")
+            return 1
+        jurnal = buka_jurnal_offline(args.file)
+        try:
+            jumlah = siapkan_offline(conn, jurnal, user)
+        finally:
+            jurnal.close()
+    if jumlah is None:
+        return 1
+    print(
+        f"{args.file} siap dipakai offline: {jumlah['lahan']} lahan, "
+        f"{jumlah['tanaman']} tanaman, {jumlah['iklim']} iklim."
+    )
+    return 0
+
+
+def perintah_offline_survey(args) -> int:
+    if not os.path.exists(args.file):
+        print(f"{args.file} belum ada, jalankan dulu: python projekFinal.py offline-prepare --username ...")
+        return 1
+    siapkan_terminal()
+    jurnal = buka_jurnal_offline(args.file)
+    try:
+        menu_surveyor_offline(jurnal)
     except KeyboardInterrupt:
+        print("\nKeluar dari mode offline")
+    finally:
+        jurnal.close()
+    return 0
+
+
+def perintah_sync(args) -> int:
+    if not os.path.exists(args.file):
+        print(f"{args.file} tidak ada.")
+        return 1
+    jurnal = buka_jurnal_offline(args.file)
+    try:
+        with get_pool().koneksi() as conn:
+            mulai = time.perf_counter()
+            hasil = sync_offline(conn, jurnal, args.batch)
+            lama = time.perf_counter() - mulai
+            print(f"{hasil['terkirim']} survey terkirim dalam {lama:.2f} detik.")
+            konflik_lahan: dict[int, int] = {}
+            for _, lahan_id in hasil["konflik"]:
+                konflik_lahan[lahan_id] = konflik_lahan.get(lahan_id, 0) + 1
+            for lahan_id, jumlah in sorted(konflik_lahan.items()):
+                print(f"  KONFLIK lahan {lahan_id}: sudah diambil surveyor lain, {jumlah} survey tidak dikirim")
+            for id_klien, alasan in hasil["ditolak"]:
+                print(f"  DITOLAK survey {id_klien}: {alasan}")
+
+            if hasil["lahan"] and not args.tanpa_rekomendasi:
+                rekom = hitung_rekomendasi_batch(conn, hasil["lahan"])
+                print(f"Rekomendasi {rekom['lahan']} lahan diperbarui.")
+
+            info = info_offline(jurnal)
+            user = {"id": int(info["surveyor_id"]), "username": info["username"], "role": "surveyor"}
+            if siapkan_offline(conn, jurnal, user) is not None:
+                print("Salinan lahan dan katalog tanaman diperbarui.")
+    finally:
+        jurnal.close()
+    return 1 if hasil["konflik"] or hasil["ditolak"] else 0
+
+
+def perintah_dashboard_refresh(args) -> int:
+    with get_pool().koneksi() as conn:
+        hasil = refresh_dashboard(conn, penuh=args.penuh)
+    print(
+        f"Dashboard diperbarui: {hasil['survey_baru']} survey baru, "
+        f"watermark survey_id {hasil['watermark']}, {hasil['detik']} detik."
+    )
+    return 0
+
+
+def _id_wilayah(conn, jenis: str, nilai: str | None) -> int | None:
+    """ID provinsi/kota/kecamatan dari ID atau nama (tanpa beda huruf besar/kecil)"""
+    if nilai is None:
+        return None
+    tabel, id_col, nama_col = ALAMAT_MASTER_CONFIG[jenis]
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT {id_col} FROM {tabel} WHERE {id_col}::TEXT = %s OR LOWER({nama_col}) = LOWER(%s)",
+            (nilai, nilai),
+        )
+        row = cur.fetchone()
+    if row is None:
+        raise ValueError(f"{jenis.capitalize()} '{nilai}' tidak ditemukan.")
+    return row[0]
+
+
+def _jalankan_hapus(args, hapus) -> int:
+    """Tampilkan hitungan dulu (rollback), hapus sungguhan setelah dikonfirmasi atau --ya"""
+    hasil = hapus(coba=True)
+    if hasil is None:
+        return 1
+    cetak_hasil_hapus(hasil, coba=True)
+    if args.coba:
+        return 0
+    if not args.ya and input("Lanjut hapus? (y/n): ").strip().lower() != "y":
+        print("Batal.")
+        return 0
+    hasil = hapus(coba=False)
+    if hasil is None:
+        return 1
+    cetak_hasil_hapus(hasil)
+    return 0
+
+
+def perintah_hapus_lahan(args) -> int:
+    with get_pool().koneksi() as conn:
+        try:
+            wilayah = {jenis: _id_wilayah(conn, jenis, getattr(args, jenis)) for jenis in TINGKAT_LOKASI}
+        except ValueError as e:
+            print(e)
+            return 2
+        return _jalankan_hapus(
+            args,
+            lambda coba: hapus_lahan_massal(
+                conn,
+                lahan_ids=args.lahan,
+                id_kecamatan=wilayah["kecamatan"],
+                id_kota=wilayah["kota"],
+                id_provinsi=wilayah["provinsi"],
+                id_petani=args.petani,
+                coba=coba,
+            ),
+        )
+
+
+def perintah_hapus_user(args) -> int:
+    with get_pool().koneksi() as conn:
+        return _jalankan_hapus(
+            args,
+            lambda coba: hapus_user_massal(
+                conn,
+                user_ids=args.user,
+                usernames=args.username,
+                role=args.role,
+                tidak_aktif_hari=args.tidak_aktif,
+                coba=coba,
+            ),
+        )
+
+
+def perintah_export(args) -> int:
+    try:
+        dari = date.fromisoformat(args.dari) if args.dari else None
+        sampai = date.fromisoformat(args.sampai) if args.sampai else None
+    except ValueError:
+        print("Tanggal harus format YYYY-MM-DD.")
+        return 2
+
+    format_file = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    kondisi, params = kondisi_export(args.jenis, args.provinsi, args.kota, dari, sampai)
+    with get_pool().koneksi() as conn:
+        if format_file == "parquet":
+            total = export_parquet(conn, args.jenis, args.output, kondisi, params)
+        else:
+            total = export_csv(conn, args.jenis, args.output, kondisi, params)
+        conn.rollback()
+
+    if total is None:
+        return 1
+    print(f"{total} baris {args.jenis} diexport ke {args.output}.")
+    return 0
+
+
+def perintah_benchmark(args) -> int:
+    if args.database == DB_CONFIG['database']:
+        print(f"Database benchmark dibuat ulang, jangan pakai database utama '{args.database}'.")
+        return 2
+
+    if args.pakai_data:
+        DB_CONFIG['database'] = args.database
+        skala = skala_benchmark(args.surveys)
+    else:
+        print(f"Membuat data benchmark di '{args.database}' ({args.surveys} survey, seed {args.seed})...")
+        skala = siapkan_database_benchmark(args.database, args.surveys, args.seed)
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SHOW server_version")
+            versi_pg = cur.fetchone()[0]
+        conn.rollback()
+        hasil = jalankan_benchmark(conn, skala, args.ulang, args.seed)
+    finally:
+        conn.close()
+        CACHE_TANAMAN.invalidasi()
+
+    laporan = {
+        "meta": {
+            "waktu": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+            "ulang": args.ulang,
+            "skala": skala,
+            "python": sys.version.split()[0],
+            "postgresql": versi_pg,
+        },
+        "hasil": hasil,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(laporan, f, indent=2)
+        print(f"Hasil disimpan di {args.output}")
+
+    if args.bandingkan:
+        with open(args.bandingkan, encoding="utf-8") as f:
+            lama = json.load(f)
+        return 0 if bandingkan_benchmark(lama, laporan, args.ambang, args.min_selisih_ms) else 1
+    return 0
+
+
+def perintah_loadtest(args) -> int:
+    if args.database == DB_CONFIG['database']:
+        print(f"Uji beban menulis data, jangan pakai database utama '{args.database}'.")
+        return 2
+    try:
+        mix = {}
+        for bagian in args.mix.split(","):
+            role, bobot = bagian.split("=")
+            mix[role.strip()] = int(bobot)
+    except ValueError:
+        print("Format --mix: surveyor=5,petani=4,admin=1")
+        return 2
+    if not set(mix) <= set(MIX_UJI_BEBAN) or not any(mix.values()):
+        print(f"Role --mix harus dari: {', '.join(MIX_UJI_BEBAN)}")
+        return 2
+    mix = {role: bobot for role, bobot in mix.items() if bobot > 0}
+
+    if args.siapkan:
+        print(f"Membuat data di '{args.database}' ({args.surveys} survey, seed {args.seed})...")
+        skala = siapkan_database_benchmark(args.database, args.surveys, args.seed)
+    else:
+        DB_CONFIG['database'] = args.database
+        skala = skala_benchmark(args.surveys)
+
+    print(f"{args.sesi} sesi selama {args.durasi:.0f} detik, jeda rata-rata {args.jeda_ms:.0f} ms...")
+    hasil = jalankan_uji_beban(skala, args.sesi, args.durasi, args.jeda_ms, mix, args.seed)
+    CACHE_TANAMAN.invalidasi()
+
+    print(f"\nSesi: {hasil['sesi']}")
+    print(
+        f"Throughput: {hasil['operasi_per_detik']} operasi/detik, "
+        f"{hasil['langkah_per_detik']} langkah menu/detik, {hasil['error']} error"
+    )
+    lock = hasil["lock"]
+    print(
+        f"Lock: {lock['sampel_ada_tunggu']} dari {lock['sampel']} sampel ada yang menunggu, "
+        f"rata-rata {lock['lock_tunggu_rata']}, maks {lock['lock_tunggu_maks']} lock "
+        f"({lock['sesi_tunggu_maks']} sesi), {lock['deadlock']} deadlock"
+    )
+    print(f"\n{'operasi':<34} {'jumlah':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'maks ms':>9}")
+    for nama, r in sorted(hasil["operasi_detail"].items()):
+        print(
+            f"{nama:<34} {r['jumlah']:>8} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+            f"{r['p99_ms']:>9.2f} {r['maks_ms']:>9.2f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(hasil, f, indent=2)
+        print(f"\nHasil disimpan di {args.output}")
+    return 0
+
+
+def perintah_prepare_bench(args) -> int:
+    if args.database:
+        DB_CONFIG['database'] = args.database
+    conn = get_connection()
+    try:
+        hasil = bandingkan_prepared(conn, args.ulang)
+    finally:
         conn.close()
+    if not hasil:
+        print("Butuh minimal satu lahan yang sudah diklaim dan satu kondisi tanah untuk benchmark.")
+        return 1
+
+    print(f"Median {args.ulang}x per statement, query biasa vs prepared:\n")
+    print(f"{'statement':<26} {'plan ms':>8} {'biasa us':>9} {'prepared us':>12} {'hemat us':>9} {'hemat':>7}")
+    for nama, r in hasil.items():
+        print(
+            f"{nama:<26} {r['plan_ms']:>8.3f} {r['biasa_us']:>9.1f} {r['prepared_us']:>12.1f} "
+            f"{r['hemat_us']:>9.1f} {r['hemat_persen']:>6.1f}%"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(hasil, f, indent=2)
+        print(f"\nHasil disimpan di {args.output}")
+    return 0
+
+
+def perintah_serve(args) -> int:
+    LAYANAN_CONFIG["timeout_idle"] = args.timeout_idle
+    jalankan_layanan(args.host, args.port, args.worker)
+    return 0
+
+
+def buat_parser_perintah() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="projekFinal.py",
+        description="LABULIS tanpa menu interaktif. Tanpa argumen, menu interaktif yang dijalankan.",
+    )
+    parser.add_argument("--statistik-query", action="store_true",
+                        help="Tampilkan statistik query per fungsi setelah perintah selesai")
+    parser.add_argument("--query-lambat-ms", type=float,
+                        help=f"Ambang log query lambat (default {INSTRUMENTASI_CONFIG['ambang_lambat_ms']:.0f})")
+    parser.add_argument("--explain-lambat", action="store_true",
+                        help="Sertakan EXPLAIN (ANALYZE, BUFFERS) di log query lambat")
+    parser.add_argument("--log-query-lambat", metavar="FILE", help="Tulis log query lambat ke file (JSON per baris)")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+
+    p = sub.add_parser("recommend-batch", help="Hitung ulang rekomendasi tanaman semua lahan")
+    p.add_argument("--lahan", type=int, nargs="*", help="Batasi ke lahan_id tertentu")
+    p.add_argument("--min-survey", type=int, default=3, help="Minimal jumlah survey (default 3)")
+    p.set_defaults(fungsi=perintah_recommend_batch)
+
+    p = sub.add_parser("recommend", help="Tampilkan rekomendasi tanaman lahan tertentu (tanpa menyimpan)")
+    p.add_argument("--lahan", type=int, nargs="+", required=True, help="lahan_id")
+    p.add_argument("--min-survey", type=int, default=3, help="Minimal jumlah survey (default 3)")
+    p.set_defaults(fungsi=perintah_recommend)
+
+    p = sub.add_parser("list-lahan", help="Daftar lahan (semua, milik petani, atau surveyor)")
+    grup = p.add_mutually_exclusive_group()
+    grup.add_argument("--petani", type=int, help="user_id petani")
+    grup.add_argument("--surveyor", type=int, help="user_id surveyor")
+    p.add_argument("--json", action="store_true", help="Satu objek JSON per baris")
+    p.set_defaults(fungsi=perintah_list_lahan)
+
+    p = sub.add_parser("claim-check", help="Uji klaim lahan serentak (tidak boleh ada klaim dobel)")
+    p.add_argument("--threads", type=int, default=50, help="Jumlah surveyor serentak (default 50)")
+    p.add_argument("--lahan", type=int, default=500, help="Jumlah lahan uji (default 500)")
+    p.set_defaults(fungsi=perintah_claim_check)
+
+    p = sub.add_parser("tanaman-check", help="Cek indeks tanaman terdekat sama dengan hitung seluruh katalog")
+    p.add_argument("--tanaman", type=int, default=5000, help="Jumlah tanaman sintetis (default 5000)")
+    p.add_argument("--query", type=int, default=600, help="Jumlah query (default 600)")
+    p.add_argument("-k", type=int, default=5, help="Top-k (default 5)")
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(fungsi=perintah_tanaman_check)
+
+    p = sub.add_parser("startup-check", help="Ukur waktu start perintah command line")
+    p.add_argument("--budget-ms", type=float, default=500.0, help="Batas median waktu start (default 500)")
+    p.add_argument("--ulang", type=int, default=5, help="Jumlah pengukuran (default 5)")
+    p.set_defaults(fungsi=perintah_startup_check)
+
+    p = sub.add_parser("migrate", help="Terapkan migrasi skema dari folder migrasi/")
+    p.add_argument("--status", action="store_true", help="Tampilkan migrasi yang sudah/belum diterapkan")
+    p.add_argument("--cek", action="store_true", help="Cek query modul memakai index (data contoh di-rollback)")
+    p.add_argument("--skala", type=int, default=1, help="Pengali jumlah data contoh untuk --cek")
+    p.set_defaults(fungsi=perintah_migrate)
+
+    p = sub.add_parser("import-surveys", help="Import survey dari file CSV/JSONL")
+    p.add_argument("file", nargs="+", help="File survey, kolom: " + ", ".join(KOLOM_IMPORT_SURVEY))
+    p.add_argument("--format", choices=["csv", "jsonl"], help="Default dari ekstensi file")
+    p.add_argument("--tanpa-rekomendasi", action="store_true",
+                   help="Jangan hitung ulang rekomendasi lahan yang diimpor")
+    p.set_defaults(fungsi=perintah_import_surveys)
+
+    p = sub.add_parser("export", help="Export data petani/lahan/survey ke CSV atau Parquet")
+    p.add_argument("jenis", nargs="?", choices=list(DATA_LAHAN), default="survey_data")
+    p.add_argument("-o", "--output", required=True, help="File tujuan (.csv atau .parquet)")
+    p.add_argument("--format", choices=["csv", "parquet"], help="Default dari ekstensi file")
+    p.add_argument("--provinsi", help="ID atau nama provinsi")
+    p.add_argument("--kota", help="ID atau nama kota")
+    p.add_argument("--dari", help="Tanggal awal (YYYY-MM-DD)")
+    p.add_argument("--sampai", help="Tanggal akhir (YYYY-MM-DD)")
+    p.set_defaults(fungsi=perintah_export)
+
+    p = sub.add_parser("benchmark", help="Benchmark query dengan data sintetis (database terpisah)")
+    p.add_argument("--database", default="labulis_bench", help="Database benchmark, dibuat ulang (default labulis_bench)")
+    p.add_argument("--surveys", type=int, default=100_000, help="Jumlah survey sintetis (default 100000)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--ulang", type=int, default=50, help="Panggilan per query (default 50)")
+    p.add_argument("--pakai-data", action="store_true", help="Pakai data yang sudah ada, jangan buat ulang")
+    p.add_argument("-o", "--output", help="Simpan hasil ke file JSON")
+    p.add_argument("--bandingkan", help="File JSON hasil run sebelumnya untuk dibandingkan")
+    p.add_argument("--ambang", type=float, default=1.2, help="Rasio p50 yang dianggap melambat (default 1.2)")
+    p.add_argument("--min-selisih-ms", type=float, default=0.1,
+                   help="Selisih p50 di bawah ini dianggap noise (default 0.1)")
+    p.set_defaults(fungsi=perintah_benchmark)
+
+    p = sub.add_parser("loadtest", help="Uji beban: banyak sesi surveyor/petani/admin serentak")
+    p.add_argument("--database", default="labulis_bench", help="Database uji (default labulis_bench)")
+    p.add_argument("--siapkan", action="store_true", help="Buat ulang database dengan data sintetis dulu")
+    p.add_argument("--surveys", type=int, default=100_000, help="Skala data sintetis (default 100000)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--sesi", type=int, default=20, help="Jumlah sesi serentak (default 20)")
+    p.add_argument("--durasi", type=float, default=30.0, help="Lama uji dalam detik (default 30)")
+    p.add_argument("--jeda-ms", type=float, default=200.0, help="Rata-rata waktu mikir antar langkah (default 200)")
+    p.add_argument("--mix", default="surveyor=5,petani=4,admin=1", help="Perbandingan sesi per role")
+    p.add_argument("-o", "--output", help="Simpan hasil ke file JSON")
+    p.set_defaults(fungsi=perintah_loadtest)
+
+    p = sub.add_parser("prepare-bench", help="Bandingkan query biasa vs prepared statement (semua di-rollback)")
+    p.add_argument("--database", help="Database yang dipakai (default dari DB_CONFIG)")
+    p.add_argument("--ulang", type=int, default=1000, help="Jumlah panggilan per statement (default 1000)")
+    p.add_argument("-o", "--output", help="Simpan hasil ke file JSON")
+    p.set_defaults(fungsi=perintah_prepare_bench)
+
+    p = sub.add_parser("offline-prepare", help="Salin lahan dan katalog tanaman untuk survey offline")
+    p.add_argument("--username", required=True, help="Username surveyor")
+    p.add_argument("--password", help="Password (kalau kosong ditanyakan)")
+    p.add_argument("--file", default=OFFLINE_CONFIG['file'], help=f"File jurnal (default {OFFLINE_CONFIG['file']})")
+    p.set_defaults(fungsi=perintah_offline_prepare)
+
+    p = sub.add_parser("offline-survey", help="Menu survey tanpa koneksi database, disimpan ke jurnal")
+    p.add_argument("--file", default=OFFLINE_CONFIG['file'], help=f"File jurnal (default {OFFLINE_CONFIG['file']})")
+    p.set_defaults(fungsi=perintah_offline_survey)
+
+    p = sub.add_parser("sync", help="Kirim survey dari jurnal offline ke database")
+    p.add_argument("--file", default=OFFLINE_CONFIG['file'], help=f"File jurnal (default {OFFLINE_CONFIG['file']})")
+    p.add_argument("--batch", type=int, default=OFFLINE_CONFIG['ukuran_batch'],
+                   help=f"Survey per transaksi (default {OFFLINE_CONFIG['ukuran_batch']})")
+    p.add_argument("--tanpa-rekomendasi", action="store_true", help="Jangan hitung ulang rekomendasi")
+    p.set_defaults(fungsi=perintah_sync)
+
+    p = sub.add_parser("dashboard-refresh", help="Perbarui agregat dashboard wilayah dari survey baru")
+    p.add_argument("--penuh", action="store_true", help="Hitung ulang semua agregat dari awal")
+    p.set_defaults(fungsi=perintah_dashboard_refresh)
+
+    p = sub.add_parser("hapus-lahan", help="Hapus banyak lahan sekaligus (dengan survey, penanaman, kondisi tanah)")
+    p.add_argument("--lahan", type=int, nargs="+", help="lahan_id")
+    p.add_argument("--kecamatan", help="ID atau nama kecamatan")
+    p.add_argument("--kota", help="ID atau nama kota")
+    p.add_argument("--provinsi", help="ID atau nama provinsi")
+    p.add_argument("--petani", type=int, help="user_id petani pemilik lahan")
+    p.add_argument("--coba", action="store_true", help="Tampilkan jumlah yang akan terhapus saja")
+    p.add_argument("--ya", action="store_true", help="Hapus tanpa konfirmasi")
+    p.set_defaults(fungsi=perintah_hapus_lahan)
+
+    p = sub.add_parser("hapus-user", help="Hapus banyak user sekaligus (lahan petani ikut terhapus)")
+    p.add_argument("--user", type=int, nargs="+", help="user_id")
+    p.add_argument("--username", nargs="+", help="username")
+    p.add_argument("--role", help="Hanya user dengan role ini")
+    p.add_argument("--tidak-aktif", type=int, metavar="HARI", help="Tanpa survey dalam HARI hari terakhir")
+    p.add_argument("--coba", action="store_true", help="Tampilkan jumlah yang akan terhapus saja")
+    p.add_argument("--ya", action="store_true", help="Hapus tanpa konfirmasi")
+    p.set_defaults(fungsi=perintah_hapus_user)
+
+    p = sub.add_parser("serve", help="Jalankan layanan HTTP/JSON")
+    p.add_argument("--host", default=LAYANAN_CONFIG['host'])
+    p.add_argument("--port", type=int, default=LAYANAN_CONFIG['port'])
+    p.add_argument("--worker", type=int, default=LAYANAN_CONFIG['worker'], help="Jumlah thread worker")
+    p.add_argument("--max-koneksi", type=int, help="Ukuran maksimal pool koneksi")
+    p.add_argument("--timeout-idle", type=float, default=LAYANAN_CONFIG['timeout_idle'],
+                   help="Detik sebelum koneksi keep-alive yang diam ditutup")
+    p.set_defaults(fungsi=perintah_serve)
+
+    return parser
+
+
+def jalankan_perintah(argv: list[str]) -> int:
+    """
+    Jalankan satu perintah dari command line, lalu keluar
+    """
+    args = buat_parser_perintah().parse_args(argv)
+    if getattr(args, "max_koneksi", None):
+        POOL_CONFIG['max_koneksi'] = args.max_koneksi
+    if args.query_lambat_ms is not None:
+        INSTRUMENTASI_CONFIG['ambang_lambat_ms'] = args.query_lambat_ms
+    INSTRUMENTASI_CONFIG['explain'] = args.explain_lambat
+    INSTRUMENTASI_CONFIG['file_log'] = args.log_query_lambat
+    try:
+        return args.fungsi(args)
+    finally:
+        if args.statistik_query:
+            print()
+            cetak_statistik_query()
+        # Perintah yang tidak pakai database tidak perlu membuka pool
+        if _pool is not None:
+            _pool.tutup()
+
+# Main
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(jalankan_perintah(sys.argv[1:]))
+
+    siapkan_terminal()
+    pool = get_pool()
+    conn = pool.pinjam()
+    clear_terminal()
+    try:
+        while True:
+            tampilkan_layar(
+                "1. Login",
+                "2. Registrasi user baru",
+                "0. Keluar",
+            )
+
+            pilihan = input("Pilih menu: ").strip()
+
+            if pilihan == "1":
+                user = login(conn)
+                if not user:
+                    # Login gagal, kembali ke menu utama
+                    continue
+                role = user.get('role')
+                if role == "admin":
+                    menu_admin(conn, user)
+                elif role == "petani":
+                    menu_petani(conn, user)
+                elif role == "surveyor":
+                    menu_surveyor(conn, user)
+                else:
+                    print("Role tidak dikenali.")
+
+
+            elif pilihan == "2":
+                signup(conn)
+            elif pilihan == "0":
+                print("Keluar dari program")
+                clear_terminal()
+                break
+            else:
+                print("Pilihan tidak valid, coba lagi")
+    except KeyboardInterrupt:
         print("\nKeluar dari program secara paksa")
         exit(0)
     finally:
-        conn.close()
+        pool.kembalikan(conn)
+        pool.tutup()